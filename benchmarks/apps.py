@@ -0,0 +1,24 @@
+import time
+
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class BenchmarksConfig(AppConfig):
+    name = "benchmarks"
+
+    def ready(self):
+        if settings.BENCH_DB_LATENCY_MS:
+            connection_created.connect(_add_latency)
+
+
+def _add_latency(sender, connection, **kwargs):
+    """Добавляет задержку к каждому SQL-запросу соединения, имитируя медленную БД."""
+    latency = settings.BENCH_DB_LATENCY_MS / 1000
+
+    def slow_execute(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    connection.execute_wrappers.append(slow_execute)
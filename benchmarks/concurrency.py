@@ -0,0 +1,92 @@
+"""
+Сравнение пропускной способности WSGI и ASGI развертываний под конкурентной нагрузкой.
+
+Каждый уровень конкурентности - это столько потоков, непрерывно повторяющих
+GET-запрос к адресу в течение заданного времени. Для каждого адреса и уровня
+выводится число запросов в секунду и перцентили времени ответа.
+
+    python benchmarks/concurrency.py \\
+        --url http://127.0.0.1:8001/api/network-nodes/1/ \\
+        --url http://127.0.0.1:8002/api/async/network-nodes/1/ \\
+        --user user --password password --concurrency 1,8,32 --duration 10
+"""
+
+import argparse
+import base64
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_level(url, headers, concurrency, duration):
+    """Нагружает адрес заданным числом потоков, возвращает задержки и число ошибок."""
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                request = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError):
+                local_errors += 1
+                continue
+            local_latencies.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return latencies, errors
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", action="append", required=True)
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    credentials = base64.b64encode(f"{args.user}:{args.password}".encode()).decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print(
+        f"{'url':60} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    for url in args.url:
+        for concurrency in levels:
+            latencies, errors = run_level(url, headers, concurrency, args.duration)
+            if len(latencies) < 2:
+                print(
+                    f"{url:60} {concurrency:>5} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {errors:>6}"
+                )
+                continue
+            print(
+                f"{url:60} {concurrency:>5} {len(latencies) / args.duration:>8.1f} "
+                f"{percentile(latencies, 50) * 1000:>8.1f} "
+                f"{percentile(latencies, 95) * 1000:>8.1f} "
+                f"{percentile(latencies, 99) * 1000:>8.1f} {errors:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from rest_framework.test import APIClient
+
+from benchmarks.seed import get_scale, seed_network
+from network.models import NetworkNode
+
+pytest.importorskip("pytest_benchmark")
+
+BUDGETS = json.loads((Path(__file__).parent / "budgets.json").read_text())
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Один раз за сессию заполняет тестовую БД синтетическими сетями."""
+    with django_db_blocker.unblock():
+        seed_network(**get_scale())
+
+
+@pytest.fixture
+def api_client(active_user):
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+    return client
+
+
+@pytest.fixture
+def seeded_nodes(db):
+    """Возвращает по одному звену каждого уровня из синтетической сети."""
+    retail = NetworkNode.objects.filter(level=1).order_by("pk").first()
+    entrepreneur = retail.networknode_set.order_by("pk").first()
+    return retail.supplier, retail, entrepreneur
+
+
+@pytest.fixture
+def within_budget(request, benchmark):
+    """
+    Проверяет после замера, что среднее время не превышает бюджета из budgets.json.
+
+    Бюджеты заданы для масштаба small на SQLite; для других окружений их можно
+    масштабировать переменной BENCH_BUDGET_FACTOR.
+    """
+    yield
+    stats = getattr(benchmark, "stats", None)
+    budget = BUDGETS.get(request.node.name, BUDGETS.get(request.node.originalname))
+    if stats is None or budget is None:
+        return
+
+    limit = budget * float(os.getenv("BENCH_BUDGET_FACTOR", 1))
+    mean = stats.stats.mean
+    assert mean <= limit, (
+        f"{request.node.name}: среднее время {mean * 1000:.1f} мс "
+        f"превышает бюджет {limit * 1000:.1f} мс"
+    )
@@ -0,0 +1,89 @@
+import os
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from network.graph import bump_hierarchy_version
+from network.models import Contact, NetworkNode, Product
+
+SCALES = {
+    "small": {"factories": 10, "retail": 10, "entrepreneurs": 5, "products": 20},
+    "medium": {"factories": 50, "retail": 20, "entrepreneurs": 10, "products": 50},
+    "large": {"factories": 200, "retail": 25, "entrepreneurs": 20, "products": 100},
+}
+
+
+def get_scale():
+    """Возвращает параметры размера синтетической сети из BENCH_SCALE."""
+    return SCALES[os.getenv("BENCH_SCALE", "small")]
+
+
+def seed_network(factories, retail, entrepreneurs, products, seed=42):
+    """
+    Быстро создает синтетические трехуровневые сети через bulk_create.
+
+    Модельная валидация не вызывается, поэтому данные строятся сразу
+    согласованными: уровни заданы явно, у клиентов только продукты поставщика.
+    """
+    rng = random.Random(seed)
+    through = NetworkNode.products.through
+
+    catalog = Product.objects.bulk_create(
+        Product(
+            name=f"Продукт {number}",
+            model=f"MDL-{number}",
+            release_date=date(2020, 1, 1) + timedelta(days=number),
+        )
+        for number in range(products * factories)
+    )
+
+    def create_level(level, node_type, suppliers, per_supplier):
+        nodes = NetworkNode.objects.bulk_create(
+            NetworkNode(
+                name=f"{node_type} {level}-{index}-{number}",
+                node_type=node_type,
+                supplier=supplier,
+                level=level,
+                supplier_debt=Decimal(rng.randint(0, 300_000)) if supplier else 0,
+            )
+            for index, supplier in enumerate(suppliers)
+            for number in range(per_supplier)
+        )
+        return nodes
+
+    factory_nodes = create_level(0, "factory", [None], factories)
+    retail_nodes = create_level(1, "retail", factory_nodes, retail)
+    entrepreneur_nodes = create_level(2, "entrepreneur", retail_nodes, entrepreneurs)
+    all_nodes = factory_nodes + retail_nodes + entrepreneur_nodes
+
+    node_products = {}
+    links = []
+    for index, factory in enumerate(factory_nodes):
+        own = catalog[index * products : (index + 1) * products]
+        node_products[factory.pk] = own
+        links += [through(networknode=factory, product=p) for p in own]
+    for node in retail_nodes + entrepreneur_nodes:
+        supplier_products = node_products[node.supplier_id]
+        own = rng.sample(supplier_products, max(1, len(supplier_products) // 2))
+        node_products[node.pk] = own
+        links += [through(networknode=node, product=p) for p in own]
+    through.objects.bulk_create(links, batch_size=5000)
+
+    countries = ["Россия", "Беларусь", "Казахстан"]
+    cities = ["Москва", "Минск", "Алматы", "Казань", "Гомель", "Астана"]
+    contacts = [
+        Contact(
+            email=f"node{node.pk}@example.com",
+            country=rng.choice(countries),
+            city=rng.choice(cities),
+            street="Тестовая",
+            building_number=str(node.pk),
+            network_node=node,
+        )
+        for node in all_nodes
+    ]
+    Contact.set_locations(contacts)
+    Contact.objects.bulk_create(contacts, batch_size=5000)
+    bump_hierarchy_version()
+
+    return factory_nodes, retail_nodes, entrepreneur_nodes
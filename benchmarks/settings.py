@@ -0,0 +1,25 @@
+"""
+Настройки для запуска бенчмарков.
+
+По умолчанию используется локальная SQLite, при BENCH_DATABASE=postgres -
+PostgreSQL с параметрами из .env (как в основных настройках).
+"""
+
+import os
+
+from electronics_network.settings import *  # noqa: F401,F403
+from electronics_network.settings import BASE_DIR, DATABASES
+
+if os.getenv("BENCH_DATABASE", "sqlite") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "bench_db.sqlite3",
+    }
+
+INSTALLED_APPS = [*INSTALLED_APPS, "benchmarks"]  # noqa: F405
+
+# Искусственная задержка каждого SQL-запроса для сравнения WSGI и ASGI
+# при медленной БД (используется при запуске сервера с этими настройками).
+BENCH_DB_LATENCY_MS = int(os.getenv("BENCH_DB_LATENCY_MS", 0))
+
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
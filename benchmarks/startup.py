@@ -0,0 +1,93 @@
+"""
+Замер времени запуска процессов проекта.
+
+Каждый сценарий запускается в новом интерпретаторе несколько раз; выводится
+медиана времени и самые тяжелые импорты верхнего уровня по данным
+`python -X importtime` (суммарное время модуля вместе с его зависимостями).
+
+    python benchmarks/startup.py --repeat 7 --top 15 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "django_setup": ["-c", "import django; django.setup()"],
+    "wsgi_worker": [
+        "-c",
+        "from electronics_network.wsgi import application; "
+        "from django.urls import get_resolver; get_resolver().url_patterns",
+    ],
+    "manage_help": ["manage.py", "help", "--commands"],
+    "manage_check": ["manage.py", "check"],
+}
+
+
+def run(args, importtime=False):
+    """Запускает интерпретатор с аргументами, возвращает время и вывод stderr."""
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), *args]
+    env = {
+        "DJANGO_SETTINGS_MODULE": "electronics_network.settings",
+        "DEBUG": "false",
+        "SECRET_KEY": "startup-benchmark",
+        **os.environ,
+    }
+    started = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return time.perf_counter() - started, result.stderr
+
+
+def top_imports(importtime_output, limit):
+    """Возвращает импорты верхнего уровня с наибольшим суммарным временем (мс)."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            continue
+        imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Файл для сохранения результатов")
+    args = parser.parse_args()
+
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        run(scenario)
+        durations = [run(scenario)[0] for _ in range(args.repeat)]
+        _, importtime_output = run(scenario, importtime=True)
+        results[name] = {
+            "median_ms": statistics.median(durations) * 1000,
+            "min_ms": min(durations) * 1000,
+            "top_imports_ms": dict(top_imports(importtime_output, args.top)),
+        }
+
+        print(
+            f"{name}: медиана {results[name]['median_ms']:.0f} мс, "
+            f"минимум {results[name]['min_ms']:.0f} мс"
+        )
+        for module, cumulative in results[name]["top_imports_ms"].items():
+            print(f"    {cumulative:8.1f} мс  {module}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
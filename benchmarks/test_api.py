@@ -0,0 +1,150 @@
+import pytest
+
+from network.listing import refresh_listing
+from network.models import City, NetworkNode
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+def test_list_nodes(benchmark, api_client):
+    response = benchmark(api_client.get, "/api/network-nodes/")
+    assert response.status_code == 200
+
+
+def test_list_nodes_filtered(benchmark, api_client):
+    response = benchmark(
+        api_client.get,
+        "/api/network-nodes/",
+        {"country_exact": "Россия", "level": 2, "ordering": "-supplier_debt"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def listing_read_model(settings):
+    """Заполняет таблицу чтения списка звеньев и включает чтение из нее."""
+    refresh_listing()
+    settings.NETWORK_LISTING_READ_MODEL = True
+
+
+def test_list_nodes_read_model(benchmark, api_client, listing_read_model):
+    response = benchmark(api_client.get, "/api/network-nodes/")
+    assert response.status_code == 200
+
+
+def test_list_nodes_filtered_read_model(benchmark, api_client, listing_read_model):
+    response = benchmark(
+        api_client.get,
+        "/api/network-nodes/",
+        {"country_exact": "Россия", "level": 2, "ordering": "-supplier_debt"},
+    )
+    assert response.status_code == 200
+
+
+def test_list_nodes_by_city_id(benchmark, api_client):
+    city_id = City.objects.filter(name="Москва").values_list("pk", flat=True)[0]
+    response = benchmark(
+        api_client.get, "/api/network-nodes/", {"city_id": city_id, "level": 2}
+    )
+    assert response.status_code == 200
+
+
+def test_detail_node(benchmark, api_client, seeded_nodes):
+    retail = seeded_nodes[1]
+    response = benchmark(api_client.get, f"/api/network-nodes/{retail.pk}/")
+    assert response.status_code == 200
+
+
+def test_create_node_with_products(benchmark, api_client, seeded_nodes):
+    factory = seeded_nodes[0]
+    products = [
+        {"name": p.name, "model": p.model, "release_date": str(p.release_date)}
+        for p in factory.products.all()[:10]
+    ]
+    payload = {
+        "name": "Новая сеть",
+        "node_type": "retail",
+        "supplier": factory.pk,
+        "contact": {
+            "email": "bench@example.com",
+            "country": "Россия",
+            "city": "Москва",
+            "street": "Тестовая",
+            "building_number": "1",
+        },
+        "products": products,
+    }
+
+    response = benchmark(api_client.post, "/api/network-nodes/", payload, format="json")
+    assert response.status_code == 201
+
+
+def test_update_node_products(benchmark, api_client, seeded_nodes):
+    factory = seeded_nodes[0]
+    products = [
+        {"name": p.name, "model": p.model, "release_date": str(p.release_date)}
+        for p in factory.products.all()
+    ]
+
+    response = benchmark(
+        api_client.patch,
+        f"/api/network-nodes/{factory.pk}/",
+        {"products": products},
+        format="json",
+    )
+    assert response.status_code == 200
+
+
+def test_patch_node_products_by_ids(benchmark, api_client, seeded_nodes):
+    entrepreneur = seeded_nodes[2]
+    product_ids = list(entrepreneur.products.values_list("pk", flat=True)[:2])
+    payloads = [{"products_remove": product_ids}, {"products_add": product_ids}]
+
+    def patch():
+        payloads.reverse()
+        return api_client.patch(
+            f"/api/network-nodes/{entrepreneur.pk}/", payloads[0], format="json"
+        )
+
+    response = benchmark(patch)
+    assert response.status_code == 200
+
+
+def test_change_supplier_with_subtree(benchmark, api_client, seeded_nodes):
+    factory, retail, _ = seeded_nodes
+    other_factory = NetworkNode.objects.create(node_type="factory", name="Завод Б")
+    other_factory.products.set(factory.products.all())
+    NetworkNode.objects.filter(pk=retail.pk).update(supplier_debt=0)
+    suppliers = [other_factory.pk, factory.pk]
+
+    def change_supplier():
+        suppliers.reverse()
+        return api_client.patch(
+            f"/api/network-nodes/{retail.pk}/",
+            {"supplier": suppliers[0]},
+            format="json",
+        )
+
+    response = benchmark(change_supplier)
+    assert response.status_code == 200
+
+
+def test_admin_changelist(benchmark, admin_client):
+    response = benchmark(admin_client.get, "/admin/network/networknode/")
+    assert response.status_code == 200
+
+
+def test_list_products_page(benchmark, api_client):
+    response = benchmark(api_client.get, "/api/products/", {"search": "Продукт 1"})
+    assert response.status_code == 200
+
+
+def test_products_bulk_upsert(benchmark, api_client):
+    catalog = [
+        {"name": f"Товар {number}", "model": "SKU", "release_date": "2021-01-01"}
+        for number in range(5000)
+    ]
+    response = benchmark(
+        api_client.post, "/api/products/bulk-upsert/", catalog, format="json"
+    )
+    assert response.status_code == 200
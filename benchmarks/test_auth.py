@@ -0,0 +1,38 @@
+import base64
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authentication import BasicAuthentication
+
+from network.authentication import CachedBasicAuthentication
+from network.views import NetworkNodeViewSet
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+@pytest.fixture
+def basic_auth_client(client, seeded_nodes):
+    User.objects.create_user(username="bench", password="bench-password")
+    credentials = base64.b64encode(b"bench:bench-password").decode()
+    client.defaults["HTTP_AUTHORIZATION"] = f"Basic {credentials}"
+    cache.clear()
+    return client, f"/api/network-nodes/{seeded_nodes[1].pk}/"
+
+
+@pytest.mark.parametrize(
+    "authentication_class",
+    [BasicAuthentication, CachedBasicAuthentication],
+    ids=["basic", "cached_basic"],
+)
+def test_detail_with_basic_auth(
+    benchmark, monkeypatch, basic_auth_client, authentication_class
+):
+    """Сравнивает число запросов в секунду (OPS) с кэшем учетных данных и без него."""
+    client, url = basic_auth_client
+    monkeypatch.setattr(
+        NetworkNodeViewSet, "authentication_classes", [authentication_class]
+    )
+
+    response = benchmark(client.get, url)
+    assert response.status_code == 200
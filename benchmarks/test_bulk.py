@@ -0,0 +1,40 @@
+import pytest
+
+from network.bulk import assign_products, reassign_suppliers
+from network.models import NetworkNode, Product
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+def test_reassign_suppliers(benchmark, seeded_nodes):
+    """Переносит всех клиентов завода к другому заводу и обратно одним пакетом."""
+    factory, _, _ = seeded_nodes
+    other_factory = NetworkNode.objects.create(node_type="factory", name="Завод Б")
+    other_factory.products.set(factory.products.all())
+    clients = list(factory.networknode_set.values_list("pk", flat=True))
+    NetworkNode.objects.filter(pk__in=clients).update(supplier_debt=0)
+    suppliers = [other_factory.pk, factory.pk]
+
+    def move():
+        report = reassign_suppliers([(pk, suppliers[0]) for pk in clients])
+        suppliers.reverse()
+        return report
+
+    report = benchmark(move)
+    assert len(report["moved"]) == len(clients)
+
+
+def test_assign_products(benchmark, seeded_nodes):
+    """Добавляет новый продукт всему поддереву завода и удаляет его."""
+    factory, _, _ = seeded_nodes
+    product = Product.objects.create(
+        name="Новинка", model="B", release_date="2020-01-01"
+    )
+
+    def roll_out():
+        added = assign_products(factory.pk, add=[product.pk])
+        removed = assign_products(factory.pk, remove=[product.pk])
+        return added, removed
+
+    added, removed = benchmark(roll_out)
+    assert added["added"] == removed["removed"] == added["nodes"] > 1
@@ -0,0 +1,25 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+def test_create_demo_data(benchmark):
+    benchmark.pedantic(
+        call_command,
+        args=("create_demo_data",),
+        kwargs={"count": 20, "stdout": StringIO()},
+        rounds=3,
+    )
+
+
+def test_check_network(benchmark):
+    """Проверка всей синтетической сети командой check_network."""
+    benchmark.pedantic(
+        call_command,
+        args=("check_network",),
+        kwargs={"stdout": StringIO(), "stderr": StringIO()},
+        rounds=3,
+    )
@@ -0,0 +1,58 @@
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from network.models import NetworkNode
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.usefixtures("within_budget"),
+]
+
+MODES = {
+    "new_connection": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": 1, "max_size": 2}}},
+}
+
+
+@pytest.fixture(params=MODES, ids=list(MODES))
+def connection_mode(request):
+    """Переключает соединение default в режим, соответствующий настройкам DATABASES."""
+    if connection.vendor != "postgresql":
+        pytest.skip("Стоимость соединения измеряется только на PostgreSQL")
+    if request.param == "pool":
+        pytest.importorskip("psycopg_pool")
+
+    original = {
+        key: connection.settings_dict[key]
+        for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")
+    }
+    connection.close()
+    connection.settings_dict.update(
+        {"CONN_HEALTH_CHECKS": False, "OPTIONS": {}, **MODES[request.param]}
+    )
+    yield request.param
+
+    connection.close()
+    connection.close_pool()
+    connection.settings_dict.update(original)
+
+
+def test_request_cycle(benchmark, connection_mode):
+    """
+    Замеряет короткий запрос с жизненным циклом соединения как в обработке HTTP.
+
+    Сигналы request_started и request_finished закрывают устаревшие соединения
+    так же, как это делает Django между запросами. Тест транзакционный: внутри
+    транзакции теста Django не закрывает соединения.
+    """
+
+    def request_cycle():
+        request_started.send(sender=None)
+        try:
+            return NetworkNode.objects.filter(level=1).exists()
+        finally:
+            request_finished.send(sender=None)
+
+    benchmark(request_cycle)
@@ -0,0 +1,30 @@
+import pytest
+
+from network.graph import reset_hierarchy_graph
+from network.models import NetworkNode
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+@pytest.fixture
+def supplier_change(seeded_nodes):
+    """Розничная сеть с клиентами, переносимая к заводу с теми же продуктами."""
+    factory, retail, _ = seeded_nodes
+    other_factory = NetworkNode.objects.create(node_type="factory", name="Завод Б")
+    other_factory.products.set(factory.products.all())
+    NetworkNode.objects.filter(pk=retail.pk).update(supplier_debt=0)
+
+    retail = NetworkNode.objects.get(pk=retail.pk)
+    retail.supplier = other_factory
+    return retail
+
+
+@pytest.mark.parametrize("graph_cache", [False, True], ids=["db", "graph"])
+def test_validate_supplier_change(benchmark, settings, supplier_change, graph_cache):
+    """Сравнивает валидацию смены поставщика с запросами к БД и по снимку иерархии."""
+    settings.NETWORK_GRAPH_CACHE = graph_cache
+    reset_hierarchy_graph()
+    try:
+        benchmark(supplier_change.full_clean)
+    finally:
+        reset_hierarchy_graph()
@@ -0,0 +1,50 @@
+import pytest
+
+from network.models import NetworkNode
+from network.product_index import ProductIndex
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("within_budget")]
+
+
+def clients_missing_products_with_sets():
+    """Проверка продуктов всех клиентов множествами объектов, как в clean_products."""
+    nodes = {node.pk: node for node in NetworkNode.objects.prefetch_related("products")}
+    missing = {}
+    for node in nodes.values():
+        if node.supplier_id is None:
+            continue
+        products = set(node.products.all())
+        supplier_products = set(nodes[node.supplier_id].products.all())
+        if products - supplier_products:
+            missing[node.pk] = products - supplier_products
+    return missing
+
+
+def clients_missing_products_with_index():
+    pairs = list(
+        NetworkNode.objects.filter(supplier__isnull=False).values_list(
+            "pk", "supplier_id"
+        )
+    )
+    index = ProductIndex.for_nodes()
+    return index.missing([pk for pk, _ in pairs], [supplier for _, supplier in pairs])
+
+
+@pytest.mark.parametrize(
+    "check",
+    [clients_missing_products_with_sets, clients_missing_products_with_index],
+    ids=["sets", "numpy"],
+)
+def test_clients_products_subset_of_suppliers(benchmark, check):
+    """Сравнивает проверку продуктов всех клиентов множествами и индексом связей."""
+    assert benchmark(check) == {}
+
+
+def test_holders_of_removed_products(benchmark, seeded_nodes):
+    """Поиск звеньев, у которых есть любой из удаляемых у заводов продуктов."""
+    factory, _, _ = seeded_nodes
+    removed = list(factory.products.values_list("pk", flat=True)[:5])
+    index = ProductIndex.for_nodes()
+
+    holders = benchmark(index.holders, removed)
+    assert factory.pk in holders
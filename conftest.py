@@ -1,8 +1,23 @@
+from contextlib import contextmanager
+
 import pytest
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connections
 from django.test import Client
 
+from network.graph import reset_hierarchy_graph
 from network.models import Contact, NetworkNode, Product
+from network.querywatch import watch_queries
+
+
+def pytest_configure(config):
+    """Добавляет отдельную SQLite-БД, изображающую реплику для чтения."""
+    settings.DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": settings.BASE_DIR / "test_replica_db.sqlite3",
+    }
+    connections.settings = connections.configure_settings(settings.DATABASES)
 
 
 @pytest.fixture
@@ -145,3 +160,52 @@ def admin_client(admin_user):
     client = Client()
     client.force_login(admin_user)
     return client
+
+
+@pytest.fixture
+def query_watch():
+    """
+    Возвращает контекстный менеджер, проваливающий тест при повторяющихся (N+1)
+    или медленных SQL-запросах внутри блока.
+
+    Порог медленного запроса по умолчанию (5 с) не зависит от настроек и
+    заведомо выше времени запросов тестов даже на загруженном CI: тесты
+    проверяют повторы запросов, а не время выполнения.
+    """
+
+    @contextmanager
+    def watch(repeat_threshold=3, slow_query_ms=5000):
+        with watch_queries(
+            "тесте",
+            repeat_threshold=repeat_threshold,
+            slow_query_ms=slow_query_ms,
+            mode="collect",
+        ) as watcher:
+            yield watcher
+
+        if watcher.issues:
+            pytest.fail(watcher.report())
+
+    return watch
+
+
+@pytest.fixture
+def replica(settings):
+    """Включает чтение из реплики; возвращает алиас БД реплики."""
+    settings.NETWORK_DB_REPLICA = "replica"
+    return "replica"
+
+
+@pytest.fixture
+def graph_cache(settings):
+    """Включает снимок иерархии звеньев (network.graph) и сбрасывает его до и после теста."""
+    settings.NETWORK_GRAPH_CACHE = True
+    reset_hierarchy_graph()
+    yield
+    reset_hierarchy_graph()
+
+
+@pytest.fixture
+def listing_read_model(settings):
+    """Включает таблицу чтения списка звеньев (network.listing)."""
+    settings.NETWORK_LISTING_READ_MODEL = True
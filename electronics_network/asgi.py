@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "electronics_network.settings")
+# Под ASGI каждый запрос выполняет синхронный код в своем потоке, и постоянные
+# соединения накапливались бы по одному на поток; вместо них используется пул
+# (POSTGRES_POOL=true) или новое соединение на запрос.
+os.environ.setdefault("POSTGRES_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -2,15 +2,38 @@ import os
 import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 load_dotenv()
 
+
+def env_flag(name, default):
+    """Читает логическую настройку из окружения; пустое значение - значение по умолчанию."""
+    value = os.getenv(name, "")
+    return value.lower() == "true" if value else default
+
+
+def env_choice(name, choices, default):
+    """Читает из окружения одно из значений choices; пустое значение - значение по умолчанию."""
+    value = (os.getenv(name) or default).lower()
+    if value not in choices:
+        raise ImproperlyConfigured(
+            f"Недопустимое значение {name}={value}; допустимые значения: {', '.join(choices)}."
+        )
+    return value
+
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 
-DEBUG = True if os.getenv("DEBUG").lower() == "true" else False
+DEBUG = env_flag("DEBUG", False)
+
+# Профиль "production" включает по умолчанию настройки производительности ниже
+# и превращает предупреждения проверки `check --deploy --tag performance` в ошибки.
+NETWORK_PROFILE = os.getenv("NETWORK_PROFILE", "development")
+PRODUCTION_PROFILE = NETWORK_PROFILE == "production"
 
 ALLOWED_HOSTS = []
 
@@ -27,14 +50,52 @@ INSTALLED_APPS = [
     "network",
 ]
 
+# Сжатие ответов: "off" - выключено, "gzip" - GZipMiddleware Django,
+# "brotli" - django-compression-middleware (br, gzip в зависимости от Accept-Encoding).
+# В настройке выключенное сжатие хранится пустой строкой.
+NETWORK_COMPRESSION = env_choice(
+    "NETWORK_COMPRESSION",
+    ("off", "gzip", "brotli"),
+    "gzip" if PRODUCTION_PROFILE else "off",
+)
+if NETWORK_COMPRESSION == "off":
+    NETWORK_COMPRESSION = ""
+
+# Пропуск middleware сообщений и X-Frame-Options для путей /api/
+NETWORK_TRIM_API_MIDDLEWARE = env_flag(
+    "NETWORK_TRIM_API_MIDDLEWARE", PRODUCTION_PROFILE
+)
+
+COMPRESSION_MIDDLEWARE = {
+    "gzip": "django.middleware.gzip.GZipMiddleware",
+    "brotli": "compression_middleware.middleware.CompressionMiddleware",
+}
+
 MIDDLEWARE = [
+    *(
+        [COMPRESSION_MIDDLEWARE[NETWORK_COMPRESSION]]
+        if NETWORK_COMPRESSION in COMPRESSION_MIDDLEWARE
+        else []
+    ),
+    "network.middleware.RequestMetricsMiddleware",
+    "network.middleware.QueryWatchMiddleware",
+    "network.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    *(
+        [
+            "network.middleware.NonApiMessageMiddleware",
+            "network.middleware.NonApiXFrameOptionsMiddleware",
+        ]
+        if NETWORK_TRIM_API_MIDDLEWARE
+        else [
+            "django.contrib.messages.middleware.MessageMiddleware",
+            "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        ]
+    ),
 ]
 
 ROOT_URLCONF = "electronics_network.urls"
@@ -58,7 +119,7 @@ WSGI_APPLICATION = "electronics_network.wsgi.application"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.BasicAuthentication",
+        "network.authentication.CachedBasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -66,17 +127,91 @@ REST_FRAMEWORK = {
     ],
 }
 
+NETWORK_AUTH_CACHE_TTL = int(os.getenv("NETWORK_AUTH_CACHE_TTL", 60))
+
+# Снимок иерархии звеньев в памяти процесса для проверок при изменении звеньев
+# (network.graph); журнал изменений иерархии ведется и при выключенной настройке
+NETWORK_GRAPH_CACHE = env_flag("NETWORK_GRAPH_CACHE", False)
+
+# Таблица чтения списка звеньев (network.listing): список и фильтры читают одну
+# таблицу с готовыми строками. Перед включением таблицу нужно заполнить командой
+# refresh_network_listing; включена должна быть во всех процессах, изменяющих данные
+NETWORK_LISTING_READ_MODEL = env_flag("NETWORK_LISTING_READ_MODEL", False)
+
+NETWORK_METRICS_ENABLED = env_flag("NETWORK_METRICS_ENABLED", False)
+
+# Адреса и подсети (через запятую), с которых /metrics доступен без входа
+# сотрудника staff, например адрес сервера Prometheus
+NETWORK_METRICS_ALLOWED_IPS = [
+    network.strip()
+    for network in os.getenv("NETWORK_METRICS_ALLOWED_IPS", "").split(",")
+    if network.strip()
+] or ["127.0.0.1", "::1"]
+
+NETWORK_QUERY_WATCH = os.getenv("NETWORK_QUERY_WATCH", "")
+NETWORK_QUERY_WATCH_REPEAT_THRESHOLD = int(
+    os.getenv("NETWORK_QUERY_WATCH_REPEAT_THRESHOLD", 5)
+)
+NETWORK_QUERY_WATCH_SLOW_MS = float(os.getenv("NETWORK_QUERY_WATCH_SLOW_MS", 200))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": env_flag("POSTGRES_CONN_HEALTH_CHECKS", True),
+        "OPTIONS": {},
     }
 }
 
+if env_flag("POSTGRES_POOL", False):
+    # Пул соединений psycopg 3 (пакет psycopg[pool]); Django не допускает
+    # одновременного использования пула и постоянных соединений.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+        "timeout": int(os.getenv("POSTGRES_POOL_TIMEOUT", 10)),
+    }
+
+if os.getenv("POSTGRES_REPLICA_HOST"):
+    # Реплика PostgreSQL только для чтения; в тестах она указывает на тестовую БД default.
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+        "TEST": {"MIRROR": "default"},
+    }
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+# Хранилище сессий: db, cache, cached_db, file или signed_cookies
+# (django.contrib.sessions.backends.*)
+SESSION_ENGINE = "django.contrib.sessions.backends." + env_choice(
+    "SESSION_BACKEND",
+    ("db", "cache", "cached_db", "file", "signed_cookies"),
+    "cached_db" if PRODUCTION_PROFILE else "db",
+)
+
+DATABASE_ROUTERS = ["network.routers.PrimaryReplicaRouter"]
+
+# Алиас БД для чтения в безопасных запросах API и админ-панели (None - без реплики)
+NETWORK_DB_REPLICA = "replica" if "replica" in DATABASES else None
+
+# Сколько секунд после изменения данных пользователь читает из основной БД
+NETWORK_REPLICA_STICKY_SECONDS = int(os.getenv("NETWORK_REPLICA_STICKY_SECONDS", 5))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -0,0 +1,186 @@
+"""
+Сценарий нагрузочного тестирования API звеньев сети для Locust.
+
+Запуск против локального сервера (runserver или gunicorn) с заполненной БД:
+
+    locust -f loadtests/locustfile.py --host http://127.0.0.1:8000
+
+Параметры задаются переменными окружения:
+    LOADTEST_USERNAME, LOADTEST_PASSWORD - учетные данные активного сотрудника;
+    LOADTEST_AUTH - basic (по умолчанию) или session;
+    LOADTEST_MIX - доли операций, например "list=40,filter=25,detail=25,create=4,update=4,delete=2".
+"""
+
+import os
+import random
+from datetime import date
+
+from locust import HttpUser, between, stats, task
+
+stats.PERCENTILES_TO_REPORT = [0.5, 0.95, 0.99, 1.0]
+stats.PERCENTILES_TO_STATISTICS = [0.5, 0.95, 0.99]
+
+DEFAULT_MIX = {
+    "list": 40,
+    "filter": 25,
+    "detail": 25,
+    "create": 4,
+    "update": 4,
+    "delete": 2,
+}
+
+
+def parse_mix(value, default):
+    """
+    Разбирает доли операций из строки вида "list=40,detail=25".
+
+    Не указанные операции сохраняют значения по умолчанию, вес 0 отключает операцию.
+    """
+    mix = dict(default)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in mix:
+            raise ValueError(f"Неизвестная операция в LOADTEST_MIX: {name}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"Некорректный вес операции {name}: {weight!r}")
+        if mix[name] < 0:
+            raise ValueError(f"Вес операции {name} не может быть отрицательным")
+    return mix
+
+
+API_URL = "/api/network-nodes/"
+MIX = parse_mix(os.getenv("LOADTEST_MIX", ""), DEFAULT_MIX)
+FILTERS = [
+    {"node_type": "retail"},
+    {"level": "2"},
+    {"country_prefix": "Р"},
+    {"debt_min": "1000", "ordering": "-supplier_debt"},
+    {"ordering": "-created_at"},
+]
+
+
+class NetworkNodeUser(HttpUser):
+    """Сотрудник, выполняющий смесь операций с API звеньев сети."""
+
+    wait_time = between(
+        float(os.getenv("LOADTEST_WAIT_MIN", 0.5)),
+        float(os.getenv("LOADTEST_WAIT_MAX", 2)),
+    )
+
+    def on_start(self):
+        username = os.environ["LOADTEST_USERNAME"]
+        password = os.environ["LOADTEST_PASSWORD"]
+        if os.getenv("LOADTEST_AUTH", "basic") == "session":
+            self._login(username, password)
+        else:
+            self.client.auth = (username, password)
+
+        self.node_ids = []
+        self.factories = []
+        self.created_ids = []
+        self._load_nodes()
+
+    def _login(self, username, password):
+        """Входит через страницу авторизации админ-панели и сохраняет CSRF-токен."""
+        self.client.get("/admin/login/", name="login")
+        csrf_token = self.client.cookies.get("csrftoken", "")
+        with self.client.post(
+            "/admin/login/?next=/admin/",
+            {
+                "username": username,
+                "password": password,
+                "csrfmiddlewaretoken": csrf_token,
+            },
+            headers={"Referer": f"{self.host}/admin/login/"},
+            name="login",
+            catch_response=True,
+        ) as response:
+            if "sessionid" not in self.client.cookies:
+                response.failure("Не удалось войти: сессия не создана")
+        self.client.headers["X-CSRFToken"] = self.client.cookies.get("csrftoken", "")
+        self.client.headers["Referer"] = f"{self.host}/"
+
+    def _load_nodes(self):
+        """Запоминает id существующих звеньев и заводы с продуктами для создания звеньев."""
+        with self.client.get(
+            API_URL, params={"node_type": "factory"}, name="setup", catch_response=True
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"Не удалось получить заводы: {response.status_code}")
+                return
+            self.factories = [node for node in response.json() if node["products"]]
+
+        with self.client.get(API_URL, name="setup", catch_response=True) as response:
+            if response.status_code == 200:
+                self.node_ids = [node["id"] for node in response.json()]
+
+    @task(MIX["list"])
+    def list_nodes(self):
+        self.client.get(API_URL, name="list")
+
+    @task(MIX["filter"])
+    def filter_nodes(self):
+        self.client.get(API_URL, params=random.choice(FILTERS), name="filter")
+
+    @task(MIX["detail"])
+    def detail_node(self):
+        if self.node_ids:
+            node_id = random.choice(self.node_ids)
+            self.client.get(f"{API_URL}{node_id}/", name="detail")
+
+    @task(MIX["create"])
+    def create_node(self):
+        if not self.factories:
+            return
+        factory = random.choice(self.factories)
+        products = random.sample(
+            factory["products"], k=random.randint(1, len(factory["products"]))
+        )
+        payload = {
+            "name": f"Нагрузка {random.randint(1, 10**9)}",
+            "node_type": "retail",
+            "supplier": factory["id"],
+            "supplier_debt": "0.00",
+            "contact": {
+                "email": "load@example.com",
+                "country": "Россия",
+                "city": "Москва",
+                "street": "Нагрузочная",
+                "building_number": "1",
+            },
+            "products": [
+                {
+                    "name": product["name"],
+                    "model": product["model"],
+                    "release_date": product["release_date"],
+                }
+                for product in products
+            ],
+        }
+        response = self.client.post(API_URL, json=payload, name="create")
+        if response.status_code == 201:
+            self.created_ids.append(response.json()["id"])
+
+    @task(MIX["update"])
+    def update_node(self):
+        if self.created_ids:
+            node_id = random.choice(self.created_ids)
+            self.client.patch(
+                f"{API_URL}{node_id}/",
+                json={"name": f"Обновлено {date.today():%d.%m.%Y}"},
+                name="update",
+            )
+
+    @task(MIX["delete"])
+    def delete_node(self):
+        if self.created_ids:
+            node_id = self.created_ids.pop(random.randrange(len(self.created_ids)))
+            self.client.delete(f"{API_URL}{node_id}/", name="delete")
+
+    def on_stop(self):
+        """Удаляет звенья, созданные пользователем и оставшиеся после теста."""
+        for node_id in self.created_ids:
+            self.client.delete(f"{API_URL}{node_id}/", name="cleanup")
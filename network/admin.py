@@ -1,8 +1,22 @@
 from django import forms
 from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import F
 from django.utils.html import format_html
 
-from network.models import Contact, NetworkNode, Product
+from network.listing import schedule_listing_refresh
+from network.models import City, Contact, Country, DebtTransaction, NetworkNode, Product
+
+
+class CityListFilter(admin.RelatedFieldListFilter):
+    """Фильтр по городу справочника; страны городов загружаются одним запросом."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        cities = City.objects.select_related("country").order_by(
+            *(ordering or City._meta.ordering)
+        )
+        return [(city.pk, str(city)) for city in cities]
 
 
 @admin.register(Contact)
@@ -17,6 +31,20 @@ class ContactAdmin(admin.ModelAdmin):
     ]
 
 
+@admin.register(Country)
+class CountryAdmin(admin.ModelAdmin):
+    list_display = ["id", "name"]
+    search_fields = ["name"]
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "country"]
+    list_filter = ["country"]
+    list_select_related = ["country"]
+    search_fields = ["name"]
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = [
@@ -41,29 +69,30 @@ class NetworkNodeAdminForm(forms.ModelForm):
             supplier = cleaned_data.get("supplier")
 
             if supplier and products:
-                supplier_products = set(supplier.products.all())
-                selected_products = set(products)
-
-                invalid_products = selected_products - supplier_products
+                supplier_products = set(supplier.products.values_list("pk", flat=True))
+                selected_products = {product.pk for product in products}
+
+                invalid_products = [
+                    product
+                    for product in products
+                    if product.pk not in supplier_products
+                ]
                 if invalid_products:
                     product_names = ", ".join(str(p) for p in invalid_products)
                     raise forms.ValidationError(
                         f"Следующие продукты отсутствуют у поставщика '{supplier.name}': {product_names}"
                     )
 
-                old_instance = NetworkNode.objects.get(pk=self.instance.pk)
-                old_products = set(old_instance.products.all())
+                old_products = set(self.instance.products.values_list("pk", flat=True))
                 removed_products = old_products - selected_products
 
                 if removed_products:
-                    for client in old_instance.networknode_set.all():
-                        client_products = set(client.products.all())
-                        problematic = client_products & removed_products
-                        if problematic:
-                            product_names = ", ".join(str(p) for p in problematic)
-                            raise forms.ValidationError(
-                                f"Нельзя удалить {product_names} - они нужны клиенту '{client.name}'."
-                            )
+                    clients = self.instance.clients_with_products(removed_products)
+                    for client, problematic in clients.items():
+                        product_names = ", ".join(str(p) for p in problematic)
+                        raise forms.ValidationError(
+                            f"Нельзя удалить {product_names} - они нужны клиенту '{client.name}'."
+                        )
 
         return cleaned_data
 
@@ -84,8 +113,9 @@ class NetworkNodeAdmin(admin.ModelAdmin):
         "created_at",
     ]
     list_filter = [
-        "contact__city",
+        ("contact__city_ref", CityListFilter),
     ]
+    list_select_related = ["contact", "supplier"]
     search_fields = [
         "name",
     ]
@@ -109,6 +139,9 @@ class NetworkNodeAdmin(admin.ModelAdmin):
 
     inlines = [ContactInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("products")
+
     def display_products(self, obj):
         """Отображает список продуктов в общем списке звеньев."""
 
@@ -147,9 +180,23 @@ class NetworkNodeAdmin(admin.ModelAdmin):
     supplier_link_detailed.short_description = "Ссылка на поставщика"
 
     def clear_debt(self, request, queryset):
-        """Admin action для очистки задолженности перед поставщиком."""
-
-        updated = queryset.update(supplier_debt=0)
+        """Admin action для очистки задолженности перед поставщиком с записью в журнал."""
+
+        with transaction.atomic():
+            debts = (
+                NetworkNode.objects.select_for_update()
+                .filter(pk__in=queryset.values("pk"))
+                .exclude(supplier_debt=0)
+                .values_list("pk", "supplier_debt")
+            )
+            DebtTransaction.objects.bulk_create(
+                DebtTransaction(
+                    node_id=pk, amount=-debt, comment="Очистка задолженности"
+                )
+                for pk, debt in debts
+            )
+            updated = queryset.update(supplier_debt=0, version=F("version") + 1)
+            schedule_listing_refresh(pk for pk, _ in debts)
         self.message_user(
             request, f"Задолженность очищена для {updated} объектов.", messages.SUCCESS
         )
@@ -0,0 +1,232 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Sum
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from network.authentication import CachedBasicAuthentication
+from network.filters import (
+    NetworkNodeFilter,
+    NetworkNodeListingFilter,
+    StableOrderingFilter,
+)
+from network.graph import hierarchy_graph
+from network.models import NetworkNode, NetworkNodeListing
+from network.permissions import IsActiveEmployee
+from network.serializers import NetworkNodeListingSerializer, NetworkNodeReadSerializer
+from network.views import NetworkNodeViewSet
+
+CHUNK_SIZE = 500
+
+_authenticator = CachedBasicAuthentication()
+_renderer = JSONRenderer()
+
+
+def _json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        _renderer.render(data),
+        content_type="application/json",
+        status=status_code,
+        headers=headers,
+    )
+
+
+def _unauthorized_response(request, detail):
+    return _json_response(
+        {"detail": detail},
+        status.HTTP_401_UNAUTHORIZED,
+        {"WWW-Authenticate": _authenticator.authenticate_header(request)},
+    )
+
+
+async def _check_access(request):
+    """
+    Аутентифицирует запрос и проверяет права так же, как синхронное API.
+
+    Basic-учетные данные проверяются с кэшем (CachedBasicAuthentication), без них
+    используется пользователь сессии. Возвращает ответ с ошибкой или None,
+    если доступ разрешен.
+    """
+    try:
+        result = await sync_to_async(_authenticator.authenticate)(request)
+    except exceptions.AuthenticationFailed as e:
+        return _unauthorized_response(request, e.detail)
+
+    request.user = result[0] if result else await request.auser()
+
+    if not request.user.is_authenticated:
+        return _unauthorized_response(
+            request, exceptions.NotAuthenticated.default_detail
+        )
+    if not IsActiveEmployee().has_permission(request, None):
+        return _json_response(
+            {"detail": exceptions.PermissionDenied.default_detail},
+            status.HTTP_403_FORBIDDEN,
+        )
+    return None
+
+
+def _filter_queryset(request, queryset, filterset_class=NetworkNodeFilter):
+    """
+    Применяет фильтры и сортировку синхронного списка звеньев.
+
+    Возвращает пару (queryset, errors); построение queryset не обращается к БД.
+    """
+    filterset = filterset_class(request.GET, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        return None, filterset.errors
+
+    queryset = StableOrderingFilter().filter_queryset(
+        Request(request), filterset.qs, NetworkNodeViewSet
+    )
+    return queryset, None
+
+
+async def _paginate(request, queryset):
+    """
+    Применяет пагинацию синхронного списка (NetworkNodePagination).
+
+    Возвращает пару (queryset, paginator); без параметра limit пагинация не
+    применяется и paginator равен None.
+    """
+    paginator = NetworkNodeViewSet.pagination_class()
+    drf_request = Request(request)
+    paginator.limit = paginator.get_limit(drf_request)
+    if paginator.limit is None:
+        return queryset, None
+
+    paginator.offset = paginator.get_offset(drf_request)
+    paginator.count = await queryset.acount()
+    paginator.request = drf_request
+    return queryset[paginator.offset : paginator.offset + paginator.limit], paginator
+
+
+async def _serialize(queryset, serializer_class=NetworkNodeReadSerializer):
+    nodes = [node async for node in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+    return serializer_class(nodes, many=True).data
+
+
+@require_safe
+async def network_node_list(request):
+    """Асинхронный список звеньев сети с фильтрами и сортировкой синхронного API."""
+    if error_response := await _check_access(request):
+        return error_response
+
+    if settings.NETWORK_LISTING_READ_MODEL:
+        queryset, errors = _filter_queryset(
+            request, NetworkNodeListing.objects.all(), NetworkNodeListingFilter
+        )
+        serializer_class = NetworkNodeListingSerializer
+    else:
+        queryset, errors = _filter_queryset(request, NetworkNodeViewSet.queryset.all())
+        serializer_class = NetworkNodeReadSerializer
+    if errors:
+        return _json_response(errors, status.HTTP_400_BAD_REQUEST)
+
+    queryset, paginator = await _paginate(request, queryset)
+    data = await _serialize(queryset, serializer_class)
+    if paginator is not None:
+        data = paginator.get_paginated_response(data).data
+    return _json_response(data)
+
+
+@require_safe
+async def network_node_detail(request, pk):
+    """Асинхронная детальная информация о звене сети."""
+    if error_response := await _check_access(request):
+        return error_response
+
+    try:
+        node = await NetworkNodeViewSet.queryset.aget(pk=pk)
+    except NetworkNode.DoesNotExist:
+        return _json_response(
+            {"detail": exceptions.NotFound.default_detail}, status.HTTP_404_NOT_FOUND
+        )
+
+    return _json_response(
+        NetworkNodeReadSerializer(node).data, headers={"ETag": f'"{node.version}"'}
+    )
+
+
+def _graph_descendants(pk):
+    """Id звена и его клиентов по снимку иерархии или None без снимка."""
+    graph = hierarchy_graph()
+    if graph is None or pk not in graph:
+        return None
+    return graph.descendants(pk)
+
+
+@require_safe
+async def network_node_subtree(request, pk):
+    """
+    Асинхронный список звена и всех его клиентов по иерархии.
+
+    Id звеньев берутся из снимка иерархии (NETWORK_GRAPH_CACHE), без него иерархия
+    обходится по уровням: на каждый уровень приходится один запрос id клиентов.
+    Затем все звенья загружаются одним запросом с продуктами.
+    """
+    if error_response := await _check_access(request):
+        return error_response
+
+    node_ids = await sync_to_async(_graph_descendants)(pk)
+    if node_ids is None:
+        if not await NetworkNode.objects.filter(pk=pk).aexists():
+            return _json_response(
+                {"detail": exceptions.NotFound.default_detail},
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        node_ids = [pk]
+        frontier = [pk]
+        while frontier:
+            frontier = [
+                node_id
+                async for node_id in NetworkNode.objects.filter(
+                    supplier_id__in=frontier
+                ).values_list("pk", flat=True)
+            ]
+            node_ids.extend(frontier)
+
+    queryset = NetworkNodeViewSet.queryset.filter(pk__in=node_ids).order_by(
+        "level", "id"
+    )
+    return _json_response(await _serialize(queryset))
+
+
+@require_safe
+async def network_node_stats(request):
+    """
+    Асинхронная сводка по звеньям сети с учетом фильтров списка.
+
+    Возвращает количество звеньев, суммарную, среднюю и максимальную
+    задолженность, а также количество звеньев каждого типа и каждой страны
+    (по id страны из справочника).
+    """
+    if error_response := await _check_access(request):
+        return error_response
+
+    queryset, errors = _filter_queryset(request, NetworkNode.objects.all())
+    if errors:
+        return _json_response(errors, status.HTTP_400_BAD_REQUEST)
+    queryset = queryset.order_by()
+
+    totals = await queryset.aaggregate(
+        count=Count("id"),
+        total_debt=Sum("supplier_debt"),
+        average_debt=Avg("supplier_debt"),
+        max_debt=Max("supplier_debt"),
+    )
+    by_type = {
+        row["node_type"]: row["count"]
+        async for row in queryset.values("node_type").annotate(count=Count("id"))
+    }
+    by_country = {
+        row["contact__country_ref_id"]: row["count"]
+        async for row in queryset.values("contact__country_ref_id").annotate(
+            count=Count("id")
+        )
+    }
+    return _json_response({**totals, "by_node_type": by_type, "by_country": by_country})
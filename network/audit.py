@@ -0,0 +1,235 @@
+"""
+Проверка согласованности всей торговой сети.
+
+Проверяются правила, которые NetworkNode.clean() обеспечивает для отдельных
+звеньев: у завода нет поставщика, у остальных звеньев он есть, уровень звена
+на единицу больше уровня поставщика, глубина иерархии не больше MAX_LEVEL,
+в цепочке поставщиков нет циклов, продукты звена есть у его поставщика.
+
+Звенья загружаются в массивы NumPy одним запросом, проверки иерархии
+выполняются над всеми звеньями сразу, продукты проверяются по ProductIndex.
+Проверку продуктов можно распределить по процессам: каждый процесс получает
+поддеревья нескольких заводов целиком, поэтому поставщик звена всегда
+проверяется в том же процессе.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from network.models import NetworkNode
+from network.product_index import ProductIndex
+
+MAX_LEVEL = NetworkNode.MAX_LEVEL
+NODE_TYPE_CODES = {
+    node_type: code for code, (node_type, _) in enumerate(NetworkNode.NODE_TYPES)
+}
+FACTORY = NODE_TYPE_CODES["factory"]
+NO_SUPPLIER = -1
+
+
+def violation(node_id, check, message, **details):
+    return {"node": int(node_id), "check": check, "message": message, **details}
+
+
+class Hierarchy:
+    """Звенья сети в массивах NumPy, упорядоченных по id."""
+
+    def __init__(self, rows):
+        """rows - кортежи (id, id поставщика или None, уровень, тип звена)."""
+        rows = np.fromiter(
+            chain.from_iterable(
+                (pk, supplier_id or 0, level, NODE_TYPE_CODES[node_type])
+                for pk, supplier_id, level, node_type in rows
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 4)
+        rows = rows[rows[:, 0].argsort()]
+
+        self.node_ids = rows[:, 0]
+        self.supplier_ids = rows[:, 1]
+        self.levels = rows[:, 2]
+        self.node_types = rows[:, 3]
+
+        positions = np.searchsorted(self.node_ids, self.supplier_ids)
+        positions = np.minimum(positions, max(len(self.node_ids) - 1, 0))
+        has_supplier = self.supplier_ids != 0
+        has_supplier[has_supplier] = (
+            self.node_ids[positions[has_supplier]] == self.supplier_ids[has_supplier]
+        )
+        self.has_supplier = has_supplier
+        self.suppliers = np.where(has_supplier, positions, NO_SUPPLIER)
+
+    @classmethod
+    def load(cls, using=DEFAULT_DB_ALIAS):
+        rows = (
+            NetworkNode.objects.using(using)
+            .values_list("pk", "supplier_id", "level", "node_type")
+            .iterator(chunk_size=10_000)
+        )
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def roots(self):
+        """
+        Возвращает позицию верхнего звена цепочки поставщиков для каждого звена.
+
+        Вычисляется удвоением указателей за log2(n) шагов. Для звеньев, цепочка
+        которых замкнута в цикл, возвращается NO_SUPPLIER.
+        """
+        positions = np.arange(len(self))
+        roots = np.where(self.has_supplier, self.suppliers, positions)
+        for _ in range(max(len(self), 1).bit_length()):
+            roots = roots[roots]
+        in_cycle = self.has_supplier[roots]
+        return np.where(in_cycle, NO_SUPPLIER, roots)
+
+    def depths(self):
+        """Возвращает фактическую глубину звеньев, ограниченную MAX_LEVEL + 1."""
+        depths = np.zeros(len(self), dtype=np.int64)
+        for _ in range(MAX_LEVEL + 1):
+            depths = np.where(
+                self.has_supplier,
+                np.minimum(depths[self.suppliers] + 1, MAX_LEVEL + 1),
+                0,
+            )
+        return depths
+
+    def partitions(self, count):
+        """
+        Делит звенья на count групп целыми поддеревьями верхних звеньев.
+
+        Звенья циклов попадают в первую группу. Возвращает списки позиций.
+        """
+        roots = self.roots()
+        unique_roots, sizes = np.unique(roots, return_counts=True)
+        groups = [[] for _ in range(max(count, 1))]
+        loads = [0] * len(groups)
+        for root, size in sorted(zip(unique_roots, sizes), key=lambda item: -item[1]):
+            group = 0 if root == NO_SUPPLIER else loads.index(min(loads))
+            groups[group].append(root)
+            loads[group] += size
+        return [
+            np.nonzero(np.isin(roots, group_roots))[0]
+            for group_roots in groups
+            if group_roots
+        ]
+
+
+def check_hierarchy(hierarchy):
+    """Проверяет поставщиков, уровни, глубину и циклы всех звеньев."""
+    ids = hierarchy.node_ids
+    is_factory = hierarchy.node_types == FACTORY
+    has_supplier = hierarchy.has_supplier
+
+    for position in np.nonzero(is_factory & (hierarchy.supplier_ids != 0))[0]:
+        yield violation(
+            ids[position], "factory_has_supplier", "У завода есть поставщик."
+        )
+
+    for position in np.nonzero(~is_factory & (hierarchy.supplier_ids == 0))[0]:
+        yield violation(ids[position], "supplier_required", "У звена нет поставщика.")
+
+    for position in np.nonzero((hierarchy.supplier_ids != 0) & ~has_supplier)[0]:
+        yield violation(
+            ids[position],
+            "supplier_not_found",
+            "Поставщик звена не найден.",
+            supplier=int(hierarchy.supplier_ids[position]),
+        )
+
+    roots = hierarchy.roots()
+    in_cycle = roots == NO_SUPPLIER
+    for position in np.nonzero(in_cycle)[0]:
+        yield violation(ids[position], "cycle", "Цепочка поставщиков замкнута в цикл.")
+
+    expected_levels = np.where(
+        has_supplier, hierarchy.levels[hierarchy.suppliers] + 1, 0
+    )
+    for position in np.nonzero(~in_cycle & (hierarchy.levels != expected_levels))[0]:
+        yield violation(
+            ids[position],
+            "level_mismatch",
+            "Уровень звена не соответствует уровню поставщика.",
+            level=int(hierarchy.levels[position]),
+            expected=int(expected_levels[position]),
+        )
+
+    depths = hierarchy.depths()
+    for position in np.nonzero(~in_cycle & (depths > MAX_LEVEL))[0]:
+        yield violation(
+            ids[position],
+            "depth_exceeded",
+            f"Глубина иерархии превышает {MAX_LEVEL + 1} уровня.",
+        )
+
+
+def check_products(node_ids, supplier_ids, using=DEFAULT_DB_ALIAS, index=None):
+    """
+    Проверяет, что продукты звеньев есть у их поставщиков.
+
+    node_ids и supplier_ids - пары звеньев с поставщиками. Без готового индекса
+    связи с продуктами загружаются только для этих звеньев.
+    """
+    if index is None:
+        index = ProductIndex.for_nodes(set(node_ids) | set(supplier_ids), using)
+    missing = index.missing(node_ids, supplier_ids)
+    return [
+        violation(
+            node_id,
+            "products_missing_at_supplier",
+            "Продуктов звена нет у поставщика.",
+            products=products,
+        )
+        for node_id, products in sorted(missing.items())
+    ]
+
+
+def _supplied_pairs(hierarchy, positions):
+    positions = positions[hierarchy.has_supplier[positions]]
+    return (
+        hierarchy.node_ids[positions].tolist(),
+        hierarchy.supplier_ids[positions].tolist(),
+    )
+
+
+def audit_network(jobs=1, using=DEFAULT_DB_ALIAS):
+    """
+    Возвращает нарушения правил сети (словари для вывода в JSONL).
+
+    При jobs > 1 продукты проверяются в пуле процессов (fork), по группам
+    поддеревьев верхних звеньев.
+    """
+    hierarchy = Hierarchy.load(using)
+    yield from check_hierarchy(hierarchy)
+
+    if jobs <= 1:
+        node_ids, supplier_ids = _supplied_pairs(hierarchy, np.arange(len(hierarchy)))
+        yield from check_products(
+            node_ids, supplier_ids, index=ProductIndex.for_nodes(using=using)
+        )
+        return
+
+    pairs = [
+        _supplied_pairs(hierarchy, positions)
+        for positions in hierarchy.partitions(jobs)
+    ]
+    # Открытые соединения нельзя разделять между процессами: каждый дочерний
+    # процесс откроет свое соединение при первом запросе.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        results = executor.map(
+            check_products,
+            [node_ids for node_ids, _ in pairs],
+            [supplier_ids for _, supplier_ids in pairs],
+            [using] * len(pairs),
+        )
+        violations = sorted(chain.from_iterable(results), key=lambda item: item["node"])
+    yield from violations
@@ -0,0 +1,56 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BasicAuthentication
+
+CACHE_KEY_PREFIX = "network:basic-auth:"
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Basic-аутентификация с кэшированием проверенных учетных данных.
+
+    Проверка пароля (PBKDF2) выполняется при первом запросе, после чего на время
+    NETWORK_AUTH_CACHE_TTL в кэше сохраняются id пользователя и HMAC хэша его
+    пароля на SECRET_KEY. Ключ кэша - HMAC от логина и пароля; ни пароль, ни его
+    хэш в кэше не хранятся. Последующие запросы загружают пользователя одним
+    запросом к БД и сравнивают HMAC его хэша пароля: смена пароля или
+    деактивация пользователя сразу делают запись недействительной, и
+    выполняется полная проверка.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        ttl = settings.NETWORK_AUTH_CACHE_TTL
+        if not ttl:
+            return super().authenticate_credentials(userid, password, request)
+
+        key = _get_cache_key(userid, password)
+        cached = cache.get(key)
+        if cached is not None:
+            user_id, password_digest = cached
+            user = get_user_model()._default_manager.filter(pk=user_id).first()
+            if (
+                user is not None
+                and user.is_active
+                and constant_time_compare(_hmac(user.password), password_digest)
+            ):
+                return user, None
+            cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(key, (user.pk, _hmac(user.password)), ttl)
+        return user, auth
+
+
+def _hmac(value):
+    return hmac.new(
+        settings.SECRET_KEY.encode(), value.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _get_cache_key(userid, password):
+    return CACHE_KEY_PREFIX + _hmac(f"{userid}\0{password}")
@@ -0,0 +1,389 @@
+"""
+Массовые операции над звеньями сети.
+
+Операции проверяют правила NetworkNode.clean() сразу для всех затронутых
+звеньев по данным, загруженным несколькими запросами, и применяют изменения
+в одной транзакции пакетными UPDATE. Сигналы моделей при этом не вызываются,
+поэтому снимок иерархии (network.graph) и таблица чтения списка звеньев
+(network.listing) обновляются явно.
+"""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Q
+
+from network.graph import bump_hierarchy_version
+from network.listing import schedule_listing_refresh
+from network.models import NetworkNode, Product
+from network.product_index import ProductIndex
+
+UPDATE_BATCH_SIZE = 1000
+INSERT_BATCH_SIZE = 5000
+
+NODE_FIELDS = ["pk", "name", "supplier_id", "level", "node_type", "supplier_debt"]
+
+
+def _lock_nodes(node_ids, using):
+    """Блокирует звенья в порядке id и возвращает их поля по id."""
+    nodes = (
+        NetworkNode.objects.using(using)
+        .select_for_update()
+        .filter(pk__in=node_ids)
+        .order_by("pk")
+        .values(*NODE_FIELDS)
+    )
+    return {node["pk"]: node for node in nodes}
+
+
+def _lock_descendants(nodes, root_ids, using):
+    """
+    Блокирует всех клиентов звеньев root_ids по иерархии и добавляет их в nodes.
+
+    Обходятся клиенты и тех звеньев, что уже заблокированы (например, новых
+    поставщиков пакета): уже заблокированные звенья только не блокируются повторно.
+    """
+    expanded = set()
+    frontier = set(root_ids)
+    while frontier:
+        expanded |= frontier
+        client_ids = set(
+            NetworkNode.objects.using(using)
+            .filter(supplier_id__in=frontier)
+            .values_list("pk", flat=True)
+        )
+        nodes.update(_lock_nodes(client_ids - nodes.keys(), using))
+        frontier = client_ids - expanded
+
+
+class _FinalHierarchy:
+    """Иерархия загруженных звеньев после применения переносов targets."""
+
+    def __init__(self, nodes, targets):
+        self.nodes = nodes
+        self.targets = targets
+        self.clients = defaultdict(list)
+        for node_id in nodes:
+            supplier_id = self.supplier(node_id)
+            if supplier_id is not None:
+                self.clients[supplier_id].append(node_id)
+
+        self.affected = set()
+        frontier = list(targets)
+        while frontier:
+            self.affected.update(frontier)
+            frontier = [
+                client
+                for node_id in frontier
+                for client in self.clients[node_id]
+                if client not in self.affected
+            ]
+        self._levels = {}
+
+    def supplier(self, node_id):
+        return self.targets.get(node_id, self.nodes[node_id]["supplier_id"])
+
+    def level(self, node_id):
+        """Уровень звена после переносов; None, если цепочка поставщиков замкнута в цикл."""
+        path = []
+        current = node_id
+        while current not in self._levels:
+            if current not in self.affected:
+                self._levels[current] = self.nodes[current]["level"]
+                break
+            if current in path:
+                for cycle_node in path:
+                    self._levels[cycle_node] = None
+                return None
+            path.append(current)
+            supplier_id = self.supplier(current)
+            if supplier_id is None:
+                self._levels[path.pop()] = 0
+                break
+            current = supplier_id
+
+        level = self._levels[current]
+        for path_node in reversed(path):
+            level = None if level is None else level + 1
+            self._levels[path_node] = level
+        return self._levels[node_id]
+
+    def moved_ancestor(self, node_id):
+        """Ближайшее к звену перенесенное звено цепочки поставщиков (включая само звено)."""
+        while node_id not in self.targets:
+            node_id = self.supplier(node_id)
+        return node_id
+
+
+def _check_move(node, supplier):
+    """Проверки переноса, не зависящие от других переносов пакета."""
+    if node is None:
+        return "Звено не найдено."
+    if supplier is None:
+        return "Поставщик не найден."
+    if node["pk"] == supplier["pk"]:
+        return "Нельзя указывать себя в качестве поставщика"
+    if node["node_type"] == "factory":
+        return "У завода не может быть поставщика."
+    if node["supplier_debt"] > 0:
+        return "Нельзя изменить поставщика при наличии задолженности."
+    return None
+
+
+def _check_final_hierarchy(nodes, targets, index):
+    """Проверяет глубину, циклы и продукты после применения всех переносов targets."""
+    hierarchy = _FinalHierarchy(nodes, targets)
+    failed = {}
+    for node_id in targets:
+        if hierarchy.level(node_id) is None:
+            failed[node_id] = "Новый поставщик является клиентом звена по иерархии."
+
+    # Превышение глубины приписывается ближайшему перенесенному звену над
+    # слишком глубоким звеном: отказ от этого переноса устраняет нарушение.
+    for node_id in hierarchy.affected:
+        level = hierarchy.level(node_id)
+        if level is not None and level > NetworkNode.MAX_LEVEL:
+            failed[hierarchy.moved_ancestor(node_id)] = (
+                "Выбрать указанного поставщика невозможно - это приводит к превышению "
+                "глубины 3-х уровневой иерархии."
+            )
+
+    pairs = [
+        (member, supplier_id)
+        for node_id, supplier_id in targets.items()
+        if node_id not in failed
+        for member in [node_id, *hierarchy.clients[node_id]]
+    ]
+    missing = index.missing(
+        [member for member, _ in pairs], [supplier_id for _, supplier_id in pairs]
+    )
+    for node_id, supplier_id in targets.items():
+        if node_id in failed:
+            continue
+        if node_id in missing:
+            product_ids = ", ".join(map(str, missing[node_id]))
+            failed[node_id] = (
+                f"Следующие продукты (id) отсутствуют у поставщика "
+                f"'{nodes[supplier_id]['name']}': {product_ids}."
+            )
+        elif any(client in missing for client in hierarchy.clients[node_id]):
+            failed[node_id] = "У нового поставщика нет необходимых продуктов."
+    return failed, hierarchy
+
+
+def reassign_suppliers(moves, all_or_nothing=False, using=DEFAULT_DB_ALIAS):
+    """
+    Переносит звенья к новым поставщикам пакетом.
+
+    moves - пары (id звена, id нового поставщика). Проверяются те же правила,
+    что и при смене поставщика одного звена: задолженность, глубина иерархии
+    (с учетом всех переносов пакета), отсутствие циклов и наличие продуктов
+    звена и его клиентов у нового поставщика. Переносы, не прошедшие проверку,
+    исключаются, остальные проверяются повторно и применяются вместе с пересчетом
+    уровней всех перенесенных поддеревьев. При all_or_nothing=True ошибка
+    любого переноса отменяет весь пакет.
+
+    Возвращает словарь {"moved": [id], "unchanged": [id], "failed": {id: ошибка}}.
+    """
+    result = {"moved": [], "unchanged": [], "failed": {}}
+    failed = result["failed"]
+    targets = {}
+    for node_id, supplier_id in moves:
+        if node_id in targets or node_id in failed:
+            targets.pop(node_id, None)
+            failed[node_id] = "Звено указано в пакете несколько раз."
+        else:
+            targets[node_id] = supplier_id
+
+    with transaction.atomic(using=using):
+        nodes = _lock_nodes(targets.keys() | set(targets.values()), using)
+        for node_id, supplier_id in list(targets.items()):
+            node = nodes.get(node_id)
+            if node is not None and node["supplier_id"] == supplier_id:
+                result["unchanged"].append(node_id)
+                del targets[node_id]
+                continue
+            error = _check_move(node, nodes.get(supplier_id))
+            if error:
+                failed[node_id] = error
+                del targets[node_id]
+
+        _lock_descendants(nodes, targets, using)
+        index = ProductIndex.for_nodes(nodes, using)
+        while targets:
+            move_failures, hierarchy = _check_final_hierarchy(nodes, targets, index)
+            if not move_failures:
+                break
+            failed.update(move_failures)
+            for node_id in move_failures:
+                del targets[node_id]
+
+        if not targets or (failed and all_or_nothing):
+            result["unchanged"].sort()
+            return result
+
+        _apply_moves(nodes, targets, hierarchy, using)
+
+    result["moved"] = sorted(targets)
+    result["unchanged"].sort()
+    return result
+
+
+def _apply_moves(nodes, targets, hierarchy, using):
+    """Записывает новых поставщиков и уровни пакетными UPDATE."""
+    changed = []
+    for node_id in hierarchy.affected:
+        level = hierarchy.level(node_id)
+        if node_id in targets or level != nodes[node_id]["level"]:
+            changed.append(
+                NetworkNode(
+                    pk=node_id,
+                    supplier_id=hierarchy.supplier(node_id),
+                    level=level,
+                    version=F("version") + 1,
+                )
+            )
+
+    NetworkNode.objects.using(using).bulk_update(
+        changed, ["supplier", "level", "version"], batch_size=UPDATE_BATCH_SIZE
+    )
+
+    moves = list(targets.items())
+
+    def change(graph):
+        for node_id, supplier_id in moves:
+            graph.set_supplier(node_id, supplier_id)
+
+    bump_hierarchy_version(change, using, node_ids=list(targets))
+    schedule_listing_refresh([node.pk for node in changed], using=using)
+
+
+def _subtree_filter(root_id, depth):
+    """Условие на звено root_id и его клиентов не глубже depth уровней под ним."""
+    condition = Q(pk=root_id)
+    path = "supplier_id"
+    for _ in range(depth):
+        condition |= Q(**{path: root_id})
+        path = "supplier__" + path
+    return condition
+
+
+def _product_names(product_ids, using):
+    products = Product.objects.using(using).filter(pk__in=product_ids).order_by("pk")
+    return ", ".join(str(product) for product in products)
+
+
+def assign_products(root_id, add=(), remove=(), depth=None, using=DEFAULT_DB_ALIAS):
+    """
+    Добавляет и удаляет продукты у звена и его клиентов одним пакетом.
+
+    depth ограничивает число уровней клиентов под звеном (None - все поддерево).
+    Добавляемые продукты должны быть у поставщика звена; удаляемые не должны
+    оставаться у клиентов, не вошедших в пакет. Проверки выполняются запросами
+    к таблице связей звеньев с продуктами, изменения - пакетными INSERT и одним
+    DELETE. При нарушении выбрасывается ValidationError и ничего не меняется.
+
+    Возвращает словарь {"nodes": число звеньев, "added": число добавленных связей,
+    "removed": число удаленных связей}.
+    """
+    add, remove = set(add), set(remove)
+    if add & remove:
+        raise ValidationError(
+            "Продукты не могут одновременно добавляться и удаляться: "
+            f"{', '.join(map(str, sorted(add & remove)))}."
+        )
+    if depth is None:
+        depth = NetworkNode.MAX_LEVEL
+
+    links = NetworkNode.products.through.objects.using(using)
+    with transaction.atomic(using=using):
+        root = _lock_nodes([root_id], using).get(root_id)
+        if root is None:
+            raise ValidationError("Звено не найдено.")
+
+        subtree = NetworkNode.objects.using(using).filter(
+            _subtree_filter(root_id, depth)
+        )
+        node_ids = list(
+            subtree.select_for_update(of=("self",))
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        found = set(
+            Product.objects.using(using)
+            .filter(pk__in=add | remove)
+            .values_list("pk", flat=True)
+        )
+        if found != add | remove:
+            raise ValidationError(
+                "Продукты не найдены: "
+                f"{', '.join(map(str, sorted((add | remove) - found)))}."
+            )
+
+        if add and root["supplier_id"] is not None:
+            supplied = set(
+                links.filter(
+                    networknode_id=root["supplier_id"], product_id__in=add
+                ).values_list("product_id", flat=True)
+            )
+            if supplied != add:
+                raise ValidationError(
+                    "Следующие продукты отсутствуют у поставщика звена: "
+                    f"{_product_names(add - supplied, using)}."
+                )
+
+        if remove:
+            # Клиенты за пределами пакета: поставщик в пакете, само звено - нет.
+            outside = (
+                links.filter(
+                    networknode__in=NetworkNode.objects.using(using)
+                    .filter(supplier__in=subtree)
+                    .exclude(pk__in=subtree),
+                    product_id__in=remove,
+                )
+                .select_related("networknode")
+                .order_by("networknode_id", "product_id")
+                .first()
+            )
+            if outside is not None:
+                raise ValidationError(
+                    f"Нельзя удалить {_product_names([outside.product_id], using)} - "
+                    f"они должны поставляться клиенту '{outside.networknode.name}'."
+                )
+
+        removed = 0
+        if remove:
+            removed, _ = links.filter(
+                networknode_id__in=subtree, product_id__in=remove
+            ).delete()
+
+        added = 0
+        if add:
+            added = (
+                len(node_ids) * len(add)
+                - links.filter(networknode_id__in=subtree, product_id__in=add).count()
+            )
+            links.bulk_create(
+                (
+                    links.model(networknode_id=node_id, product_id=product_id)
+                    for node_id in node_ids
+                    for product_id in add
+                ),
+                batch_size=INSERT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+
+        if added or removed:
+            subtree.update(version=F("version") + 1)
+
+            def change(graph):
+                for node_id in node_ids:
+                    graph.add_products(node_id, add)
+                    graph.remove_products(node_id, remove)
+
+            bump_hierarchy_version(change, using, node_ids=node_ids)
+            schedule_listing_refresh(node_ids, using=using)
+
+    return {"nodes": len(node_ids), "added": added, "removed": removed}
@@ -0,0 +1,141 @@
+"""
+Загрузка каталога продуктов пакетами.
+
+Строки пакета проверяются вместе: обязательные поля и длины - в Python, даты
+выпуска разбираются и сравниваются с текущей датой массивом NumPy (datetime64).
+Продукты записываются запросами INSERT ... ON CONFLICT DO NOTHING по
+ограничению уникальности (name, model, release_date): все поля продукта входят
+в ключ, поэтому новые продукты добавляются, а существующие не изменяются.
+"""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from network.models import Product
+
+UPSERT_BATCH_SIZE = 5000
+MAX_UPSERT_ROWS = 50_000
+KEY_FIELDS = ["name", "model", "release_date"]
+DATE_LENGTH = len("YYYY-MM-DD")
+
+
+def _text_error(value, max_length):
+    if not isinstance(value, str) or not value.strip():
+        return "Обязательное поле."
+    if len(value) > max_length:
+        return f"Не более {max_length} символов."
+    return None
+
+
+def _parse_dates(values, errors):
+    """Разбирает даты YYYY-MM-DD массивом NumPy; ошибки записывает в errors."""
+    # NumPy импортируется при загрузке каталога, а не при запуске процесса.
+    import numpy as np
+
+    try:
+        dates = np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        dates = np.empty(len(values), dtype="datetime64[D]")
+        for number, value in enumerate(values):
+            try:
+                dates[number] = np.datetime64(value, "D")
+            except ValueError:
+                dates[number] = np.datetime64("NaT")
+
+    invalid = np.isnat(dates)
+    for number in np.flatnonzero(invalid & (np.array(values) != "NaT")):
+        errors[int(number)].append(
+            "release_date: Неверный формат даты, ожидается YYYY-MM-DD."
+        )
+
+    future = ~invalid & (dates > np.datetime64(timezone.localdate(), "D"))
+    for number in np.flatnonzero(future):
+        errors[int(number)].append(
+            "release_date: Продаваемая продукция уже должна быть выпущена."
+        )
+    return dates.astype(object).tolist()
+
+
+def validate_products(rows):
+    """
+    Проверяет строки каталога (словари name, model, release_date).
+
+    Возвращает уникальные ключи продуктов (name, model, date) в порядке первого
+    появления; при ошибках выбрасывает ValidationError со словарем
+    {номер строки: список ошибок}.
+    """
+    errors = defaultdict(list)
+    date_values = []
+    for number, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[number].append(
+                "Ожидается объект с полями name, model, release_date."
+            )
+            row = {}
+        for field in ["name", "model"]:
+            max_length = Product._meta.get_field(field).max_length
+            error = _text_error(row.get(field), max_length)
+            if error:
+                errors[number].append(f"{field}: {error}")
+
+        release_date = row.get("release_date")
+        if not isinstance(release_date, str) or len(release_date) != DATE_LENGTH:
+            errors[number].append(
+                "release_date: Неверный формат даты, ожидается YYYY-MM-DD."
+            )
+            release_date = "NaT"
+        date_values.append(release_date)
+
+    dates = _parse_dates(date_values, errors) if date_values else []
+    if errors:
+        raise ValidationError(dict(errors))
+
+    keys = (
+        (row["name"], row["model"], release_date)
+        for row, release_date in zip(rows, dates)
+    )
+    return list(dict.fromkeys(keys))
+
+
+def _existing_keys(keys, using):
+    """Возвращает ключи пакета, для которых продукт уже существует (один запрос)."""
+    candidates = Product.objects.using(using).filter(
+        name__in={name for name, _, _ in keys},
+        model__in={model for _, model, _ in keys},
+        release_date__in={release_date for _, _, release_date in keys},
+    )
+    return set(candidates.values_list(*KEY_FIELDS)) & set(keys)
+
+
+def upsert_products(rows, using=DEFAULT_DB_ALIAS):
+    """
+    Добавляет продукты каталога, которых еще нет; существующие не изменяются.
+
+    Строки с одинаковыми ключами объединяются. Весь вызов выполняется в одной
+    транзакции: при ошибке в любой строке ничего не записывается.
+
+    Возвращает словарь {"inserted": ..., "unchanged": ..., "duplicates": ...}.
+    """
+    if len(rows) > MAX_UPSERT_ROWS:
+        raise ValidationError(f"Не более {MAX_UPSERT_ROWS} продуктов за один запрос.")
+
+    keys = validate_products(rows)
+    report = {"inserted": 0, "unchanged": 0, "duplicates": len(rows) - len(keys)}
+    with transaction.atomic(using=using):
+        for start in range(0, len(keys), UPSERT_BATCH_SIZE):
+            batch = keys[start : start + UPSERT_BATCH_SIZE]
+            existing = _existing_keys(batch, using)
+            Product.objects.using(using).bulk_create(
+                [
+                    Product(**dict(zip(KEY_FIELDS, key)))
+                    for key in batch
+                    if key not in existing
+                ],
+                ignore_conflicts=True,
+            )
+            report["unchanged"] += len(existing)
+            report["inserted"] += len(batch) - len(existing)
+    return report
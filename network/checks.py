@@ -0,0 +1,108 @@
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+
+def _issue(message, hint, number):
+    """В профиле production нарушения являются ошибками, иначе - предупреждениями."""
+    if settings.NETWORK_PROFILE == "production":
+        return Error(message, hint=hint, id=f"network.E{number:03}")
+    return Warning(message, hint=hint, id=f"network.W{number:03}")
+
+
+@register("performance", deploy=True)
+def check_performance_settings(app_configs, **kwargs):
+    """
+    Проверяет настройки производительности для боевого запуска.
+
+    Выполняется командой `python manage.py check --deploy --tag performance`.
+    """
+    issues = []
+
+    if settings.DEBUG:
+        issues.append(
+            _issue(
+                "DEBUG включен: все SQL-запросы сохраняются в памяти соединения.",
+                "Установите DEBUG=false.",
+                1,
+            )
+        )
+
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        loaders = engine.engine.loaders
+        if not loaders or loaders[0][0] != "django.template.loaders.cached.Loader":
+            issues.append(
+                _issue(
+                    f"Шаблоны {engine.name} загружаются без кэширования.",
+                    "Не задавайте OPTIONS['loaders'] или оберните загрузчики в "
+                    "django.template.loaders.cached.Loader.",
+                    2,
+                )
+            )
+
+    if settings.SESSION_ENGINE == "django.contrib.sessions.backends.db":
+        issues.append(
+            _issue(
+                "Сессии читаются из БД при каждом запросе.",
+                "Установите SESSION_BACKEND=cached_db или cache.",
+                3,
+            )
+        )
+    elif settings.SESSION_ENGINE.endswith((".cache", ".cached_db")) and (
+        settings.CACHES["default"]["BACKEND"]
+        == "django.core.cache.backends.locmem.LocMemCache"
+    ):
+        issues.append(
+            _issue(
+                "Сессии кэшируются в памяти процесса и не разделяются между воркерами.",
+                "Задайте общий кэш через REDIS_URL.",
+                4,
+            )
+        )
+
+    if not settings.NETWORK_COMPRESSION:
+        issues.append(
+            _issue(
+                "Сжатие ответов выключено.",
+                "Установите NETWORK_COMPRESSION=gzip или brotli.",
+                5,
+            )
+        )
+    elif settings.NETWORK_COMPRESSION == "brotli" and not find_spec(
+        "compression_middleware"
+    ):
+        issues.append(
+            Error(
+                "Для NETWORK_COMPRESSION=brotli не установлен пакет "
+                "django-compression-middleware.",
+                hint="Установите пакет или используйте NETWORK_COMPRESSION=gzip.",
+                id="network.E102",
+            )
+        )
+
+    if not settings.NETWORK_TRIM_API_MIDDLEWARE:
+        issues.append(
+            _issue(
+                "Запросы к API проходят middleware сообщений и X-Frame-Options.",
+                "Установите NETWORK_TRIM_API_MIDDLEWARE=true.",
+                6,
+            )
+        )
+
+    default = connections.settings["default"]
+    if not default["CONN_MAX_AGE"] and "pool" not in default["OPTIONS"]:
+        issues.append(
+            _issue(
+                "Соединение с БД открывается заново для каждого запроса.",
+                "Задайте POSTGRES_CONN_MAX_AGE или включите POSTGRES_POOL=true.",
+                7,
+            )
+        )
+
+    return issues
@@ -1,13 +1,157 @@
 import django_filters
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.filters import OrderingFilter
 
-from network.models import NetworkNode
+from network.models import NetworkNode, NetworkNodeListing, Product
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    """Фильтр по списку числовых значений, переданных через запятую."""
 
 
 class NetworkNodeFilter(django_filters.FilterSet):
+    """
+    Фильтры списка звеньев сети.
+
+    Все фильтры, кроме исторического `country` (icontains), рассчитаны на индексы:
+    точное совпадение и префиксный поиск по стране и городу используют btree-индексы
+    (на PostgreSQL для LIKE 'abc%' Django создает дополнительный *_like индекс),
+    country_id и city_id - индексы внешних ключей контакта на справочники,
+    остальные фильтры работают по индексированным колонкам звена и таблице связи
+    с продуктами. Идентификаторы принимаются числами, чтобы валидация параметров
+    не выполняла лишних запросов к базе данных.
+    """
+
     country = django_filters.CharFilter(
         field_name="contact__country", lookup_expr="icontains"
     )
+    country_exact = django_filters.CharFilter(
+        field_name="contact__country", lookup_expr="exact"
+    )
+    country_prefix = django_filters.CharFilter(
+        field_name="contact__country", lookup_expr="startswith"
+    )
+    city = django_filters.CharFilter(field_name="contact__city", lookup_expr="exact")
+    country_id = django_filters.NumberFilter(field_name="contact__country_ref_id")
+    city_id = django_filters.NumberFilter(field_name="contact__city_ref_id")
+    city_prefix = django_filters.CharFilter(
+        field_name="contact__city", lookup_expr="startswith"
+    )
+    node_type = django_filters.ChoiceFilter(choices=NetworkNode.NODE_TYPES)
+    level = django_filters.NumberFilter(field_name="level")
+    supplier = django_filters.NumberFilter(field_name="supplier_id")
+    debt_min = django_filters.NumberFilter(
+        field_name="supplier_debt", lookup_expr="gte"
+    )
+    debt_max = django_filters.NumberFilter(
+        field_name="supplier_debt", lookup_expr="lte"
+    )
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+    products = NumberInFilter(method="filter_products")
+    factory = django_filters.NumberFilter(method="filter_factory_products")
 
     class Meta:
         model = NetworkNode
         fields = []
+
+    def filter_products(self, queryset, name, value):
+        """Оставляет звенья, у которых есть хотя бы один из переданных продуктов."""
+        product_links = NetworkNode.products.through.objects.filter(
+            networknode_id=OuterRef("pk"), product_id__in=value
+        )
+        return queryset.filter(Exists(product_links))
+
+    def filter_factory_products(self, queryset, name, value):
+        """Оставляет звенья, у которых есть хотя бы один продукт завода с переданным id."""
+        through = NetworkNode.products.through
+        factory_products = through.objects.filter(
+            networknode_id=value, networknode__node_type="factory"
+        ).values("product_id")
+        product_links = through.objects.filter(
+            networknode_id=OuterRef("pk"), product_id__in=factory_products
+        )
+        return queryset.filter(Exists(product_links))
+
+
+class NetworkNodeListingFilter(NetworkNodeFilter):
+    """
+    Фильтры списка звеньев по таблице чтения (NetworkNodeListing).
+
+    Поля контакта хранятся в строке таблицы, поэтому фильтры по стране и городу
+    читают ее индексированные колонки. id строки совпадает с id звена, и фильтры
+    по продуктам работают без изменений.
+    """
+
+    country = django_filters.CharFilter(field_name="country", lookup_expr="icontains")
+    country_exact = django_filters.CharFilter(field_name="country", lookup_expr="exact")
+    country_prefix = django_filters.CharFilter(
+        field_name="country", lookup_expr="startswith"
+    )
+    city = django_filters.CharFilter(field_name="city", lookup_expr="exact")
+    country_id = django_filters.NumberFilter(field_name="country_ref_id")
+    city_id = django_filters.NumberFilter(field_name="city_ref_id")
+    city_prefix = django_filters.CharFilter(field_name="city", lookup_expr="startswith")
+
+    class Meta:
+        model = NetworkNodeListing
+        fields = []
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Фильтры каталога продуктов.
+
+    Название и модель ищутся точным совпадением или по префиксу: оба поля
+    индексированы (на PostgreSQL - и индексом *_like для LIKE 'abc%').
+    `search` ищет префикс в названии или модели.
+    """
+
+    name = django_filters.CharFilter(field_name="name", lookup_expr="exact")
+    name_prefix = django_filters.CharFilter(field_name="name", lookup_expr="startswith")
+    model = django_filters.CharFilter(field_name="model", lookup_expr="exact")
+    model_prefix = django_filters.CharFilter(
+        field_name="model", lookup_expr="startswith"
+    )
+    search = django_filters.CharFilter(method="filter_search")
+    released_after = django_filters.DateFilter(
+        field_name="release_date", lookup_expr="gte"
+    )
+    released_before = django_filters.DateFilter(
+        field_name="release_date", lookup_expr="lte"
+    )
+    updated_after = django_filters.IsoDateTimeFilter(
+        field_name="updated_at", lookup_expr="gte"
+    )
+
+    class Meta:
+        model = Product
+        fields = []
+
+    def filter_search(self, queryset, name, value):
+        return queryset.filter(Q(name__startswith=value) | Q(model__startswith=value))
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка с добавлением id в качестве последнего ключа.
+
+    Без уникального ключа строки с равными значениями возвращаются в произвольном
+    порядке. Направление id совпадает с направлением последнего ключа, чтобы
+    составной индекс (поле, id) читался целиком в одну сторону без сортировки.
+    """
+
+    tiebreaker = "id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if any(field.lstrip("-") in (self.tiebreaker, "pk") for field in ordering):
+            return ordering
+
+        direction = "-" if ordering and ordering[-1].startswith("-") else ""
+        ordering.append(f"{direction}{self.tiebreaker}")
+        return ordering
@@ -0,0 +1,538 @@
+"""
+Кэш графа иерархии звеньев сети в памяти процесса.
+
+Снимок хранит поставщика и клиентов каждого звена в компактных массивах, а
+продукты - разреженно: множество продуктов каждого звена и множество звеньев
+каждого продукта. Память и время операций растут с числом связей звеньев с
+продуктами, а не с произведением числа звеньев на размер каталога. Проверки
+глубины иерархии и наличия продуктов у поставщика выполняются без запросов к БД.
+
+Каждое изменение иерархии (создание и удаление звена, смена поставщика,
+изменение продуктов) добавляет в той же транзакции запись в журнал
+HierarchyChange с id измененных звеньев. Запись только вставляется, поэтому
+параллельные изменения не ждут друг друга на общей строке. Снимок помнит
+последнюю учтенную запись; перед использованием он догоняет журнал: звенья из
+новых записей перечитываются из БД. Изменения, сделанные этим процессом,
+применяются к снимку после фиксации транзакции без чтения. Снимок целиком
+строится только вне транзакции, чтобы не держать блокировки строк вызывающего
+кода на время загрузки.
+
+Массовые операции, обходящие сигналы моделей (QuerySet.update, bulk_create,
+SQL-запросы), должны вызывать bump_hierarchy_version(). Запись журнала
+добавляется и при выключенном NETWORK_GRAPH_CACHE, чтобы снимки процессов с
+включенным кэшем не расходились с данными.
+"""
+
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from network.models import HierarchyChange, NetworkNode, Product
+
+NO_SUPPLIER = -1
+RELOAD_BATCH_SIZE = 1000
+
+# Id журнала выдаются при вставке, а видны после фиксации, поэтому более ранняя
+# транзакция может зафиксироваться позже. Пропущенные id ниже последней учтенной
+# записи проверяются GAP_TIMEOUT секунд, после чего считаются откаченными.
+# При построении снимка пропуски ищутся среди последних GAP_WINDOW id.
+GAP_TIMEOUT = 300
+GAP_WINDOW = 100
+
+# Записи журнала старше LOG_RETENTION удаляются при каждой PRUNE_EVERY-й записи;
+# снимок, не сверявшийся с журналом дольше этого срока, строится заново.
+LOG_RETENTION = timedelta(hours=1)
+PRUNE_EVERY = 1000
+
+_lock = threading.Lock()
+_graph = None
+
+
+class HierarchyGraph:
+    """
+    Снимок иерархии звеньев сети.
+
+    Звенья нумеруются позициями в массивах: suppliers[pos] - позиция поставщика
+    (-1 для завода), clients[pos] - позиции клиентов, products[pos] - множество
+    id продуктов звена; holders[product_id] - позиции звеньев с продуктом. Позиции
+    удаленных звеньев не переиспользуются до пересборки снимка.
+
+    version - id последней учтенной записи журнала HierarchyChange, gaps -
+    пропущенные id ниже нее со временем обнаружения, applied - id записей,
+    уже примененных к снимку этим процессом.
+    """
+
+    def __init__(self, version=0):
+        self.version = version
+        self.gaps = {}
+        self.applied = set()
+        self.checked_at = time.monotonic()
+        self.positions = {}
+        self.node_ids = array("q")
+        self.suppliers = array("l")
+        self.clients = []
+        self.products = []
+        self.holders = defaultdict(set)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, using=DEFAULT_DB_ALIAS):
+        """
+        Загружает снимок тремя запросами: последние id журнала, звенья с
+        поставщиками и связи с продуктами.
+
+        Журнал читается первым: записи, зафиксированные во время загрузки, будут
+        применены при следующей сверке.
+        """
+        changes = HierarchyChange.objects.using(using)
+        last_id = changes.aggregate(last_id=Max("pk"))["last_id"] or 0
+        graph = cls(max(last_id - GAP_WINDOW, 0))
+        graph._advance(
+            changes.filter(pk__gt=graph.version, pk__lte=last_id).values_list(
+                "pk", flat=True
+            ),
+            time.monotonic(),
+        )
+
+        nodes = list(
+            NetworkNode.objects.using(using)
+            .order_by("pk")
+            .values_list("pk", "supplier_id")
+        )
+        for node_id, _ in nodes:
+            graph._add_node(node_id)
+        for node_id, supplier_id in nodes:
+            graph._attach(graph.positions[node_id], supplier_id)
+
+        links = NetworkNode.products.through.objects.using(using).values_list(
+            "networknode_id", "product_id"
+        )
+        for node_id, product_id in links.iterator(chunk_size=10_000):
+            position = graph.positions[node_id]
+            graph.products[position].add(product_id)
+            graph.holders[product_id].add(position)
+        return graph
+
+    def __len__(self):
+        return len(self.positions)
+
+    def expired(self):
+        """Снимок не сверялся с журналом дольше срока хранения записей."""
+        return time.monotonic() - self.checked_at > LOG_RETENTION.total_seconds()
+
+    def catch_up(self, using=DEFAULT_DB_ALIAS):
+        """
+        Применяет записи журнала, зафиксированные после снимка, одним запросом
+        журнала и перечитыванием измененных звеньев.
+
+        Возвращает False, если запись требует пересборки снимка (изменение без
+        списка звеньев).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.gaps = {
+                change_id: found_at
+                for change_id, found_at in self.gaps.items()
+                if now - found_at < GAP_TIMEOUT
+            }
+            rows = list(
+                HierarchyChange.objects.using(using)
+                .filter(Q(pk__gt=self.version) | Q(pk__in=list(self.gaps)))
+                .order_by("pk")
+                .values_list("pk", "node_ids", "product_ids")
+            )
+            self.checked_at = now
+
+            node_ids = set()
+            product_ids = set()
+            for change_id, changed_nodes, removed_products in rows:
+                if change_id in self.applied:
+                    self.applied.discard(change_id)
+                    continue
+                if changed_nodes is None:
+                    return False
+                node_ids.update(changed_nodes)
+                product_ids.update(removed_products)
+
+            for product_id in product_ids:
+                self.remove_product(product_id)
+            if node_ids:
+                self._reload(node_ids, using)
+            self._advance((row[0] for row in rows), now)
+            return True
+
+    def __contains__(self, node_id):
+        return node_id in self.positions
+
+    def subtree_depth(self, node_id, limit=None):
+        """Возвращает число уровней клиентов под звеном (0 - клиентов нет)."""
+        with self._lock:
+            depth = 0
+            level = self.clients[self.positions[node_id]]
+            while level and (limit is None or depth < limit):
+                depth += 1
+                level = [
+                    client for position in level for client in self.clients[position]
+                ]
+            return depth
+
+    def descendants(self, node_id):
+        """Возвращает id звена и всех его клиентов по иерархии в порядке уровней."""
+        with self._lock:
+            result = [self.positions[node_id]]
+            index = 0
+            while index < len(result):
+                result.extend(self.clients[result[index]])
+                index += 1
+            return [self.node_ids[position] for position in result]
+
+    def missing_products(self, node_id, supplier_id):
+        """Возвращает id продуктов звена, которых нет у поставщика."""
+        with self._lock:
+            return sorted(self._products(node_id) - self._products(supplier_id))
+
+    def clients_missing_products(self, node_id, supplier_id):
+        """Возвращает id продуктов клиентов звена, которых нет у поставщика."""
+        with self._lock:
+            required = set()
+            for client in self.clients[self.positions[node_id]]:
+                required |= self.products[client]
+            return sorted(required - self._products(supplier_id))
+
+    def set_supplier(self, node_id, supplier_id):
+        """Добавляет звено или переносит его к другому поставщику."""
+        with self._lock:
+            position = self.positions.get(node_id)
+            if position is None:
+                position = self._add_node(node_id)
+            else:
+                self._detach(position)
+            self._attach(position, supplier_id)
+
+    def remove_node(self, node_id):
+        with self._lock:
+            position = self.positions.pop(node_id, None)
+            if position is None:
+                return
+            self._detach(position)
+            self.node_ids[position] = 0
+            self._set_products(position, ())
+
+    def add_products(self, node_id, product_ids):
+        with self._lock:
+            position = self.positions[node_id]
+            for product_id in product_ids:
+                self.products[position].add(product_id)
+                self.holders[product_id].add(position)
+
+    def remove_products(self, node_id, product_ids=None):
+        """Удаляет продукты звена; без product_ids удаляются все продукты."""
+        with self._lock:
+            position = self.positions[node_id]
+            if product_ids is None:
+                self._set_products(position, ())
+                return
+            for product_id in product_ids:
+                self.products[position].discard(product_id)
+                self._discard_holder(product_id, position)
+
+    def set_product_nodes(self, product_id, node_ids, present):
+        """Добавляет продукт звеньям или удаляет его (изменение со стороны продукта)."""
+        with self._lock:
+            for node_id in node_ids:
+                position = self.positions[node_id]
+                if present:
+                    self.products[position].add(product_id)
+                    self.holders[product_id].add(position)
+                else:
+                    self.products[position].discard(product_id)
+                    self._discard_holder(product_id, position)
+
+    def remove_product(self, product_id):
+        """Удаляет продукт у всех звеньев, у которых он есть."""
+        with self._lock:
+            for position in self.holders.pop(product_id, ()):
+                self.products[position].discard(product_id)
+
+    def _advance(self, change_ids, now):
+        """Отмечает записи журнала учтенными и запоминает пропуски перед ними."""
+        for change_id in change_ids:
+            self.gaps.pop(change_id, None)
+            if change_id > self.version:
+                for missing in range(self.version + 1, change_id):
+                    self.gaps[missing] = now
+                self.version = change_id
+
+    def _reload(self, node_ids, using):
+        """Перечитывает поставщиков и продукты звеньев; отсутствующие звенья удаляются."""
+        node_ids = sorted(node_ids)
+        suppliers = {}
+        products = defaultdict(list)
+        links = NetworkNode.products.through.objects.using(using)
+        for start in range(0, len(node_ids), RELOAD_BATCH_SIZE):
+            batch = node_ids[start : start + RELOAD_BATCH_SIZE]
+            suppliers.update(
+                NetworkNode.objects.using(using)
+                .filter(pk__in=batch)
+                .values_list("pk", "supplier_id")
+            )
+            for node_id, product_id in links.filter(
+                networknode_id__in=batch
+            ).values_list("networknode_id", "product_id"):
+                products[node_id].append(product_id)
+
+        for node_id in node_ids:
+            if node_id not in suppliers:
+                self.remove_node(node_id)
+            elif node_id not in self.positions:
+                self._add_node(node_id)
+        for node_id, supplier_id in suppliers.items():
+            self.set_supplier(node_id, supplier_id)
+            self._set_products(self.positions[node_id], products[node_id])
+
+    def _add_node(self, node_id):
+        position = len(self.node_ids)
+        self.positions[node_id] = position
+        self.node_ids.append(node_id)
+        self.suppliers.append(NO_SUPPLIER)
+        self.clients.append(array("l"))
+        self.products.append(set())
+        return position
+
+    def _attach(self, position, supplier_id):
+        if supplier_id is None:
+            return
+        supplier = self.positions[supplier_id]
+        self.suppliers[position] = supplier
+        self.clients[supplier].append(position)
+
+    def _detach(self, position):
+        supplier = self.suppliers[position]
+        if supplier != NO_SUPPLIER:
+            self.clients[supplier].remove(position)
+            self.suppliers[position] = NO_SUPPLIER
+
+    def _products(self, node_id):
+        position = self.positions.get(node_id)
+        return set() if position is None else self.products[position]
+
+    def _set_products(self, position, product_ids):
+        for product_id in self.products[position]:
+            self._discard_holder(product_id, position)
+        self.products[position] = set(product_ids)
+        for product_id in self.products[position]:
+            self.holders[product_id].add(position)
+
+    def _discard_holder(self, product_id, position):
+        positions = self.holders.get(product_id)
+        if positions is not None:
+            positions.discard(position)
+            if not positions:
+                del self.holders[product_id]
+
+
+def _pending_changes(using):
+    """Id записей журнала, добавленных еще не зафиксированными транзакциями соединения."""
+    connection = connections[using]
+    if not hasattr(connection, "network_graph_pending_changes"):
+        connection.network_graph_pending_changes = set()
+    return connection.network_graph_pending_changes
+
+
+def _in_transaction(using):
+    """
+    Выполняется ли код внутри транзакции, открытой приложением.
+
+    Транзакции, которыми тесты Django изолируют данные теста, не учитываются.
+    """
+    connection = connections[using]
+    return connection.in_atomic_block and not all(
+        getattr(block, "_from_testcase", False) for block in connection.atomic_blocks
+    )
+
+
+def hierarchy_graph(using=DEFAULT_DB_ALIAS):
+    """
+    Возвращает актуальный снимок иерархии или None, если кэш выключен.
+
+    None возвращается и внутри транзакции, которая сама уже изменила иерархию:
+    снимок содержит только зафиксированные данные. Внутри транзакции снимок
+    не строится заново - вызывающий код может держать блокировки строк, - а
+    проверки выполняются запросами к БД; снимок строится после фиксации.
+    """
+    global _graph
+
+    if not settings.NETWORK_GRAPH_CACHE:
+        return None
+
+    pending = _pending_changes(using)
+    in_transaction = _in_transaction(using)
+    if not in_transaction:
+        pending.clear()
+    if pending:
+        return None
+
+    graph = _graph
+    if graph is not None and not graph.expired():
+        try:
+            if graph.catch_up(using):
+                return graph
+        except KeyError:
+            pass
+
+    if in_transaction:
+        with _lock:
+            if _graph is graph:
+                _graph = None
+        transaction.on_commit(partial(hierarchy_graph, using), using=using)
+        return None
+
+    graph = HierarchyGraph.build(using)
+    with _lock:
+        _graph = graph
+    return graph
+
+
+def reset_hierarchy_graph():
+    """
+    Сбрасывает снимок процесса и отметки незафиксированных изменений соединений
+    потока; следующее обращение пересоберет снимок.
+    """
+    global _graph
+    with _lock:
+        _graph = None
+    for connection in connections.all(initialized_only=True):
+        connection.network_graph_pending_changes = set()
+
+
+def _apply_change(change_id, change, using):
+    """
+    Применяет изменение этого процесса к снимку после фиксации транзакции.
+
+    Если снимок уже учел записи журнала после этой, изменение будет прочитано
+    из БД при сверке, а не применено поверх более новых данных.
+    """
+    global _graph
+
+    _pending_changes(using).discard(change_id)
+    with _lock:
+        graph = _graph
+        if graph is None:
+            return
+        if change is None:
+            _graph = None
+            return
+    with graph._lock:
+        if change_id <= graph.version:
+            return
+        try:
+            change(graph)
+        except KeyError:
+            with _lock:
+                if _graph is graph:
+                    _graph = None
+            return
+        graph.applied.add(change_id)
+
+
+def bump_hierarchy_version(
+    change=None, using=DEFAULT_DB_ALIAS, node_ids=None, product_ids=()
+):
+    """
+    Добавляет запись журнала изменений иерархии в текущей транзакции.
+
+    node_ids - звенья, у которых изменились поставщик или продукты, product_ids -
+    продукты, удаленные у всех звеньев; без node_ids и product_ids снимки всех
+    процессов будут построены заново. change - функция, применяющая изменение
+    к снимку этого процесса после фиксации; без нее снимок процесса будет
+    сверен с журналом при следующем обращении.
+
+    Запись добавляется и при выключенном в этом процессе NETWORK_GRAPH_CACHE:
+    ее читают процессы, в которых кэш включен.
+    """
+    if node_ids is None and product_ids:
+        node_ids = []
+    changes = HierarchyChange.objects.using(using)
+    entry = changes.create(
+        node_ids=None if node_ids is None else sorted(set(node_ids)),
+        product_ids=sorted(set(product_ids)),
+    )
+    if entry.pk % PRUNE_EVERY == 0:
+        changes.filter(created_at__lt=timezone.now() - LOG_RETENTION).delete()
+
+    if not settings.NETWORK_GRAPH_CACHE:
+        return
+    if node_ids is None:
+        change = None
+    _pending_changes(using).add(entry.pk)
+    transaction.on_commit(lambda: _apply_change(entry.pk, change, using), using=using)
+
+
+@receiver(post_save, sender=NetworkNode, dispatch_uid="network_graph_node_saved")
+def _node_saved(sender, instance, created, using, **kwargs):
+    if not created and instance.supplier_id == getattr(
+        instance, "_loaded_supplier_id", NO_SUPPLIER
+    ):
+        return
+
+    change = partial(
+        HierarchyGraph.set_supplier,
+        node_id=instance.pk,
+        supplier_id=instance.supplier_id,
+    )
+    bump_hierarchy_version(change, using, node_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=NetworkNode, dispatch_uid="network_graph_node_deleted")
+def _node_deleted(sender, instance, using, **kwargs):
+    change = partial(HierarchyGraph.remove_node, node_id=instance.pk)
+    bump_hierarchy_version(change, using, node_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="network_graph_product_deleted")
+def _product_deleted(sender, instance, using, **kwargs):
+    change = partial(HierarchyGraph.remove_product, product_id=instance.pk)
+    bump_hierarchy_version(change, using, product_ids=[instance.pk])
+
+
+@receiver(
+    m2m_changed,
+    sender=NetworkNode.products.through,
+    dispatch_uid="network_graph_products_changed",
+)
+def _products_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Изменение продуктов звена (reverse=False) или звеньев продукта (reverse=True)."""
+    if action == "post_clear":
+        if reverse:
+            change = partial(HierarchyGraph.remove_product, product_id=instance.pk)
+            bump_hierarchy_version(change, using, product_ids=[instance.pk])
+        else:
+            change = partial(HierarchyGraph.remove_products, node_id=instance.pk)
+            bump_hierarchy_version(change, using, node_ids=[instance.pk])
+    elif action in ("post_add", "post_remove") and pk_set:
+        if reverse:
+            change = partial(
+                HierarchyGraph.set_product_nodes,
+                product_id=instance.pk,
+                node_ids=set(pk_set),
+                present=action == "post_add",
+            )
+            bump_hierarchy_version(change, using, node_ids=pk_set)
+        else:
+            method = (
+                HierarchyGraph.add_products
+                if action == "post_add"
+                else HierarchyGraph.remove_products
+            )
+            change = partial(method, node_id=instance.pk, product_ids=set(pk_set))
+            bump_hierarchy_version(change, using, node_ids=[instance.pk])
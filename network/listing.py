@@ -0,0 +1,268 @@
+"""
+Таблица чтения списка звеньев сети (NetworkNodeListing).
+
+Список звеньев собирается из звена, контакта, поставщика и продуктов. Таблица
+чтения хранит по одной готовой строке на звено, поэтому при включенной
+настройке NETWORK_LISTING_READ_MODEL список и его фильтры читают одну таблицу
+по индексам.
+
+Строки обновляются после фиксации транзакций, изменивших данные звеньев:
+сигналы моделей и массовые операции вызывают schedule_listing_refresh(), а
+id звеньев накапливаются для соединения и пересчитываются пакетом. Строка
+строится тем же сериализатором, что и ответ API без таблицы чтения.
+
+Пересчеты разных транзакций могут завершаться в любом порядке, поэтому строки
+звеньев читаются под блокировкой (пересчеты одних звеньев выполняются по
+очереди, и последний читает самые новые данные), а строка с более новой
+версией звена не перезаписывается более старой. Полная
+пересборка (refresh_listing() без аргументов, команда refresh_network_listing)
+выполняется пакетами в отдельных транзакциях и не блокирует чтение списка.
+"""
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from network.models import Contact, NetworkNode, NetworkNodeListing, Product
+from network.serializers import NetworkNodeReadSerializer
+
+REFRESH_BATCH_SIZE = 1000
+
+
+def _build_row(node, data):
+    contact = data["contact"]
+    return NetworkNodeListing(
+        id=node.pk,
+        name=node.name,
+        node_type=node.node_type,
+        level=node.level,
+        version=node.version,
+        supplier_id=node.supplier_id,
+        supplier=data["supplier"],
+        supplier_debt=node.supplier_debt,
+        created_at=node.created_at,
+        country=contact and contact["country"],
+        city=contact and contact["city"],
+        country_ref_id=contact and contact["country_ref"],
+        city_ref_id=contact and contact["city_ref"],
+        contact=contact,
+        products=data["products"],
+    )
+
+
+def _upsert_rows(rows, using):
+    """
+    Записывает строки запросом INSERT ... ON CONFLICT (id) DO UPDATE.
+
+    Существующая строка обновляется, только если ее версия звена не новее
+    записываемой: bulk_create(update_conflicts=True) не поддерживает условие.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = NetworkNodeListing._meta.concrete_fields
+    table = quote(NetworkNodeListing._meta.db_table)
+    columns = [quote(field.column) for field in fields]
+    assignments = ", ".join(
+        f"{column} = EXCLUDED.{column}"
+        for field, column in zip(fields, columns)
+        if not field.primary_key
+    )
+    values = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    batch_size = min(
+        REFRESH_BATCH_SIZE, connection.ops.bulk_batch_size(fields, rows) or len(rows)
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES {', '.join([values] * len(batch))} "
+                f"ON CONFLICT ({quote('id')}) DO UPDATE SET {assignments} "
+                f"WHERE {table}.{quote('version')} <= EXCLUDED.{quote('version')}",
+                [
+                    field.get_db_prep_save(getattr(row, field.attname), connection)
+                    for row in batch
+                    for field in fields
+                ],
+            )
+
+
+def _refresh_nodes(nodes, using):
+    """Перезаписывает строки звеньев queryset nodes; возвращает число строк."""
+    nodes = list(
+        nodes.select_related("contact", "supplier")
+        .prefetch_related("products")
+        .select_for_update(of=("self",))
+        .order_by("pk")
+    )
+    rows = [
+        _build_row(node, data)
+        for node, data in zip(nodes, NetworkNodeReadSerializer(nodes, many=True).data)
+    ]
+    if rows:
+        _upsert_rows(rows, using)
+    return len(rows)
+
+
+def refresh_listing(
+    node_ids=None,
+    supplier_ids=(),
+    product_ids=(),
+    using=DEFAULT_DB_ALIAS,
+):
+    """
+    Пересчитывает строки таблицы чтения и возвращает число записанных строк.
+
+    Обновляются звенья node_ids, клиенты звеньев supplier_ids (в строке клиента
+    хранится название поставщика) и звенья с продуктами product_ids; строки
+    удаленных звеньев из node_ids удаляются; звенья пересчитываются пакетами по
+    REFRESH_BATCH_SIZE в одной транзакции. Без аргументов пересобирается вся
+    таблица: пакетами по REFRESH_BATCH_SIZE звеньев в отдельных транзакциях.
+    """
+    nodes = NetworkNode.objects.using(using)
+    if node_ids is None and not supplier_ids and not product_ids:
+        refreshed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                nodes.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:REFRESH_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            with transaction.atomic(using=using):
+                refreshed += _refresh_nodes(nodes.filter(pk__in=batch), using)
+            last_pk = batch[-1]
+        NetworkNodeListing.objects.using(using).exclude(
+            id__in=nodes.values("pk")
+        ).delete()
+        return refreshed
+
+    node_ids = set(node_ids or ())
+    condition = Q(pk__in=node_ids) | Q(supplier_id__in=supplier_ids)
+    if product_ids:
+        condition |= Exists(
+            NetworkNode.products.through.objects.using(using).filter(
+                networknode_id=OuterRef("pk"), product_id__in=product_ids
+            )
+        )
+    with transaction.atomic(using=using):
+        pks = list(nodes.filter(condition).order_by("pk").values_list("pk", flat=True))
+        refreshed = 0
+        for start in range(0, len(pks), REFRESH_BATCH_SIZE):
+            batch = pks[start : start + REFRESH_BATCH_SIZE]
+            refreshed += _refresh_nodes(nodes.filter(pk__in=batch), using)
+        if node_ids:
+            NetworkNodeListing.objects.using(using).filter(id__in=node_ids).exclude(
+                id__in=nodes.filter(pk__in=node_ids).values("pk")
+            ).delete()
+    return refreshed
+
+
+def _pending(using):
+    """Звенья, поставщики и продукты, ожидающие пересчета строк для соединения."""
+    connection = connections[using]
+    if not hasattr(connection, "network_listing_pending"):
+        connection.network_listing_pending = {
+            "node_ids": set(),
+            "supplier_ids": set(),
+            "product_ids": set(),
+        }
+    return connection.network_listing_pending
+
+
+def _flush(using):
+    pending = _pending(using)
+    if not any(pending.values()):
+        return
+    batch = {key: set(ids) for key, ids in pending.items()}
+    for ids in pending.values():
+        ids.clear()
+    refresh_listing(**batch, using=using)
+
+
+def schedule_listing_refresh(
+    node_ids=(), supplier_ids=(), product_ids=(), using=DEFAULT_DB_ALIAS
+):
+    """
+    Планирует пересчет строк после фиксации текущей транзакции.
+
+    Вне транзакции строки пересчитываются сразу. Запросы нескольких изменений
+    одной транзакции объединяются в один пересчет. Ничего не делает, если таблица
+    чтения выключена.
+    """
+    if not settings.NETWORK_LISTING_READ_MODEL:
+        return
+
+    pending = _pending(using)
+    pending["node_ids"].update(node_ids)
+    pending["supplier_ids"].update(supplier_ids)
+    pending["product_ids"].update(product_ids)
+    # Колбэк регистрируется при каждом вызове: после отката транзакции ее
+    # колбэки отбрасываются, а накопленные id будут пересчитаны следующей.
+    transaction.on_commit(lambda: _flush(using), using=using)
+
+
+@receiver(post_save, sender=NetworkNode, dispatch_uid="network_listing_node_saved")
+def _node_saved(sender, instance, created, using, **kwargs):
+    # Название поставщика хранится в строках клиентов: они пересчитываются,
+    # только если название изменилось относительно загруженного.
+    renamed = not created and instance.name != getattr(instance, "_loaded_name", None)
+    supplier_ids = [instance.pk] if renamed else ()
+    schedule_listing_refresh([instance.pk], supplier_ids, using=using)
+
+
+@receiver(post_delete, sender=NetworkNode, dispatch_uid="network_listing_node_deleted")
+def _node_deleted(sender, instance, using, **kwargs):
+    schedule_listing_refresh([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Contact, dispatch_uid="network_listing_contact_saved")
+@receiver(post_delete, sender=Contact, dispatch_uid="network_listing_contact_deleted")
+def _contact_changed(sender, instance, using, **kwargs):
+    """Пересчитывает звено контакта и звено, от которого контакт перенесен."""
+    node_ids = {
+        instance.network_node_id,
+        getattr(instance, "_loaded_network_node_id", None),
+    } - {None}
+    if node_ids:
+        schedule_listing_refresh(node_ids, using=using)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="network_listing_product_saved")
+def _product_saved(sender, instance, created, using, **kwargs):
+    # Product.save() не записывает продукт без изменений, поэтому сигнал
+    # существующего продукта означает изменение его полей в строках звеньев.
+    if not created:
+        schedule_listing_refresh(product_ids=[instance.pk], using=using)
+
+
+def _schedule_product_holders(product, using):
+    """Планирует пересчет звеньев продукта, пока связи с ним еще не удалены."""
+    if settings.NETWORK_LISTING_READ_MODEL:
+        node_ids = product.network_nodes.using(using).values_list("pk", flat=True)
+        schedule_listing_refresh(list(node_ids), using=using)
+
+
+@receiver(pre_delete, sender=Product, dispatch_uid="network_listing_product_deleted")
+def _product_deleted(sender, instance, using, **kwargs):
+    _schedule_product_holders(instance, using)
+
+
+@receiver(
+    m2m_changed,
+    sender=NetworkNode.products.through,
+    dispatch_uid="network_listing_products_changed",
+)
+def _products_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Изменение продуктов звена (reverse=False) или звеньев продукта (reverse=True)."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            schedule_listing_refresh([instance.pk], using=using)
+    elif action == "pre_clear":
+        _schedule_product_holders(instance, using)
+    elif action in ("post_add", "post_remove"):
+        schedule_listing_refresh(pk_set or (), using=using)
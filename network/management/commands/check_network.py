@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from network.audit import audit_network
+
+
+class Command(BaseCommand):
+    help = "Проверяет согласованность иерархии и продуктов всей торговой сети"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Количество процессов для проверки продуктов по поддеревьям заводов",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="Файл для нарушений в формате JSONL, по умолчанию - стандартный вывод",
+        )
+
+    def handle(self, *args, **options):
+        if options["jobs"] < 1:
+            raise CommandError("Количество процессов должно быть не меньше 1.")
+
+        started = time.perf_counter()
+        output = open(options["output"], "w") if options["output"] else None
+        count = 0
+        try:
+            for violation in audit_network(jobs=options["jobs"]):
+                line = json.dumps(violation, ensure_ascii=False)
+                if output:
+                    output.write(line + "\n")
+                else:
+                    self.stdout.write(line)
+                count += 1
+        finally:
+            if output:
+                output.close()
+
+        duration = time.perf_counter() - started
+        if count:
+            raise CommandError(f"Найдено нарушений: {count} ({duration:.1f} с).")
+        self.stderr.write(
+            self.style.SUCCESS(f"Нарушений не найдено ({duration:.1f} с).")
+        )
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from network.models import DebtSnapshot, DebtTransaction, NetworkNode
+
+PERIOD_STEPS = {
+    "day": lambda start: start + timedelta(days=1),
+    "week": lambda start: start + timedelta(weeks=1),
+    "month": lambda start: (start.replace(day=28) + timedelta(days=4)).replace(day=1),
+}
+
+
+class Command(BaseCommand):
+    help = "Сжимает старые операции журнала задолженности в снимки по периодам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=str,
+            default=None,
+            help="Сжать операции до указанной даты (YYYY-MM-DD), по умолчанию - до начала текущего месяца",
+        )
+        parser.add_argument(
+            "--period",
+            choices=PERIOD_STEPS,
+            default="month",
+            help="Длина периода снимка",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество звеньев, обрабатываемых в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        period = options["period"]
+        cutoff = self.get_cutoff(options["before"], period)
+        batch_size = options["batch_size"]
+
+        self.stdout.write(f"Сжатие операций до {cutoff:%Y-%m-%d %H:%M %Z}...")
+
+        snapshots_count = 0
+        transactions_count = 0
+        last_pk = 0
+        while True:
+            node_ids = list(
+                NetworkNode.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not node_ids:
+                break
+
+            created, deleted = self.compact_batch(node_ids, cutoff, period)
+            snapshots_count += created
+            transactions_count += deleted
+            last_pk = node_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Сжато операций: {transactions_count}, создано снимков: {snapshots_count}."
+            )
+        )
+
+    def get_cutoff(self, before, period):
+        """Возвращает границу сжатия, выровненную по началу периода."""
+        if before:
+            try:
+                day = datetime.strptime(before, "%Y-%m-%d")
+            except ValueError:
+                raise CommandError("Дата должна быть в формате YYYY-MM-DD.")
+        else:
+            day = timezone.localtime().replace(tzinfo=None, day=1)
+
+        day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        if period == "week":
+            day -= timedelta(days=day.weekday())
+        elif period == "month":
+            day = day.replace(day=1)
+
+        cutoff = timezone.make_aware(day)
+        if cutoff > timezone.now():
+            raise CommandError("Нельзя сжимать операции текущего или будущего периода.")
+
+        return cutoff
+
+    def compact_batch(self, node_ids, cutoff, period):
+        """Создает снимки для группы звеньев и удаляет сжатые операции."""
+        old_transactions = DebtTransaction.objects.filter(
+            node_id__in=node_ids, created_at__lt=cutoff
+        )
+
+        with transaction.atomic():
+            totals = (
+                old_transactions.annotate(
+                    period_start=Trunc("created_at", period, tzinfo=cutoff.tzinfo)
+                )
+                .values("node_id", "period_start")
+                .annotate(total=Sum("amount"))
+                .order_by("node_id", "period_start")
+            )
+            if not totals:
+                return 0, 0
+
+            latest_period_end = (
+                DebtSnapshot.objects.filter(node_id=OuterRef("node_id"))
+                .order_by("-period_end")
+                .values("period_end")[:1]
+            )
+            balances = dict(
+                DebtSnapshot.objects.filter(
+                    node_id__in=node_ids, period_end=Subquery(latest_period_end)
+                ).values_list("node_id", "balance")
+            )
+
+            snapshots = []
+            for row in totals:
+                node_id = row["node_id"]
+                balances[node_id] = balances.get(node_id, 0) + row["total"]
+                snapshots.append(
+                    DebtSnapshot(
+                        node_id=node_id,
+                        period_end=PERIOD_STEPS[period](row["period_start"]),
+                        balance=balances[node_id],
+                    )
+                )
+
+            DebtSnapshot.objects.bulk_create(snapshots)
+            deleted, _ = old_transactions.delete()
+
+        return len(snapshots), deleted
@@ -2,8 +2,8 @@ import random
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
-from faker import Faker
 
+from network.graph import bump_hierarchy_version
 from network.models import Contact, NetworkNode, Product
 
 
@@ -24,6 +24,10 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        # Faker импортируется только при выполнении команды: загрузка его локалей
+        # заметно замедляет запуск, а модуль команды загружается и для --help.
+        from faker import Faker
+
         fake = Faker("ru_RU")
         count = options["count"]
         clear = options["clear"]
@@ -41,6 +45,7 @@ class Command(BaseCommand):
 
             NetworkNode.objects.all().delete()
             Product.objects.all().delete()
+            bump_hierarchy_version()
 
             self.stdout.write("Старые данные очищены.")
 
@@ -64,7 +69,7 @@ class Command(BaseCommand):
         for i in range(count):
             products = []
             for _ in range(random.randint(2, 4)):
-                product = Product.objects.create(
+                product, _ = Product.objects.get_or_create(
                     name=random.choice(product_names),
                     model=f"MDL-{random.randint(1, 999)}",
                     release_date=fake.date_between(start_date="-3y", end_date="today"),
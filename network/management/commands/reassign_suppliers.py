@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from network.bulk import reassign_suppliers
+from network.models import NetworkNode
+
+
+class Command(BaseCommand):
+    help = "Переносит звенья к новому поставщику одной транзакцией"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--to", type=int, required=True, help="Id нового поставщика"
+        )
+        nodes = parser.add_mutually_exclusive_group(required=True)
+        nodes.add_argument(
+            "--from",
+            dest="from_supplier",
+            type=int,
+            help="Перенести всех клиентов указанного поставщика",
+        )
+        nodes.add_argument(
+            "--nodes", type=int, nargs="+", help="Id переносимых звеньев"
+        )
+        parser.add_argument(
+            "--all-or-nothing",
+            action="store_true",
+            help="Не переносить ни одного звена, если хотя бы один перенос невозможен",
+        )
+
+    def handle(self, *args, **options):
+        node_ids = options["nodes"]
+        if node_ids is None:
+            node_ids = list(
+                NetworkNode.objects.filter(supplier_id=options["from_supplier"])
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+        if not node_ids:
+            raise CommandError("Нет звеньев для переноса.")
+
+        report = reassign_suppliers(
+            [(node_id, options["to"]) for node_id in node_ids],
+            all_or_nothing=options["all_or_nothing"],
+        )
+        for node_id, error in sorted(report["failed"].items()):
+            self.stdout.write(
+                json.dumps({"node": node_id, "error": error}, ensure_ascii=False)
+            )
+
+        summary = (
+            f"Перенесено: {len(report['moved'])}, без изменений: "
+            f"{len(report['unchanged'])}, с ошибками: {len(report['failed'])}."
+        )
+        if report["failed"] and options["all_or_nothing"]:
+            raise CommandError(f"Перенос отменен. {summary}")
+        if report["failed"]:
+            self.stderr.write(self.style.WARNING(summary))
+        else:
+            self.stderr.write(self.style.SUCCESS(summary))
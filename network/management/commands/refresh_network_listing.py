@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from network.listing import refresh_listing
+
+
+class Command(BaseCommand):
+    help = "Пересобирает таблицу чтения списка звеньев сети"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--nodes",
+            type=int,
+            nargs="+",
+            help="Пересчитать только строки указанных звеньев",
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_listing(options["nodes"])
+        self.stdout.write(self.style.SUCCESS(f"Обновлено строк: {refreshed}."))
@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_request = ContextVar("network_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Показатели одного запроса: SQL-запросы, время БД и сериализации."""
+
+    __slots__ = ("queries", "db_time", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка выполнения SQL для connection.execute_wrapper()."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def collect_request_metrics():
+    """Делает показатели запроса текущими для кода, выполняемого внутри блока."""
+    metrics = RequestMetrics()
+    token = _current_request.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_request.reset(token)
+
+
+@contextmanager
+def track_serializer_time():
+    """Добавляет время выполнения блока к времени сериализации текущего запроса."""
+    metrics = _current_request.get()
+    if metrics is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Учитывает построение serializer.data во времени сериализации запроса."""
+
+    @property
+    def data(self):
+        with track_serializer_time():
+            return super().data
+
+
+class _Series:
+    __slots__ = (
+        "requests",
+        "duration",
+        "buckets",
+        "queries",
+        "db_time",
+        "serializer_time",
+        "response_size",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.response_size = 0
+
+
+class MetricsRegistry:
+    """Накопленные показатели запросов процесса в разрезе представления и действия."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._statuses = {}
+
+    def observe(self, view, action, status, duration, metrics, response_size):
+        """Добавляет показатели завершенного запроса."""
+        key = (view, action)
+        bucket = bisect_left(DURATION_BUCKETS, duration)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.requests += 1
+            series.duration += duration
+            series.buckets[bucket] += 1
+            series.queries += metrics.queries
+            series.db_time += metrics.db_time
+            series.serializer_time += metrics.serializer_time
+            series.response_size += response_size
+
+            status_key = (view, action, str(status))
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._statuses.clear()
+
+    def render_prometheus(self):
+        """Возвращает показатели в текстовом формате Prometheus."""
+        with self._lock:
+            series = sorted(self._series.items())
+            statuses = sorted(self._statuses.items())
+
+        lines = [
+            "# HELP network_http_requests_total Количество обработанных запросов.",
+            "# TYPE network_http_requests_total counter",
+        ]
+        for (view, action, status), count in statuses:
+            labels = _labels(view=view, action=action, status=status)
+            lines.append(f"network_http_requests_total{{{labels}}} {count}")
+
+        lines += [
+            "# HELP network_http_request_duration_seconds Время обработки запроса.",
+            "# TYPE network_http_request_duration_seconds histogram",
+        ]
+        for (view, action), item in series:
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), item.buckets):
+                cumulative += count
+                labels = _labels(view=view, action=action, le=str(bound))
+                lines.append(
+                    f"network_http_request_duration_seconds_bucket{{{labels}}} {cumulative}"
+                )
+            labels = _labels(view=view, action=action)
+            lines.append(
+                f"network_http_request_duration_seconds_sum{{{labels}}} {item.duration}"
+            )
+            lines.append(
+                f"network_http_request_duration_seconds_count{{{labels}}} {item.requests}"
+            )
+
+        counters = [
+            ("network_db_queries_total", "Количество SQL-запросов.", "queries"),
+            ("network_db_duration_seconds_total", "Время выполнения SQL.", "db_time"),
+            (
+                "network_serializer_duration_seconds_total",
+                "Время сериализации ответа.",
+                "serializer_time",
+            ),
+            (
+                "network_http_response_size_bytes_total",
+                "Суммарный размер ответов.",
+                "response_size",
+            ),
+        ]
+        for name, help_text, attribute in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (view, action), item in series:
+                labels = _labels(view=view, action=action)
+                lines.append(f"{name}{{{labels}}} {getattr(item, attribute)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,218 @@
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.middleware import MessageMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+
+from network.metrics import collect_request_metrics, registry
+from network.querywatch import watch_queries
+from network.routers import read_from_replica
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+API_PATH_PREFIX = "/api/"
+
+
+@contextmanager
+def _wrap_connections(wrapper):
+    """Устанавливает execute_wrapper на все соединения с БД текущего потока."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+@asynccontextmanager
+async def _in_sync_thread(manager):
+    """
+    Входит в синхронный контекстный менеджер в потоке синхронного кода запроса.
+
+    Соединения с БД локальны для потока, а ORM асинхронного представления
+    выполняет запросы через sync_to_async, поэтому execute_wrapper нужно
+    устанавливать в том же потоке.
+    """
+    value = await sync_to_async(manager.__enter__)()
+    try:
+        yield value
+    except BaseException as exc:
+        if not await sync_to_async(manager.__exit__)(type(exc), exc, exc.__traceback__):
+            raise
+    else:
+        await sync_to_async(manager.__exit__)(None, None, None)
+
+
+class SyncAndAsyncMiddleware:
+    """
+    Основа middleware, работающих без адаптера в синхронной (WSGI) и асинхронной
+    (ASGI) цепочке. В асинхронной цепочке __call__ подкласса должен передавать
+    запрос в __acall__.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class RequestMetricsMiddleware(SyncAndAsyncMiddleware):
+    """
+    Собирает показатели каждого запроса: количество SQL-запросов, время БД,
+    время сериализации, общее время и размер ответа.
+
+    Показатели добавляются в ответ заголовком Server-Timing и накапливаются
+    для /metrics в разрезе представления и действия ViewSet. Включается
+    настройкой NETWORK_METRICS_ENABLED; при выключенной настройке middleware
+    исключается из цепочки при запуске и не добавляет накладных расходов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NETWORK_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        with collect_request_metrics() as metrics, _wrap_connections(metrics):
+            response = self.get_response(request)
+        return self._record(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect_request_metrics() as metrics:
+            async with _in_sync_thread(_wrap_connections(metrics)):
+                response = await self.get_response(request)
+        return self._record(request, response, metrics, started)
+
+    def _record(self, request, response, metrics, started):
+        """Учитывает показатели запроса и добавляет заголовок Server-Timing."""
+        duration = time.perf_counter() - started
+        response_size = 0 if response.streaming else len(response.content)
+        view, action = self._get_labels(request, response)
+        registry.observe(
+            view, action, response.status_code, duration, metrics, response_size
+        )
+
+        response["Server-Timing"] = (
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries", '
+            f"serializer;dur={metrics.serializer_time * 1000:.2f}, "
+            f"total;dur={duration * 1000:.2f}"
+        )
+        return response
+
+    def _get_labels(self, request, response):
+        """Возвращает имя представления и действие для группировки показателей."""
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+
+        renderer_context = getattr(response, "renderer_context", None) or {}
+        action = getattr(renderer_context.get("view"), "action", None)
+        return view, action or request.method.lower()
+
+
+class QueryWatchMiddleware(SyncAndAsyncMiddleware):
+    """
+    Сообщает о повторяющихся (N+1) и медленных SQL-запросах в пределах запроса.
+
+    Включается настройкой NETWORK_QUERY_WATCH ("log" или "warn"), например на
+    staging; при пустой настройке исключается из цепочки при запуске.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NETWORK_QUERY_WATCH:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with watch_queries(f"{request.method} {request.path}"):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with _in_sync_thread(watch_queries(f"{request.method} {request.path}")):
+            return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(SyncAndAsyncMiddleware):
+    """
+    Направляет чтение в безопасных запросах API и админ-панели в реплику.
+
+    После успешного изменяющего запроса пользователь получает cookie, и в течение
+    NETWORK_REPLICA_STICKY_SECONDS его запросы читают из основной БД, чтобы он
+    видел собственные изменения, еще не дошедшие до реплики. Включается, когда
+    задана реплика NETWORK_DB_REPLICA.
+    """
+
+    cookie_name = "network_read_primary"
+    path_prefixes = (API_PATH_PREFIX, "/admin/")
+
+    def __init__(self, get_response):
+        if not settings.NETWORK_DB_REPLICA:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if not request.path.startswith(self.path_prefixes):
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            return self._stick_to_primary(self.get_response(request))
+        if self.cookie_name in request.COOKIES:
+            return self.get_response(request)
+
+        with read_from_replica():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not request.path.startswith(self.path_prefixes):
+            return await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            return self._stick_to_primary(await self.get_response(request))
+        if self.cookie_name in request.COOKIES:
+            return await self.get_response(request)
+
+        # Флаг реплики - переменная контекста, она переносится в потоки sync_to_async
+        with read_from_replica():
+            return await self.get_response(request)
+
+    def _stick_to_primary(self, response):
+        """После успешного изменения пользователь читает из основной БД."""
+        if response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.NETWORK_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class SkipForApiMixin:
+    """Пропускает обработку middleware для запросов к API (/api/)."""
+
+    def __call__(self, request):
+        if request.path.startswith(API_PATH_PREFIX):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class NonApiMessageMiddleware(SkipForApiMixin, MessageMiddleware):
+    """Сообщения django.contrib.messages только для админ-панели и страниц, не для API."""
+
+
+class NonApiXFrameOptionsMiddleware(SkipForApiMixin, XFrameOptionsMiddleware):
+    """Заголовок X-Frame-Options только для HTML-страниц, не для JSON-ответов API."""
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0003_remove_networknode_contact_contact_network_node"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="contact",
+            name="city",
+            field=models.CharField(db_index=True, max_length=255, verbose_name="Город"),
+        ),
+        migrations.AlterField(
+            model_name="contact",
+            name="country",
+            field=models.CharField(
+                db_index=True, max_length=200, verbose_name="Страна"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="networknode",
+            name="node_type",
+            field=models.CharField(
+                choices=[
+                    ("factory", "Завод"),
+                    ("retail", "Розничная сеть"),
+                    ("entrepreneur", "Индивидуальный предприниматель"),
+                ],
+                db_index=True,
+                max_length=12,
+                verbose_name="Тип звена",
+            ),
+        ),
+    ]
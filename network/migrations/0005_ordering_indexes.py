@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0004_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["supplier_debt", "id"], name="networknode_debt_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["created_at", "id"], name="networknode_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(fields=["name", "id"], name="networknode_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(fields=["level", "id"], name="networknode_level_id_idx"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0005_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="networknode",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="Версия записи"
+            ),
+        ),
+    ]
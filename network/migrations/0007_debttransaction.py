@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0006_networknode_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DebtTransaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        verbose_name="Изменение задолженности",
+                    ),
+                ),
+                (
+                    "comment",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Комментарий"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время операции"
+                    ),
+                ),
+                (
+                    "node",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debt_transactions",
+                        to="network.networknode",
+                        verbose_name="Звено сети",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Операция по задолженности",
+                "verbose_name_plural": "Операции по задолженности",
+            },
+        ),
+    ]
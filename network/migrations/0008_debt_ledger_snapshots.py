@@ -0,0 +1,104 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:26
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def create_opening_balances(apps, schema_editor):
+    """
+    Записывает в журнал начальный остаток, чтобы сумма операций звена
+    совпадала с его текущей задолженностью.
+    """
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    DebtTransaction = apps.get_model("network", "DebtTransaction")
+
+    nodes = NetworkNode.objects.annotate(
+        logged=Sum("debt_transactions__amount")
+    ).values_list("pk", "supplier_debt", "logged")
+    DebtTransaction.objects.bulk_create(
+        (
+            DebtTransaction(
+                node_id=pk,
+                amount=debt - (logged or Decimal("0")),
+                comment="Начальный остаток",
+            )
+            for pk, debt, logged in nodes.iterator()
+            if debt != (logged or Decimal("0"))
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0007_debttransaction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DebtSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period_end", models.DateTimeField(verbose_name="Конец периода")),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        verbose_name="Задолженность на конец периода",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Снимок задолженности",
+                "verbose_name_plural": "Снимки задолженности",
+            },
+        ),
+        migrations.AlterField(
+            model_name="debttransaction",
+            name="node",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="debt_transactions",
+                to="network.networknode",
+                verbose_name="Звено сети",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="debttransaction",
+            index=models.Index(
+                fields=["node", "created_at"], name="debt_tx_node_created_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="debtsnapshot",
+            name="node",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="debt_snapshots",
+                to="network.networknode",
+                verbose_name="Звено сети",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="debtsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("node", "period_end"), name="debt_snapshot_node_period_uniq"
+            ),
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
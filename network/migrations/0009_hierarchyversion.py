@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:05
+
+from django.db import migrations, models
+
+
+def create_stamp(apps, schema_editor):
+    """Создает единственную строку с отметкой версии иерархии."""
+    HierarchyVersion = apps.get_model("network", "HierarchyVersion")
+    HierarchyVersion.objects.using(schema_editor.connection.alias).get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0008_debt_ledger_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HierarchyVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stamp",
+                    models.BigIntegerField(default=0, verbose_name="Отметка версии"),
+                ),
+            ],
+            options={
+                "verbose_name": "Версия иерархии",
+                "verbose_name_plural": "Версии иерархии",
+            },
+        ),
+        migrations.RunPython(create_stamp, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:39
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_products(apps, schema_editor):
+    """
+    Объединяет продукты с одинаковыми (name, model, release_date).
+
+    Связи со звеньями переносятся на продукт с наименьшим id, остальные
+    продукты группы удаляются.
+    """
+    Product = apps.get_model("network", "Product")
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    links = NetworkNode.products.through.objects
+
+    groups = (
+        Product.objects.values("name", "model", "release_date")
+        .annotate(keep=Min("pk"), count=Count("pk"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in groups.iterator():
+        duplicates = list(
+            Product.objects.filter(
+                name=group["name"],
+                model=group["model"],
+                release_date=group["release_date"],
+            )
+            .exclude(pk=group["keep"])
+            .values_list("pk", flat=True)
+        )
+        linked = set(
+            links.filter(product_id=group["keep"]).values_list(
+                "networknode_id", flat=True
+            )
+        )
+        node_ids = set(
+            links.filter(product_id__in=duplicates).values_list(
+                "networknode_id", flat=True
+            )
+        )
+        links.bulk_create(
+            links.model(networknode_id=node_id, product_id=group["keep"])
+            for node_id in sorted(node_ids - linked)
+        )
+        links.filter(product_id__in=duplicates).delete()
+        Product.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0009_hierarchyversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_products, migrations.RunPython.noop),
+    ]
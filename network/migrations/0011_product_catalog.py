@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0010_merge_duplicate_products"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Время изменения"),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="model",
+            field=models.CharField(
+                db_index=True, max_length=100, verbose_name="Модель"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="name",
+            field=models.CharField(
+                db_index=True, max_length=200, verbose_name="Название"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="product",
+            constraint=models.UniqueConstraint(
+                fields=("name", "model", "release_date"),
+                name="product_name_model_release_date_uniq",
+            ),
+        ),
+    ]
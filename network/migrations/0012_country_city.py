@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0011_product_catalog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="City",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, verbose_name="Название")),
+            ],
+            options={
+                "verbose_name": "Город",
+                "verbose_name_plural": "Города",
+                "ordering": ["name", "id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="Country",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=200, unique=True, verbose_name="Название"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Страна",
+                "verbose_name_plural": "Страны",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="city_ref",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="contacts",
+                to="network.city",
+                verbose_name="Город (справочник)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="city",
+            name="country",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="cities",
+                to="network.country",
+                verbose_name="Страна",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="country_ref",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="contacts",
+                to="network.country",
+                verbose_name="Страна (справочник)",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="city",
+            constraint=models.UniqueConstraint(
+                fields=("country", "name"), name="city_country_name_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:46
+
+from django.db import migrations
+
+
+def backfill_locations(apps, schema_editor):
+    """Создает страны и города по строкам контактов и связывает с ними контакты."""
+    Contact = apps.get_model("network", "Contact")
+    Country = apps.get_model("network", "Country")
+    City = apps.get_model("network", "City")
+
+    pairs = Contact.objects.values_list("country", "city").distinct().order_by()
+    for country, city in list(pairs):
+        country_ref, _ = Country.objects.get_or_create(name=country.strip())
+        city_ref, _ = City.objects.get_or_create(country=country_ref, name=city.strip())
+        Contact.objects.filter(country=country, city=city).update(
+            country_ref=country_ref, city_ref=city_ref
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0012_country_city"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0013_backfill_contact_locations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NetworkNodeListing",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="Звено сети"
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, verbose_name="Название")),
+                (
+                    "node_type",
+                    models.CharField(
+                        choices=[
+                            ("factory", "Завод"),
+                            ("retail", "Розничная сеть"),
+                            ("entrepreneur", "Индивидуальный предприниматель"),
+                        ],
+                        db_index=True,
+                        max_length=12,
+                        verbose_name="Тип звена",
+                    ),
+                ),
+                ("level", models.PositiveIntegerField(verbose_name="Уровень иерархии")),
+                ("version", models.PositiveIntegerField(verbose_name="Версия записи")),
+                (
+                    "supplier_id",
+                    models.BigIntegerField(
+                        db_index=True, null=True, verbose_name="Id поставщика"
+                    ),
+                ),
+                (
+                    "supplier",
+                    models.CharField(
+                        max_length=250, null=True, verbose_name="Поставщик"
+                    ),
+                ),
+                (
+                    "supplier_debt",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        verbose_name="Задолженность перед поставщиком",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="Время создания")),
+                (
+                    "country",
+                    models.CharField(
+                        db_index=True, max_length=200, null=True, verbose_name="Страна"
+                    ),
+                ),
+                (
+                    "city",
+                    models.CharField(
+                        db_index=True, max_length=255, null=True, verbose_name="Город"
+                    ),
+                ),
+                (
+                    "country_ref_id",
+                    models.BigIntegerField(
+                        db_index=True, null=True, verbose_name="Id страны"
+                    ),
+                ),
+                (
+                    "city_ref_id",
+                    models.BigIntegerField(
+                        db_index=True, null=True, verbose_name="Id города"
+                    ),
+                ),
+                ("contact", models.JSONField(null=True, verbose_name="Контакты")),
+                ("products", models.JSONField(default=list, verbose_name="Продукты")),
+            ],
+            options={
+                "verbose_name": "Строка списка звеньев",
+                "verbose_name_plural": "Строки списка звеньев",
+                "indexes": [
+                    models.Index(
+                        fields=["supplier_debt", "id"], name="listing_debt_id_idx"
+                    ),
+                    models.Index(
+                        fields=["created_at", "id"], name="listing_created_id_idx"
+                    ),
+                    models.Index(fields=["name", "id"], name="listing_name_id_idx"),
+                    models.Index(fields=["level", "id"], name="listing_level_id_idx"),
+                    models.Index(
+                        fields=["country_ref_id", "supplier_debt", "id"],
+                        name="listing_country_debt_id_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("network", "0014_network_node_listing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HierarchyChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "node_ids",
+                    models.JSONField(null=True, verbose_name="Измененные звенья"),
+                ),
+                (
+                    "product_ids",
+                    models.JSONField(default=list, verbose_name="Удаленные продукты"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время записи"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение иерархии",
+                "verbose_name_plural": "Журнал изменений иерархии",
+            },
+        ),
+        migrations.DeleteModel(
+            name="HierarchyVersion",
+        ),
+    ]
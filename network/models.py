@@ -1,16 +1,29 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 
+from network.querywatch import watch_queries_if_enabled
+
 
 class Product(models.Model):
-    name = models.CharField(max_length=200, verbose_name="Название")
-    model = models.CharField(max_length=100, verbose_name="Модель")
+    name = models.CharField(max_length=200, db_index=True, verbose_name="Название")
+    model = models.CharField(max_length=100, db_index=True, verbose_name="Модель")
     release_date = models.DateField(verbose_name="Дата выхода продукта на рынок")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
 
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "model", "release_date"],
+                name="product_name_model_release_date_uniq",
+            )
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.model} ({self.release_date})"
@@ -20,9 +33,42 @@ class Product(models.Model):
         if self.release_date > timezone.now().date():
             raise ValidationError("Продаваемая продукция уже должна быть выпущена.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные поля, чтобы не сохранять продукт без изменений."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """Перечитывает продукт и запоминает перечитанные поля."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._loaded_values = self._values()
+
+    def _values(self):
+        return tuple(
+            self.__dict__.get(field) for field in ["name", "model", "release_date"]
+        )
+
     def save(self, *args, **kwargs):
+        """
+        Сохраняет продукт после валидации.
+
+        Продукт без изменений не записывается: время изменения остается прежним,
+        а строки звеньев с продуктом в таблице чтения не пересчитываются.
+        """
         self.full_clean()
-        return super().save(*args, **kwargs)
+        if (
+            not self._state.adding
+            and not args
+            and not kwargs.get("force_insert")
+            and "update_fields" not in kwargs
+            and self._values() == getattr(self, "_loaded_values", None)
+        ):
+            kwargs["update_fields"] = []
+        result = super().save(*args, **kwargs)
+        self._loaded_values = self._values()
+        return result
 
 
 class NetworkNode(models.Model):
@@ -31,6 +77,7 @@ class NetworkNode(models.Model):
         ("retail", "Розничная сеть"),
         ("entrepreneur", "Индивидуальный предприниматель"),
     ]
+    MAX_LEVEL = 2
 
     name = models.CharField(max_length=200, verbose_name="Название")
     products = models.ManyToManyField(
@@ -51,15 +98,28 @@ class NetworkNode(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
     node_type = models.CharField(
-        max_length=12, choices=NODE_TYPES, verbose_name="Тип звена"
+        max_length=12, choices=NODE_TYPES, db_index=True, verbose_name="Тип звена"
     )
     level = models.PositiveIntegerField(
         default=0, editable=False, verbose_name="Уровень иерархии"
     )
+    version = models.PositiveIntegerField(
+        default=1, editable=False, verbose_name="Версия записи"
+    )
 
     class Meta:
         verbose_name = "Звено сети"
         verbose_name_plural = "Звенья сети"
+        indexes = [
+            models.Index(
+                fields=["supplier_debt", "id"], name="networknode_debt_id_idx"
+            ),
+            models.Index(
+                fields=["created_at", "id"], name="networknode_created_id_idx"
+            ),
+            models.Index(fields=["name", "id"], name="networknode_name_id_idx"),
+            models.Index(fields=["level", "id"], name="networknode_level_id_idx"),
+        ]
 
     def clean(self):
         """Проверка уровней иерархии и изменения поставщика."""
@@ -75,7 +135,7 @@ class NetworkNode(models.Model):
         if self.node_type != "factory" and not self.supplier:
             raise ValidationError("Укажите поставщика.")
 
-        if self.level > 2:
+        if self.level > self.MAX_LEVEL:
             raise ValidationError(
                 f"Торговая сеть с поставщиком {self.supplier} уже имеет 3 уровня. Выберите другого поставщика."
             )
@@ -83,13 +143,17 @@ class NetworkNode(models.Model):
         if self.pk and self.supplier and self.supplier.id == self.id:
             raise ValidationError("Нельзя указывать себя в качестве поставщика")
 
-        if self.pk and self.supplier_id:
-            old = NetworkNode.objects.get(pk=self.pk)
-            if old.supplier_id != self.supplier_id:
-                self._validate_supplier_change(old)
-
         if self.pk:
             old = NetworkNode.objects.get(pk=self.pk)
+
+            if self.supplier_id and old.supplier_id != self.supplier_id:
+                # Граф иерархии импортируется при вызове: модуль графа импортирует модели.
+                from network.graph import hierarchy_graph
+
+                graph = hierarchy_graph()
+                self._validate_supplier_change(old, graph)
+                self.clean_products(graph)
+
             if (
                 old.node_type in ["retail", "entrepreneur"]
                 and self.node_type == "factory"
@@ -99,38 +163,42 @@ class NetworkNode(models.Model):
                     "Нельзя изменить тип звена на 'завод' при наличии задолженности перед поставщиком."
                 )
 
-        if self.pk:
-            self._validate_product_removal_for_clients()
-            self.clean_products()
+    def _validate_supplier_change(self, old_instance, graph=None):
+        """
+        Валидация изменения поставщика.
 
-    def _validate_supplier_change(self, old_instance):
-        """Валидация изменения поставщика."""
+        При переданном снимке иерархии (network.graph) глубина и продукты клиентов
+        проверяются по нему без запросов к БД.
+        """
 
         if old_instance.supplier_debt > 0:
             raise ValidationError(
                 "Нельзя изменить поставщика при наличии задолженности."
             )
 
-        if self._would_exceed_max_depth():
+        if self._would_exceed_max_depth(graph):
             raise ValidationError(
                 "Выбрать указанного поставщика невозможно - это приводит к превышению глубины 3-х уровневой иерархии."
             )
 
-        if not self._new_supplier_has_all_products():
+        if not self._new_supplier_has_all_products(graph):
             raise ValidationError("У нового поставщика нет необходимых продуктов.")
 
-    def _would_exceed_max_depth(self):
+    def _would_exceed_max_depth(self, graph=None):
         """Проверяет непревышение максимальной глубины иерархии."""
         new_self_level = self.supplier.level + 1
-        max_descendant_depth = self._get_max_descendant_depth()
+        if graph is not None:
+            max_descendant_depth = graph.subtree_depth(self.pk, limit=self.MAX_LEVEL)
+        else:
+            max_descendant_depth = self._get_max_descendant_depth()
         total_depth = new_self_level + max_descendant_depth
-        return total_depth > 2
+        return total_depth > self.MAX_LEVEL
 
     def _get_max_descendant_depth(self):
         """Ищет максимальный уровень иерархии покупателей-перепродавцов."""
         max_depth = 0
         for reseller in self.networknode_set.all():
-            if max_depth >= 2:
+            if max_depth >= self.MAX_LEVEL:
                 break
 
             reseller_depth = reseller._get_max_descendant_depth()
@@ -138,45 +206,52 @@ class NetworkNode(models.Model):
 
         return max_depth
 
-    def _new_supplier_has_all_products(self):
+    def _new_supplier_has_all_products(self, graph=None):
         """Проверяет наличие всех продуктов покупателей-перепродавцов у нового поставщика."""
-
-        required_products = set()
-        for reseller in self.networknode_set.all():
-            required_products.update(reseller.products.all())
-
-        supplier_products = set(self.supplier.products.all())
-
-        return required_products.issubset(supplier_products)
-
-    def _validate_product_removal_for_clients(self):
-        """Проверяет, что удаление продуктов не нарушает цепочку поставок."""
-        old = NetworkNode.objects.get(pk=self.pk)
-        old_products = set(old.products.all())
-        new_products = set(self.products.all())
-        removed_products = old_products - new_products
-
-        if not removed_products:
-            return
-
-        for client in self.networknode_set.all():
-            client_products = set(client.products.all())
-            problematic = client_products & removed_products
-            if problematic:
-                product_names = ", ".join(str(p) for p in problematic)
-                raise ValidationError(
-                    f"Нельзя удалить {product_names} - они должны поставляться клиенту '{client.name}'."
-                )
-
-    def clean_products(self):
-        """Проверяет наличие продуктов у поставщика."""
+        if graph is not None:
+            return not graph.clients_missing_products(self.pk, self.supplier_id)
+
+        missing_links = NetworkNode.products.through.objects.filter(
+            networknode__supplier_id=self.pk
+        ).exclude(product_id__in=self.supplier.products.values("pk"))
+        return not missing_links.exists()
+
+    def clients_with_products(self, product_ids):
+        """
+        Возвращает клиентов звена, у которых есть любой из продуктов, со списками этих продуктов.
+
+        Проверка выполняется одним запросом к связям звеньев с продуктами по id
+        продуктов, без загрузки всех продуктов каждого клиента.
+        """
+        links = (
+            NetworkNode.products.through.objects.filter(
+                networknode__supplier_id=self.pk, product_id__in=product_ids
+            )
+            .select_related("networknode", "product")
+            .order_by("networknode_id", "product_id")
+        )
+        clients = defaultdict(list)
+        for link in links:
+            clients[link.networknode].append(link.product)
+        return clients
+
+    def clean_products(self, graph=None):
+        """
+        Проверяет наличие продуктов звена у поставщика.
+
+        Вызывается при смене поставщика; добавление продуктов звену проверяется
+        по id добавляемых продуктов (NetworkNodeWriteSerializer).
+        """
         if not self.supplier:
             return
 
-        current_products = set(self.products.all())
-        supplier_products = set(self.supplier.products.all())
-
-        invalid_products = current_products - supplier_products
+        if graph is not None:
+            missing = graph.missing_products(self.pk, self.supplier_id)
+            invalid_products = set(Product.objects.filter(pk__in=missing))
+        else:
+            invalid_products = set(
+                self.products.exclude(pk__in=self.supplier.products.values("pk"))
+            )
 
         if invalid_products:
             product_names = ", ".join(str(p) for p in invalid_products)
@@ -186,21 +261,191 @@ class NetworkNode(models.Model):
                 f"Следующие продукты отсутствуют у поставщика '{supplier_name}': {product_names}."
             )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные название, задолженность и поставщика, чтобы замечать их изменение при сохранении."""
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """Перечитывает звено и запоминает перечитанные название, задолженность и поставщика."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_loaded(fields)
+
+    def _remember_loaded(self, fields=None):
+        if fields is None or "name" in fields:
+            self._loaded_name = self.__dict__.get("name")
+        if fields is None or "supplier_debt" in fields:
+            self._loaded_supplier_debt = self.__dict__.get("supplier_debt")
+        if fields is None or {"supplier", "supplier_id"} & set(fields):
+            self._loaded_supplier_id = self.__dict__.get("supplier_id")
+
     def save(self, *args, **kwargs):
-        """Сохраняет после валидации."""
-        self.full_clean()
-        super().save(*args, **kwargs)
+        """
+        Сохраняет после валидации, увеличивая версию существующей записи.
+
+        Изменение задолженности записывается в журнал операций. Разница считается
+        относительно значения в базе данных под блокировкой строки, а не относительно
+        загруженного значения, поэтому параллельные операции не теряются в журнале.
+
+        Версия увеличивается в базе данных (F("version") + 1), как и в массовых
+        операциях: устаревший экземпляр не запишет номер версии, который уже
+        выдан другому состоянию строки. Задолженность, не изменявшаяся в памяти,
+        не записывается: иначе устаревший экземпляр затер бы изменения,
+        внесенные F-выражениями (корректировки долга, clear_debt).
+        """
+        with watch_queries_if_enabled(f"{type(self).__name__}.save()"):
+            self.full_clean()
+            adding = self._state.adding
+            keep_debt = not adding and not args and not self._debt_changed()
+            if not adding:
+                self.version = F("version") + 1
+                update_fields = kwargs.get("update_fields")
+                if update_fields is None and keep_debt:
+                    update_fields = [
+                        field.name
+                        for field in self._meta.concrete_fields
+                        if not field.primary_key
+                    ]
+                if update_fields is not None:
+                    update_fields = {*update_fields, "version"}
+                    if keep_debt:
+                        update_fields.discard("supplier_debt")
+                    kwargs["update_fields"] = update_fields
+
+            with transaction.atomic():
+                debt_change = self._get_debt_change(adding)
+                super().save(*args, **kwargs)
+                if not adding:
+                    refreshed = (
+                        ["version", "supplier_debt"] if keep_debt else ["version"]
+                    )
+                    self.refresh_from_db(fields=refreshed)
+                if debt_change:
+                    DebtTransaction.objects.create(
+                        node=self, amount=debt_change, comment="Сохранение звена"
+                    )
+
+        self._loaded_name = self.name
+        self._loaded_supplier_debt = self.supplier_debt
+        self._loaded_supplier_id = self.supplier_id
+
+    def _debt_changed(self):
+        """Изменена ли задолженность в памяти относительно загруженного значения."""
+        loaded_debt = getattr(self, "_loaded_supplier_debt", None)
+        return loaded_debt is None or Decimal(str(loaded_debt)) != Decimal(
+            str(self.supplier_debt)
+        )
+
+    def _get_debt_change(self, adding):
+        """Возвращает изменение задолженности, которое внесет сохранение."""
+        new_debt = Decimal(str(self.supplier_debt))
+        if adding:
+            return new_debt
+
+        if not self._debt_changed():
+            return Decimal("0")
+
+        current_debt = (
+            NetworkNode.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("supplier_debt", flat=True)
+            .first()
+        )
+        return new_debt - (current_debt or Decimal("0"))
+
+    def debt_as_of(self, moment):
+        """
+        Возвращает задолженность на указанный момент времени.
+
+        Берется последний снимок, закрытый не позднее момента, и к нему прибавляются
+        операции журнала между концом периода снимка и моментом. Оба запроса
+        используют индексы по (звено, время), поэтому стоимость не зависит от
+        общего размера журнала. Внутри уже сжатого периода точность ограничена
+        границами периодов снимков.
+        """
+        snapshot = (
+            self.debt_snapshots.filter(period_end__lte=moment)
+            .order_by("-period_end")
+            .first()
+        )
+        transactions = self.debt_transactions.filter(created_at__lt=moment)
+        balance = Decimal("0")
+        if snapshot:
+            balance = snapshot.balance
+            transactions = transactions.filter(created_at__gte=snapshot.period_end)
+
+        total = transactions.aggregate(total=Sum("amount"))["total"]
+        return balance + (total or Decimal("0"))
 
     def __str__(self):
         return f"{self.get_node_type_display()}: {self.name}"
 
 
+class Country(models.Model):
+    """Справочник стран контактов."""
+
+    name = models.CharField(max_length=200, unique=True, verbose_name="Название")
+
+    class Meta:
+        verbose_name = "Страна"
+        verbose_name_plural = "Страны"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class City(models.Model):
+    """Справочник городов контактов."""
+
+    country = models.ForeignKey(
+        Country,
+        on_delete=models.PROTECT,
+        related_name="cities",
+        verbose_name="Страна",
+    )
+    name = models.CharField(max_length=255, verbose_name="Название")
+
+    class Meta:
+        verbose_name = "Город"
+        verbose_name_plural = "Города"
+        ordering = ["name", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["country", "name"], name="city_country_name_uniq"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.country.name})" if self.country_id else self.name
+
+
 class Contact(models.Model):
     email = models.EmailField(verbose_name="Адрес электронной почты")
-    country = models.CharField(max_length=200, verbose_name="Страна")
-    city = models.CharField(max_length=255, verbose_name="Город")
+    country = models.CharField(max_length=200, db_index=True, verbose_name="Страна")
+    city = models.CharField(max_length=255, db_index=True, verbose_name="Город")
     street = models.CharField(max_length=255, verbose_name="Улица")
     building_number = models.CharField(max_length=20, verbose_name="Номер дома")
+    country_ref = models.ForeignKey(
+        Country,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="contacts",
+        verbose_name="Страна (справочник)",
+    )
+    city_ref = models.ForeignKey(
+        City,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="contacts",
+        verbose_name="Город (справочник)",
+    )
 
     network_node = models.OneToOneField(
         NetworkNode,
@@ -218,3 +463,219 @@ class Contact(models.Model):
         return (
             f"{self.country}, {self.city}, ул. {self.street}, д. {self.building_number}"
         )
+
+    @classmethod
+    def set_locations(cls, contacts):
+        """
+        Заполняет country_ref и city_ref контактов по строкам country и city.
+
+        Недостающие страны и города создаются пакетно; для любого числа контактов
+        выполняется не больше четырех запросов.
+        """
+        countries = {contact.country.strip() for contact in contacts}
+        country_ids = _get_or_create_ids(
+            Country, ["name"], [(name,) for name in countries]
+        )
+        cities = {
+            (country_ids[(contact.country.strip(),)], contact.city.strip())
+            for contact in contacts
+        }
+        city_ids = _get_or_create_ids(City, ["country_id", "name"], cities)
+
+        for contact in contacts:
+            contact.country_ref_id = country_ids[(contact.country.strip(),)]
+            contact.city_ref_id = city_ids[contact.country_ref_id, contact.city.strip()]
+            contact._loaded_location = (contact.country, contact.city)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает загруженные страну и город, чтобы не искать их в справочнике
+        повторно, и звено, чтобы при переносе контакта обновить строки обоих звеньев.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = (
+            instance.__dict__.get("country"),
+            instance.__dict__.get("city"),
+        )
+        instance._loaded_network_node_id = instance.__dict__.get("network_node_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет контакт, связывая его со странами и городами справочника."""
+        location = (self.country, self.city)
+        if self.city_ref_id is None or location != getattr(
+            self, "_loaded_location", None
+        ):
+            Contact.set_locations([self])
+        super().save(*args, **kwargs)
+        self._loaded_network_node_id = self.network_node_id
+
+
+def _get_or_create_ids(model, fields, keys):
+    """Возвращает {ключ: id} для строк справочника, создавая отсутствующие."""
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    def load():
+        lookup = {
+            f"{field}__in": {key[i] for key in keys} for i, field in enumerate(fields)
+        }
+        rows = model.objects.filter(**lookup).values_list(*fields, "pk")
+        return {tuple(row[:-1]): row[-1] for row in rows if tuple(row[:-1]) in keys}
+
+    ids = load()
+    missing = keys - ids.keys()
+    if missing:
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, key))) for key in missing],
+            ignore_conflicts=True,
+        )
+        ids = load()
+    return ids
+
+
+class DebtTransaction(models.Model):
+    """Запись журнала изменений задолженности звена перед поставщиком."""
+
+    node = models.ForeignKey(
+        NetworkNode,
+        on_delete=models.CASCADE,
+        related_name="debt_transactions",
+        db_index=False,
+        verbose_name="Звено сети",
+    )
+    amount = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Изменение задолженности"
+    )
+    comment = models.CharField(max_length=255, blank=True, verbose_name="Комментарий")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время операции")
+
+    class Meta:
+        verbose_name = "Операция по задолженности"
+        verbose_name_plural = "Операции по задолженности"
+        indexes = [
+            models.Index(
+                fields=["node", "created_at"], name="debt_tx_node_created_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.node_id}: {self.amount:+} ({self.created_at})"
+
+    def save(self, *args, **kwargs):
+        """Запрещает изменение уже сохраненных записей журнала."""
+        if not self._state.adding:
+            raise ValidationError("Записи журнала задолженности нельзя изменять.")
+        super().save(*args, **kwargs)
+
+
+class HierarchyChange(models.Model):
+    """
+    Запись журнала изменений иерархии звеньев сети для кэша графа (network.graph).
+
+    Записи только добавляются: каждое изменение поставщиков или продуктов звеньев
+    вставляет новую строку, а процессы догоняют журнал по возрастанию id.
+    """
+
+    # None - изменена вся иерархия, снимки нужно построить заново
+    node_ids = models.JSONField(null=True, verbose_name="Измененные звенья")
+    product_ids = models.JSONField(default=list, verbose_name="Удаленные продукты")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время записи")
+
+    class Meta:
+        verbose_name = "Изменение иерархии"
+        verbose_name_plural = "Журнал изменений иерархии"
+
+    def __str__(self):
+        return str(self.pk)
+
+
+class DebtSnapshot(models.Model):
+    """Задолженность звена на конец периода, в который сжаты старые операции журнала."""
+
+    node = models.ForeignKey(
+        NetworkNode,
+        on_delete=models.CASCADE,
+        related_name="debt_snapshots",
+        db_index=False,
+        verbose_name="Звено сети",
+    )
+    period_end = models.DateTimeField(verbose_name="Конец периода")
+    balance = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Задолженность на конец периода"
+    )
+
+    class Meta:
+        verbose_name = "Снимок задолженности"
+        verbose_name_plural = "Снимки задолженности"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["node", "period_end"], name="debt_snapshot_node_period_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.node_id}: {self.balance} на {self.period_end}"
+
+
+class NetworkNodeListing(models.Model):
+    """
+    Строка таблицы чтения списка звеньев (network.listing).
+
+    Содержит данные звена в виде, готовом для ответа API: контакт и продукты
+    хранятся JSON-документами, поставщик - строкой, поля фильтров и сортировки -
+    индексированными колонками. id совпадает с id звена.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="Звено сети")
+    name = models.CharField(max_length=200, verbose_name="Название")
+    node_type = models.CharField(
+        max_length=12,
+        choices=NetworkNode.NODE_TYPES,
+        db_index=True,
+        verbose_name="Тип звена",
+    )
+    level = models.PositiveIntegerField(verbose_name="Уровень иерархии")
+    version = models.PositiveIntegerField(verbose_name="Версия записи")
+    supplier_id = models.BigIntegerField(
+        null=True, db_index=True, verbose_name="Id поставщика"
+    )
+    supplier = models.CharField(max_length=250, null=True, verbose_name="Поставщик")
+    supplier_debt = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name="Задолженность перед поставщиком"
+    )
+    created_at = models.DateTimeField(verbose_name="Время создания")
+    country = models.CharField(
+        max_length=200, null=True, db_index=True, verbose_name="Страна"
+    )
+    city = models.CharField(
+        max_length=255, null=True, db_index=True, verbose_name="Город"
+    )
+    country_ref_id = models.BigIntegerField(
+        null=True, db_index=True, verbose_name="Id страны"
+    )
+    city_ref_id = models.BigIntegerField(
+        null=True, db_index=True, verbose_name="Id города"
+    )
+    contact = models.JSONField(null=True, verbose_name="Контакты")
+    products = models.JSONField(default=list, verbose_name="Продукты")
+
+    class Meta:
+        verbose_name = "Строка списка звеньев"
+        verbose_name_plural = "Строки списка звеньев"
+        indexes = [
+            models.Index(fields=["supplier_debt", "id"], name="listing_debt_id_idx"),
+            models.Index(fields=["created_at", "id"], name="listing_created_id_idx"),
+            models.Index(fields=["name", "id"], name="listing_name_id_idx"),
+            models.Index(fields=["level", "id"], name="listing_level_id_idx"),
+            # Крупнейшие должники страны: фильтр по стране и сортировка по задолженности.
+            models.Index(
+                fields=["country_ref_id", "supplier_debt", "id"],
+                name="listing_country_debt_id_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.id}: {self.name}"
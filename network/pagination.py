@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация каталога продуктов по id.
+
+    Следующая страница выбирается условием id > последнего id по первичному
+    ключу, поэтому время запроса не растет с номером страницы, как у OFFSET.
+    """
+
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class NetworkNodePagination(LimitOffsetPagination):
+    """
+    Пагинация списка звеньев параметрами limit и offset.
+
+    Без limit список возвращается целиком, как и раньше; с limit ответ содержит
+    count, next, previous и results. Используется синхронным и асинхронным
+    списком звеньев.
+    """
+
+    max_limit = 1000
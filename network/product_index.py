@@ -0,0 +1,158 @@
+"""
+Индекс продуктов звеньев сети для массовых проверок цепочки поставок.
+
+Связи звеньев с продуктами хранятся отсортированным массивом NumPy ключей int64
+(номер звена * число продуктов + номер продукта), то есть 8 байт на связь
+независимо от размера каталога. Проверки "какие звенья держат любой из
+продуктов" и "входят ли продукты клиентов в продукты их поставщиков"
+выполняются операциями над массивом связей (np.isin) за время, пропорциональное
+числу связей.
+"""
+
+from itertools import chain
+
+from django.db import DEFAULT_DB_ALIAS
+
+from network.models import NetworkNode
+
+LOAD_BATCH_SIZE = 10_000
+
+
+def _numpy():
+    # NumPy импортируется при построении индекса: индекс нужен массовым
+    # операциям, а импорт заметно замедляет запуск каждого процесса.
+    import numpy
+
+    return numpy
+
+
+class ProductIndex:
+    """Разреженный индекс принадлежности продуктов звеньям."""
+
+    def __init__(self, node_ids, links):
+        """
+        node_ids - id звеньев индекса, links - пары (id звена, id продукта).
+
+        Связи звеньев, не входящих в node_ids, пропускаются.
+        """
+        np = self._np = _numpy()
+        self.node_ids = np.unique(np.fromiter(node_ids, dtype=np.int64))
+        pairs = np.fromiter(chain.from_iterable(links), dtype=np.int64).reshape(-1, 2)
+        pairs = pairs[np.isin(pairs[:, 0], self.node_ids)]
+
+        self.product_ids = np.unique(pairs[:, 1])
+        rows = np.searchsorted(self.node_ids, pairs[:, 0])
+        columns = np.searchsorted(self.product_ids, pairs[:, 1])
+        self.links = np.unique(self._keys(rows, columns))
+
+    @classmethod
+    def for_nodes(cls, node_ids=None, using=DEFAULT_DB_ALIAS):
+        """
+        Строит индекс по связям звеньев с продуктами; без node_ids - по всем звеньям.
+
+        Связи выбранных звеньев загружаются запросами по LOAD_BATCH_SIZE id.
+        """
+        links = NetworkNode.products.through.objects.using(using).values_list(
+            "networknode_id", "product_id"
+        )
+        if node_ids is None:
+            node_ids = NetworkNode.objects.using(using).values_list("pk", flat=True)
+            return cls(node_ids, links.iterator(chunk_size=LOAD_BATCH_SIZE))
+
+        node_ids = list(node_ids)
+        batches = (
+            links.filter(networknode_id__in=node_ids[start : start + LOAD_BATCH_SIZE])
+            for start in range(0, len(node_ids), LOAD_BATCH_SIZE)
+        )
+        return cls(node_ids, chain.from_iterable(batches))
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def rows(self, node_ids):
+        """Возвращает номера строк звеньев; для звеньев вне индекса - KeyError."""
+        np = self._np
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        rows = np.searchsorted(self.node_ids, node_ids)
+        found = rows < len(self.node_ids)
+        found[found] = self.node_ids[rows[found]] == node_ids[found]
+        if not found.all():
+            raise KeyError(node_ids[~found].tolist())
+        return rows
+
+    def products_of(self, node_id):
+        """Возвращает id продуктов звена."""
+        row = self.rows([node_id])[0]
+        start, end = self._np.searchsorted(
+            self.links, [self._keys(row, 0), self._keys(row + 1, 0)]
+        )
+        return self.product_ids[self.links[start:end] - self._keys(row, 0)].tolist()
+
+    def holders(self, product_ids, node_ids=None):
+        """Возвращает id звеньев, у которых есть хотя бы один из продуктов."""
+        np = self._np
+        link_rows, link_columns = self._split(self.links)
+        held_rows = np.unique(
+            link_rows[np.isin(link_columns, self._columns(product_ids))]
+        )
+        if node_ids is None:
+            return self.node_ids[held_rows].tolist()
+        candidates = np.asarray(node_ids, dtype=np.int64)
+        return candidates[np.isin(self.rows(candidates), held_rows)].tolist()
+
+    def missing(self, node_ids, supplier_ids):
+        """
+        Проверяет пары (звено, поставщик) из двух последовательностей одинаковой длины.
+
+        Возвращает словарь {id звена: id продуктов, которых нет у поставщика}
+        только для звеньев с недостающими продуктами. Каждая связь звена
+        переносится на его поставщика (поставщик, продукт), и ключи ищутся среди
+        связей индекса одним вызовом np.isin.
+        """
+        np = self._np
+        node_rows = self.rows(node_ids)
+        supplier_rows = self.rows(supplier_ids)
+
+        # Пары упорядочиваются по строке звена, чтобы найти пары каждой связи
+        # двумя бинарными поисками; звено может входить в несколько пар.
+        order = np.argsort(node_rows, kind="stable")
+        sorted_rows = node_rows[order]
+        link_rows, link_columns = self._split(self.links)
+        first = np.searchsorted(sorted_rows, link_rows, side="left")
+        counts = np.searchsorted(sorted_rows, link_rows, side="right") - first
+
+        link_positions = np.repeat(np.arange(len(self.links)), counts)
+        offsets = np.arange(len(link_positions)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        pair_positions = order[np.repeat(first, counts) + offsets]
+        columns = link_columns[link_positions]
+
+        absent = ~np.isin(
+            self._keys(supplier_rows[pair_positions], columns), self.links
+        )
+        result = {}
+        for position, column in sorted(
+            zip(pair_positions[absent].tolist(), columns[absent].tolist())
+        ):
+            result.setdefault(int(node_ids[position]), []).append(
+                int(self.product_ids[column])
+            )
+        return result
+
+    def _keys(self, rows, columns):
+        """Ключи связей (строка звена, номер продукта)."""
+        return rows * max(len(self.product_ids), 1) + columns
+
+    def _split(self, keys):
+        """Строки звеньев и номера продуктов ключей связей."""
+        return self._np.divmod(keys, max(len(self.product_ids), 1))
+
+    def _columns(self, product_ids):
+        """Номера известных индексу продуктов; продукты вне индекса пропускаются."""
+        np = self._np
+        product_ids = np.asarray(list(product_ids), dtype=np.int64)
+        columns = np.searchsorted(self.product_ids, product_ids)
+        known = columns < len(self.product_ids)
+        known[known] = self.product_ids[columns[known]] == product_ids[known]
+        return columns[known]
@@ -0,0 +1,137 @@
+import logging
+import re
+import time
+import traceback
+import warnings
+from contextlib import ExitStack, contextmanager, nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("network.querywatch")
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+_PARAMS_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+class QueryWatchWarning(RuntimeWarning):
+    """Предупреждение о повторяющихся или медленных SQL-запросах."""
+
+
+class QueryIssue:
+    """Найденная проблема: повторяющийся (N+1) или медленный запрос."""
+
+    __slots__ = ("kind", "sql", "count", "duration", "origin")
+
+    def __init__(self, kind, sql, count, duration, origin):
+        self.kind = kind
+        self.sql = sql
+        self.count = count
+        self.duration = duration
+        self.origin = origin
+
+    def __str__(self):
+        if self.kind == "repeated":
+            summary = f"Запрос одной формы выполнен {self.count} раз"
+        else:
+            summary = f"Медленный запрос ({self.duration * 1000:.1f} мс)"
+        return f"{summary}: {self.sql}\n  Источник:\n{self.origin}"
+
+
+class QueryWatcher:
+    """
+    Обертка выполнения SQL, отслеживающая запросы одинаковой формы и медленные запросы.
+
+    Формой запроса считается его SQL-шаблон без параметров, в котором списки
+    параметров IN (%s, %s, ...) сведены к одному %s. Повторяющийся запрос
+    отмечается один раз, когда количество его выполнений достигает порога.
+    """
+
+    def __init__(self, scope, repeat_threshold, slow_query_ms=None):
+        self.scope = scope
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_ms = slow_query_ms
+        self.counts = {}
+        self.issues = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self._check(sql, duration)
+
+    def _check(self, sql, duration):
+        shape = _PARAMS_LIST.sub("%s", sql)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+
+        if count == self.repeat_threshold:
+            self.issues.append(
+                QueryIssue("repeated", shape, count, duration, _get_origin())
+            )
+
+        if self.slow_query_ms is not None and duration * 1000 > self.slow_query_ms:
+            self.issues.append(QueryIssue("slow", sql, 1, duration, _get_origin()))
+
+    def report(self):
+        """Возвращает текстовый отчет по найденным проблемам."""
+        for issue in self.issues:
+            if issue.kind == "repeated":
+                issue.count = self.counts[issue.sql]
+        issues = "\n".join(str(issue) for issue in self.issues)
+        return f"Проблемы SQL-запросов в {self.scope}:\n{issues}"
+
+
+def _get_origin(limit=5):
+    """Возвращает последние кадры стека, относящиеся к коду проекта."""
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(str(PROJECT_DIR))
+        and "site-packages" not in frame.filename
+        and frame.filename != __file__
+    ]
+    return "".join(traceback.format_list(frames[-limit:]))
+
+
+@contextmanager
+def watch_queries(scope, repeat_threshold=None, slow_query_ms=None, mode=None):
+    """
+    Отслеживает SQL-запросы внутри блока.
+
+    mode: "log" - запись в лог network.querywatch, "warn" - QueryWatchWarning,
+    "collect" - только накопление в QueryWatcher.issues. По умолчанию значения
+    берутся из настроек NETWORK_QUERY_WATCH*.
+    """
+    watcher = QueryWatcher(
+        scope,
+        repeat_threshold or settings.NETWORK_QUERY_WATCH_REPEAT_THRESHOLD,
+        (
+            slow_query_ms
+            if slow_query_ms is not None
+            else settings.NETWORK_QUERY_WATCH_SLOW_MS
+        ),
+    )
+    mode = mode or settings.NETWORK_QUERY_WATCH
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(watcher))
+        yield watcher
+
+    if not watcher.issues:
+        return
+    if mode == "log":
+        logger.warning(watcher.report())
+    elif mode == "warn":
+        warnings.warn(watcher.report(), QueryWatchWarning, stacklevel=3)
+
+
+def watch_queries_if_enabled(scope):
+    """Включает отслеживание, только если оно задано настройкой NETWORK_QUERY_WATCH."""
+    if not settings.NETWORK_QUERY_WATCH:
+        return nullcontext()
+    return watch_queries(scope)
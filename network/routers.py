@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_read_from_replica = ContextVar("network_read_from_replica", default=False)
+
+REPLICA_APP_LABELS = {"network"}
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Направляет чтение моделей сети внутри блока в реплику NETWORK_DB_REPLICA.
+
+    Контекст переносится в потоки sync_to_async, поэтому действует и для
+    асинхронных представлений.
+    """
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Маршрутизатор основной БД и реплики для чтения.
+
+    Запись всегда выполняется в default. Чтение моделей приложения network идет
+    в реплику только внутри read_from_replica(), то есть в безопасных запросах,
+    размеченных ReplicaRoutingMiddleware. Пользователи и сессии всегда читаются
+    из основной БД, чтобы вход и проверка прав не зависели от задержки репликации.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        if (
+            settings.NETWORK_DB_REPLICA
+            and _read_from_replica.get()
+            and model._meta.app_label in REPLICA_APP_LABELS
+        ):
+            return settings.NETWORK_DB_REPLICA
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", settings.NETWORK_DB_REPLICA}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
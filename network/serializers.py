@@ -1,10 +1,33 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db import transaction
+from django.db import DataError, models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
-from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from network.metrics import TimedSerializerMixin
+from network.models import (
+    Contact,
+    DebtTransaction,
+    NetworkNode,
+    NetworkNodeListing,
+    Product,
+)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = (
+        "Звено было изменено другим запросом. Получите актуальную версию и повторите."
+    )
+    default_code = "precondition_failed"
+
 
-from network.models import Contact, NetworkNode, Product
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
 
 
 class ContactSerializer(serializers.ModelSerializer):
@@ -27,11 +50,29 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class NetworkNodeWriteSerializer(serializers.ModelSerializer):
+class NestedProductSerializer(ProductSerializer):
+    """
+    Продукт во вложенных данных звена.
+
+    Продукты звена находятся по (name, model, release_date) и создаются при
+    отсутствии, поэтому проверка уникальности ключа не выполняется.
+    """
+
+    class Meta(ProductSerializer.Meta):
+        validators = []
+
+
+class NetworkNodeWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для создания и обновления звена сети."""
 
     contact = ContactSerializer()
-    products = ProductSerializer(many=True, required=False)
+    products = NestedProductSerializer(many=True, required=False)
+    products_add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, write_only=True
+    )
+    products_remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, write_only=True
+    )
 
     class Meta:
         model = NetworkNode
@@ -39,47 +80,201 @@ class NetworkNodeWriteSerializer(serializers.ModelSerializer):
 
         read_only_fields = ["created_at", "level"]
 
-    def _handle_products(self, node, products_data):
-        """Обрабатывает продукты для узла сети."""
-        if products_data is None:
+    def _resolve_products(self, products_data):
+        """
+        Возвращает id продуктов по (name, model, release_date), создавая недостающие.
+
+        Существующие продукты находятся одним запросом; при дублях берется продукт
+        с наименьшим id.
+        """
+        keys = [
+            (item["name"], item["model"], item["release_date"])
+            for item in products_data
+        ]
+        existing = {}
+        candidates = (
+            Product.objects.filter(
+                name__in={name for name, _, _ in keys},
+                model__in={model for _, model, _ in keys},
+                release_date__in={release_date for _, _, release_date in keys},
+            )
+            .order_by("-pk")
+            .values_list("pk", "name", "model", "release_date")
+        )
+        for pk, *key in candidates:
+            existing[tuple(key)] = pk
+
+        product_ids = set()
+        for name, model, release_date in keys:
+            if (name, model, release_date) not in existing:
+                product = Product.objects.create(
+                    name=name, model=model, release_date=release_date
+                )
+                existing[name, model, release_date] = product.pk
+            product_ids.add(existing[name, model, release_date])
+        return product_ids
+
+    def _handle_products(self, node, products_data=None, add_ids=(), remove_ids=()):
+        """
+        Изменяет продукты звена, затрагивая только различие.
+
+        products_data - полный список продуктов звена; add_ids и remove_ids -
+        id добавляемых и удаляемых продуктов (PATCH без полного списка), тогда
+        читаются только связи с этими продуктами. Связи меняются через add/remove,
+        которые отправляют m2m_changed, поэтому снимок иерархии обновляется.
+        Возвращает id удаленных продуктов.
+        """
+        links = NetworkNode.products.through.objects.filter(networknode_id=node.pk)
+        if products_data is not None:
+            product_ids = self._resolve_products(products_data)
+            current_ids = set(links.values_list("product_id", flat=True))
+            added_ids = product_ids - current_ids
+            removed_ids = current_ids - product_ids
+        elif add_ids or remove_ids:
+            current_ids = set(
+                links.filter(product_id__in={*add_ids, *remove_ids}).values_list(
+                    "product_id", flat=True
+                )
+            )
+            added_ids = set(add_ids) - current_ids
+            removed_ids = set(remove_ids) & current_ids
+        else:
+            return set()
+
+        if removed_ids:
+            node.products.remove(*removed_ids)
+        if added_ids:
+            self._check_supplier_products(node, added_ids)
+            node.products.add(*added_ids)
+        return removed_ids
+
+    def _check_supplier_products(self, node, product_ids):
+        """Проверяет наличие добавляемых продуктов у поставщика одним запросом по id."""
+        if node.supplier_id is None:
             return
 
-        product_objects = []
-        for product_data in products_data:
-            product, created = Product.objects.get_or_create(
-                name=product_data["name"],
-                model=product_data["model"],
-                release_date=product_data["release_date"],
+        supplied = set(
+            NetworkNode.products.through.objects.filter(
+                networknode_id=node.supplier_id, product_id__in=product_ids
+            ).values_list("product_id", flat=True)
+        )
+        if supplied != set(product_ids):
+            missing = Product.objects.filter(pk__in=set(product_ids) - supplied)
+            product_names = ", ".join(str(p) for p in missing.order_by("pk"))
+            raise serializers.ValidationError(
+                {
+                    "products": f"Следующие продукты отсутствуют у поставщика "
+                    f"'{node.supplier.name}': {product_names}."
+                }
             )
-            product_objects.append(product)
 
-        node.products.set(product_objects)
+    def validate(self, attrs):
+        """Проверяет products_add и products_remove одним запросом существования продуктов."""
+        add_ids = set(attrs.get("products_add", ()))
+        remove_ids = set(attrs.get("products_remove", ()))
+        if not add_ids and not remove_ids:
+            return attrs
 
-        try:
-            node.clean_products()
-        except DjangoValidationError as e:
-            raise serializers.ValidationError({"products": str(e)})
+        if "products" in attrs:
+            raise serializers.ValidationError(
+                {
+                    "products": "Передайте либо полный список products, "
+                    "либо products_add и products_remove."
+                }
+            )
+        if add_ids & remove_ids:
+            product_ids = ", ".join(map(str, sorted(add_ids & remove_ids)))
+            raise serializers.ValidationError(
+                {
+                    "products_remove": "Продукты не могут одновременно добавляться "
+                    f"и удаляться: {product_ids}."
+                }
+            )
+
+        found = set(
+            Product.objects.filter(pk__in=add_ids | remove_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        for field, product_ids in [
+            ("products_add", add_ids),
+            ("products_remove", remove_ids),
+        ]:
+            if product_ids - found:
+                missing = ", ".join(map(str, sorted(product_ids - found)))
+                raise serializers.ValidationError(
+                    {field: f"Продукты не найдены: {missing}."}
+                )
+        return attrs
 
     def create(self, validated_data):
         """Создание звена с вложенными контактами и продуктами."""
         contact_data = validated_data.pop("contact")
-        products_data = validated_data.pop("products", [])
+        products_data = validated_data.pop("products", None)
+        add_ids = validated_data.pop("products_add", ())
+        validated_data.pop("products_remove", None)
 
         with transaction.atomic():
             node = NetworkNode(**validated_data)
 
+            # save() проверяет звено через full_clean()
             try:
-                node.full_clean()
+                node.save()
             except DjangoValidationError as e:
                 raise serializers.ValidationError(e.message_dict)
 
-            node.save()
-
             Contact.objects.create(network_node=node, **contact_data)
-            self._handle_products(node, products_data)
+            self._handle_products(node, products_data, add_ids)
 
         return node
 
+    def _lock_nodes(self, instance, new_supplier):
+        """
+        Блокирует звено, его текущего и нового поставщика и прямых клиентов.
+
+        Строки блокируются в порядке id, чтобы параллельные обновления не
+        взаимоблокировались. Ожидаемая версия (If-Match) сначала сравнивается
+        обычным чтением: устаревший запрос завершается до ожидания блокировок.
+        После блокировки версия проверяется повторно, так как звено могли
+        изменить между чтением и блокировкой. Удаленное звено - ответ 404.
+        """
+        expected_version = self.context.get("expected_version")
+        if expected_version is not None:
+            current_version = (
+                NetworkNode.objects.filter(pk=instance.pk)
+                .values_list("version", flat=True)
+                .first()
+            )
+            if current_version is None:
+                raise NotFound()
+            if expected_version != current_version:
+                raise PreconditionFailed()
+
+        current_supplier = NetworkNode.objects.filter(pk=instance.pk).values(
+            "supplier_id"
+        )
+        nodes_filter = (
+            Q(pk=instance.pk) | Q(supplier_id=instance.pk) | Q(pk__in=current_supplier)
+        )
+        if new_supplier is not None:
+            nodes_filter |= Q(pk=new_supplier.pk)
+
+        locked_versions = dict(
+            NetworkNode.objects.select_for_update()
+            .filter(nodes_filter)
+            .order_by("pk")
+            .values_list("pk", "version")
+        )
+        current_version = locked_versions.get(instance.pk)
+        if current_version is None:
+            raise NotFound()
+
+        if expected_version is not None and expected_version != current_version:
+            raise PreconditionFailed()
+
+        if current_version != instance.version:
+            instance.refresh_from_db()
+
     def update(self, instance, validated_data):
         """Обновление данных звена с запретом изменения долга перед поставщиком."""
         if "supplier_debt" in validated_data:
@@ -91,12 +286,14 @@ class NetworkNodeWriteSerializer(serializers.ModelSerializer):
 
         contact_data = validated_data.pop("contact", None)
         products_data = validated_data.pop("products", None)
+        add_ids = validated_data.pop("products_add", ())
+        remove_ids = validated_data.pop("products_remove", ())
 
         with transaction.atomic():
-            old_products = set(instance.products.all())
+            self._lock_nodes(instance, validated_data.get("supplier"))
 
-            if products_data is not None:
-                self._handle_products(instance, products_data)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
             if contact_data:
                 serializer = ContactSerializer(
@@ -105,41 +302,29 @@ class NetworkNodeWriteSerializer(serializers.ModelSerializer):
                 serializer.is_valid(raise_exception=True)
                 serializer.save()
 
-            for attr, value in validated_data.items():
-                setattr(instance, attr, value)
-
+            # Откат связей при ошибке выполняет транзакция.
+            removed_products = self._handle_products(
+                instance, products_data, add_ids, remove_ids
+            )
+            if removed_products:
+                clients = instance.clients_with_products(removed_products)
+                for client, problematic in clients.items():
+                    product_names = ", ".join(str(p) for p in problematic)
+                    raise ValidationError(
+                        f"Нельзя удалить продукты: {product_names}."
+                        f"Они должны поставляться клиенту '{client.name}'."
+                    )
+
+            # save() проверяет звено через full_clean()
             try:
-                if products_data is not None:
-                    new_products = set(instance.products.all())
-                    removed_products = old_products - new_products
-
-                    if removed_products:
-                        clients = instance.networknode_set.all()
-                        for client in clients:
-                            client_products = set(client.products.all())
-                            problematic = client_products & removed_products
-                            if problematic:
-                                product_names = ", ".join(str(p) for p in problematic)
-                                raise ValidationError(
-                                    f"Нельзя удалить продукты: {product_names}."
-                                    f"Они должны поставляться клиенту '{client.name}'."
-                                )
-
-                instance.full_clean()
                 instance.save()
             except DjangoValidationError as e:
-                if products_data is not None:
-                    instance.products.set(old_products)
                 raise serializers.ValidationError(e.message_dict)
-            except ValidationError as e:
-                if products_data is not None:
-                    instance.products.set(old_products)
-                raise e
 
             return instance
 
 
-class NetworkNodeReadSerializer(serializers.ModelSerializer):
+class NetworkNodeReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для чтения звеньев сети с вложенными данными."""
 
     contact = ContactSerializer(read_only=True)
@@ -150,3 +335,164 @@ class NetworkNodeReadSerializer(serializers.ModelSerializer):
         model = NetworkNode
         fields = "__all__"
         read_only_fields = ["created_at", "level", "supplier_debt"]
+        list_serializer_class = TimedListSerializer
+
+
+class NetworkNodeListingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Строка таблицы чтения списка звеньев в формате NetworkNodeReadSerializer."""
+
+    contact = serializers.JSONField(read_only=True)
+    products = serializers.JSONField(read_only=True)
+
+    class Meta:
+        model = NetworkNodeListing
+        fields = [
+            "id",
+            "contact",
+            "products",
+            "supplier",
+            "name",
+            "supplier_debt",
+            "created_at",
+            "node_type",
+            "level",
+            "version",
+        ]
+        read_only_fields = fields
+        list_serializer_class = TimedListSerializer
+
+
+class DebtTransactionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DebtTransaction
+        fields = "__all__"
+        list_serializer_class = TimedListSerializer
+
+
+class DebtAdjustmentListSerializer(serializers.ListSerializer):
+    """Применяет пакет изменений задолженности одним UPDATE."""
+
+    def create(self, validated_data):
+        return self.apply_adjustments(validated_data)
+
+    @classmethod
+    def apply_adjustments(cls, adjustments):
+        """Изменяет задолженность звеньев и записывает операции в журнал."""
+        deltas = defaultdict(Decimal)
+        for item in adjustments:
+            deltas[item["node"]] += item["amount"]
+
+        try:
+            with transaction.atomic():
+                cls._apply_deltas(deltas)
+                return DebtTransaction.objects.bulk_create(
+                    [
+                        DebtTransaction(
+                            node_id=item["node"],
+                            amount=item["amount"],
+                            comment=item.get("comment", ""),
+                        )
+                        for item in adjustments
+                    ]
+                )
+        except DataError:
+            raise ValidationError(
+                {"amount": "Задолженность превышает допустимое значение."}
+            )
+
+    @staticmethod
+    def _apply_deltas(deltas):
+        """
+        Изменяет задолженность атомарно на стороне базы данных: F("supplier_debt") + delta.
+
+        Версия звеньев увеличивается, чтобы ETag и If-Match учитывали новую задолженность.
+
+        Заводы (звенья без поставщика) не изменяются. Если после изменения
+        задолженность какого-либо звена стала отрицательной, транзакция откатывается.
+        """
+        debt_field = models.DecimalField(max_digits=12, decimal_places=2)
+        delta_expression = Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            output_field=debt_field,
+        )
+        updated = NetworkNode.objects.filter(
+            pk__in=deltas, supplier__isnull=False
+        ).update(
+            supplier_debt=F("supplier_debt") + delta_expression,
+            version=F("version") + 1,
+        )
+        # Модуль таблицы чтения импортируется при вызове: он импортирует сериализаторы.
+        from network.listing import schedule_listing_refresh
+
+        schedule_listing_refresh(deltas)
+
+        if updated != len(deltas):
+            found = set(
+                NetworkNode.objects.filter(
+                    pk__in=deltas, supplier__isnull=False
+                ).values_list("pk", flat=True)
+            )
+            missing = ", ".join(str(pk) for pk in sorted(set(deltas) - found))
+            raise ValidationError(
+                {"node": f"Звенья с поставщиком не найдены: {missing}."}
+            )
+
+        decreased = [pk for pk, delta in deltas.items() if delta < 0]
+        if not decreased:
+            return
+
+        negative = NetworkNode.objects.filter(
+            pk__in=decreased, supplier_debt__lt=0
+        ).values_list("pk", flat=True)
+        if negative:
+            nodes = ", ".join(str(pk) for pk in sorted(negative))
+            raise ValidationError(
+                {"amount": f"Задолженность не может стать отрицательной: {nodes}."}
+            )
+
+
+class DebtAdjustmentSerializer(serializers.Serializer):
+    """Изменение задолженности звена перед поставщиком на указанную сумму."""
+
+    node = serializers.IntegerField(min_value=1)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    comment = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    class Meta:
+        list_serializer_class = DebtAdjustmentListSerializer
+
+    def validate_amount(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Сумма изменения не может быть нулевой.")
+        return value
+
+    def create(self, validated_data):
+        return DebtAdjustmentListSerializer.apply_adjustments([validated_data])[0]
+
+
+class SupplierReassignmentSerializer(serializers.Serializer):
+    """Перенос звена к новому поставщику в пакетной смене поставщиков."""
+
+    node = serializers.IntegerField(min_value=1)
+    supplier = serializers.IntegerField(min_value=1)
+
+
+class SubtreeProductsSerializer(serializers.Serializer):
+    """Добавление и удаление продуктов у звена и его клиентов."""
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    depth = serializers.IntegerField(
+        min_value=0, max_value=NetworkNode.MAX_LEVEL, required=False, default=None
+    )
+
+    def validate(self, attrs):
+        if not attrs["add"] and not attrs["remove"]:
+            raise serializers.ValidationError(
+                "Укажите добавляемые или удаляемые продукты."
+            )
+        return attrs
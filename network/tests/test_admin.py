@@ -1,5 +1,7 @@
 import pytest
 
+from network.models import DebtTransaction
+
 
 @pytest.mark.django_db
 class TestAdminPanel:
@@ -36,6 +38,7 @@ class TestAdminPanel:
 def test_clear_debt_action(admin_client, network_nodes):
     """Проверяет очистку задолженности перед поставщиком."""
     retail = network_nodes[1]
+    version = retail.version
 
     assert retail.supplier_debt > 0
 
@@ -48,3 +51,5 @@ def test_clear_debt_action(admin_client, network_nodes):
 
     retail.refresh_from_db()
     assert retail.supplier_debt == 0
+    assert retail.version == version + 1
+    assert DebtTransaction.objects.filter(node=retail, amount=-100_000).exists()
@@ -0,0 +1,181 @@
+import base64
+
+import pytest
+from django.test import Client
+from rest_framework.test import APIClient
+
+from network.graph import hierarchy_graph
+from network.listing import refresh_listing
+
+
+@pytest.fixture
+def employee_client(active_user):
+    client = Client()
+    client.force_login(active_user)
+    return client
+
+
+@pytest.mark.django_db
+def test_async_api_requires_auth(active_user, inactive_user):
+    """Проверяет, что асинхронные представления требуют активного сотрудника."""
+    response = Client().get("/api/async/network-nodes/")
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"] == 'Basic realm="api"'
+
+    client = Client()
+    client.force_login(inactive_user)
+    assert client.get("/api/async/network-nodes/").status_code == 401
+
+    wrong = base64.b64encode(b"active_user:wrong").decode()
+    response = Client().get(
+        "/api/async/network-nodes/", HTTP_AUTHORIZATION=f"Basic {wrong}"
+    )
+    assert response.status_code == 401
+
+    valid = base64.b64encode(b"active_user:123qwerty").decode()
+    response = Client().get(
+        "/api/async/network-nodes/", HTTP_AUTHORIZATION=f"Basic {valid}"
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_list_matches_sync_list(active_user, employee_client, network_nodes):
+    """Проверяет, что асинхронный список совпадает с синхронным при тех же фильтрах."""
+    api_client = APIClient()
+    api_client.force_authenticate(user=active_user)
+    params = {"node_type": "retail", "ordering": "-supplier_debt"}
+
+    sync_response = api_client.get("/api/network-nodes/", params)
+    async_response = employee_client.get("/api/async/network-nodes/", params)
+
+    assert async_response.status_code == 200
+    assert async_response.json() == sync_response.json()
+    assert [node["id"] for node in async_response.json()] == [network_nodes[1].id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("listing", [False, True])
+def test_async_list_pagination_matches_sync_list(
+    active_user, employee_client, network_nodes, settings, listing
+):
+    """Проверяет, что limit и offset разбивают асинхронный список как синхронный."""
+    settings.NETWORK_LISTING_READ_MODEL = listing
+    if listing:
+        refresh_listing()
+    api_client = APIClient()
+    api_client.force_authenticate(user=active_user)
+    params = {"ordering": "name", "limit": 2, "offset": 1}
+
+    sync_response = api_client.get("/api/network-nodes/", params)
+    async_response = employee_client.get("/api/async/network-nodes/", params)
+
+    assert async_response.status_code == 200
+    data = async_response.json()
+    assert data["count"] == 3
+    assert len(data["results"]) == 2
+    assert data["results"] == sync_response.json()["results"]
+    assert data["previous"].replace("/async", "") == sync_response.json()["previous"]
+
+
+@pytest.mark.django_db
+def test_async_views_allow_only_safe_methods(employee_client, network_nodes):
+    """Проверяет, что асинхронные представления отвечают 405 на изменяющие методы."""
+    node_id = network_nodes[0].id
+
+    for path in [
+        "/api/async/network-nodes/",
+        f"/api/async/network-nodes/{node_id}/",
+        f"/api/async/network-nodes/{node_id}/subtree/",
+        "/api/async/network-nodes/stats/",
+    ]:
+        assert employee_client.post(path).status_code == 405
+        assert employee_client.head(path).status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_list_invalid_filter(employee_client, network_nodes):
+    """Проверяет ошибку валидации параметров фильтрации."""
+    response = employee_client.get(
+        "/api/async/network-nodes/", {"node_type": "unknown"}
+    )
+
+    assert response.status_code == 400
+    assert "node_type" in response.json()
+
+
+@pytest.mark.django_db
+def test_async_detail(active_user, employee_client, network_nodes):
+    """Проверяет детальную информацию и ETag асинхронного представления."""
+    node = network_nodes[1]
+    api_client = APIClient()
+    api_client.force_authenticate(user=active_user)
+
+    response = employee_client.get(f"/api/async/network-nodes/{node.id}/")
+
+    assert response.status_code == 200
+    assert response.json() == api_client.get(f"/api/network-nodes/{node.id}/").json()
+    assert response["ETag"] == f'"{node.version}"'
+    assert employee_client.get("/api/async/network-nodes/0/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_subtree(employee_client, network_nodes, django_assert_max_num_queries):
+    """Проверяет выдачу звена и всех его клиентов по уровням иерархии."""
+    factory, retail, entrepreneur = network_nodes
+
+    with django_assert_max_num_queries(9):
+        response = employee_client.get(
+            f"/api/async/network-nodes/{factory.id}/subtree/"
+        )
+
+    assert response.status_code == 200
+    assert [node["id"] for node in response.json()] == [
+        factory.id,
+        retail.id,
+        entrepreneur.id,
+    ]
+
+    response = employee_client.get(f"/api/async/network-nodes/{retail.id}/subtree/")
+    assert [node["id"] for node in response.json()] == [retail.id, entrepreneur.id]
+
+
+@pytest.mark.django_db
+def test_async_stats(employee_client, network_nodes):
+    """Проверяет сводку по звеньям с учетом фильтров."""
+    response = employee_client.get("/api/async/network-nodes/stats/")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert data["by_node_type"] == {"factory": 1, "retail": 1, "entrepreneur": 1}
+    country_id = str(network_nodes[0].contact.country_ref_id)
+    assert data["by_country"] == {country_id: 3}
+
+    response = employee_client.get(
+        "/api/async/network-nodes/stats/", {"node_type": "factory"}
+    )
+    assert response.json()["count"] == 1
+
+
+@pytest.mark.django_db
+def test_async_subtree_from_graph(
+    employee_client, network_nodes, graph_cache, django_assert_max_num_queries
+):
+    """Проверяет выдачу клиентов звена по снимку иерархии без обхода уровней."""
+    factory, retail, entrepreneur = network_nodes
+    hierarchy_graph()
+
+    with django_assert_max_num_queries(6):
+        response = employee_client.get(
+            f"/api/async/network-nodes/{factory.id}/subtree/"
+        )
+
+    assert [node["id"] for node in response.json()] == [
+        factory.id,
+        retail.id,
+        entrepreneur.id,
+    ]
+    assert (
+        employee_client.get("/api/async/network-nodes/999/subtree/").status_code == 404
+    )
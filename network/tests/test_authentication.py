@@ -0,0 +1,105 @@
+import base64
+from unittest import mock
+
+import pytest
+from django.contrib.auth import base_user
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from network.authentication import _get_cache_key
+
+
+def basic_client(username, password):
+    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_checks_password_once(active_user):
+    """Проверяет, что пароль хэшируется только при первом запросе."""
+    client = basic_client("active_user", "123qwerty")
+
+    with mock.patch.object(
+        base_user, "check_password", wraps=base_user.check_password
+    ) as check_password:
+        for _ in range(3):
+            response = client.get("/api/network-nodes/")
+            assert response.status_code == 200
+
+    assert check_password.call_count == 1
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_does_not_cache_password_hash(active_user):
+    """Проверяет, что в кэше нет хэша пароля пользователя."""
+    client = basic_client("active_user", "123qwerty")
+    assert client.get("/api/network-nodes/").status_code == 200
+
+    key = _get_cache_key("active_user", "123qwerty")
+    user_id, password_digest = cache.get(key)
+
+    assert user_id == active_user.pk
+    assert active_user.password not in password_digest
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_rejects_wrong_password(active_user):
+    """Проверяет, что кэш проверенного пароля не подходит для другого пароля."""
+    assert (
+        basic_client("active_user", "123qwerty").get("/api/network-nodes/").status_code
+        == 200
+    )
+
+    response = basic_client("active_user", "wrong").get("/api/network-nodes/")
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_invalidated_by_password_change(active_user):
+    """Проверяет, что после смены пароля старые учетные данные не принимаются."""
+    client = basic_client("active_user", "123qwerty")
+    assert client.get("/api/network-nodes/").status_code == 200
+
+    active_user.set_password("new-password")
+    active_user.save()
+
+    assert client.get("/api/network-nodes/").status_code == 401
+    response = basic_client("active_user", "new-password").get("/api/network-nodes/")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_invalidated_by_deactivation(active_user):
+    """Проверяет, что деактивированный пользователь теряет доступ сразу."""
+    client = basic_client("active_user", "123qwerty")
+    assert client.get("/api/network-nodes/").status_code == 200
+
+    active_user.is_active = False
+    active_user.save()
+
+    assert client.get("/api/network-nodes/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_cached_basic_auth_disabled(active_user, settings):
+    """Проверяет, что при NETWORK_AUTH_CACHE_TTL=0 пароль проверяется каждый раз."""
+    settings.NETWORK_AUTH_CACHE_TTL = 0
+    client = basic_client("active_user", "123qwerty")
+
+    with mock.patch.object(
+        base_user, "check_password", wraps=base_user.check_password
+    ) as check_password:
+        for _ in range(2):
+            assert client.get("/api/network-nodes/").status_code == 200
+
+    assert check_password.call_count == 2
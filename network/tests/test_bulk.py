@@ -0,0 +1,205 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from network.bulk import (
+    _lock_descendants,
+    _lock_nodes,
+    assign_products,
+    reassign_suppliers,
+)
+from network.graph import hierarchy_graph
+from network.models import NetworkNode, Product
+
+
+@pytest.fixture
+def second_chain(network_nodes, product_objects):
+    """Второй завод с продуктами 1 и 2 и его розничная сеть; задолженности обнулены."""
+    product_1, product_2, product_3 = product_objects
+    factory_2 = NetworkNode.objects.create(
+        node_type="factory", name="Завод 2", supplier=None, supplier_debt=0
+    )
+    factory_2.products.set([product_1, product_2])
+    retail_2 = NetworkNode.objects.create(
+        node_type="retail", name="Розничная сеть 2", supplier=factory_2
+    )
+    retail_2.products.set([product_1])
+    NetworkNode.objects.update(supplier_debt=0)
+    return factory_2, retail_2
+
+
+@pytest.mark.django_db
+def test_reassign_suppliers_moves_subtrees(network_nodes, second_chain):
+    """Проверяет перенос звеньев с пересчетом уровней и увеличением версий."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2, retail_2 = second_chain
+
+    report = reassign_suppliers(
+        [(retail.pk, factory_2.pk), (retail_2.pk, retail_2.supplier_id)]
+    )
+
+    assert report == {"moved": [retail.pk], "unchanged": [retail_2.pk], "failed": {}}
+    retail.refresh_from_db()
+    entrepreneur.refresh_from_db()
+    assert retail.supplier_id == factory_2.pk
+    assert retail.version == 2
+    assert (retail.level, entrepreneur.level) == (1, 2)
+
+    report = reassign_suppliers([(entrepreneur.pk, factory.pk)])
+
+    assert report["moved"] == [entrepreneur.pk]
+    entrepreneur.refresh_from_db()
+    assert (entrepreneur.supplier_id, entrepreneur.level) == (factory.pk, 1)
+
+
+@pytest.mark.django_db
+def test_lock_descendants_expands_already_locked_nodes(network_nodes):
+    """Проверяет блокировку клиентов звена, заблокированного до обхода иерархии."""
+    factory, retail, entrepreneur = network_nodes
+    nodes = _lock_nodes({factory.pk, retail.pk}, "default")
+
+    _lock_descendants(nodes, [factory.pk], "default")
+
+    assert set(nodes) == {factory.pk, retail.pk, entrepreneur.pk}
+
+
+@pytest.mark.django_db
+def test_reassign_suppliers_reports_failures(network_nodes, second_chain):
+    """Проверяет отказы по задолженности, типу, циклу, глубине и продуктам."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2, retail_2 = second_chain
+    factory_3 = NetworkNode.objects.create(
+        node_type="factory", name="Завод 3", supplier=None
+    )
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=10)
+
+    report = reassign_suppliers(
+        [
+            (factory.pk, factory_2.pk),
+            (entrepreneur.pk, factory.pk),
+            (retail.pk, retail_2.pk),
+            (retail_2.pk, factory_3.pk),
+            (999_999, factory.pk),
+        ]
+    )
+
+    assert report["moved"] == []
+    assert report["failed"] == {
+        factory.pk: "У завода не может быть поставщика.",
+        entrepreneur.pk: "Нельзя изменить поставщика при наличии задолженности.",
+        retail.pk: "Выбрать указанного поставщика невозможно - это приводит к превышению "
+        "глубины 3-х уровневой иерархии.",
+        retail_2.pk: "Следующие продукты (id) отсутствуют у поставщика 'Завод 3': "
+        f"{retail_2.products.get().pk}.",
+        999_999: "Звено не найдено.",
+    }
+
+    report = reassign_suppliers([(retail.pk, entrepreneur.pk)])
+    assert report["failed"] == {
+        retail.pk: "Новый поставщик является клиентом звена по иерархии."
+    }
+
+
+@pytest.mark.django_db
+def test_reassign_suppliers_validates_batch_together(network_nodes, second_chain):
+    """Проверяет, что глубина считается с учетом всех переносов пакета."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2, retail_2 = second_chain
+
+    # Каждый перенос допустим отдельно, но вместе ИП оказался бы на 4-м уровне:
+    # отклоняется только перенос ИП.
+    report = reassign_suppliers(
+        [(retail_2.pk, retail.pk), (entrepreneur.pk, retail_2.pk)]
+    )
+
+    assert report["moved"] == [retail_2.pk]
+    assert list(report["failed"]) == [entrepreneur.pk]
+    assert NetworkNode.objects.get(pk=retail_2.pk).level == 2
+
+    report = reassign_suppliers(
+        [(entrepreneur.pk, factory.pk), (retail.pk, entrepreneur.pk)],
+        all_or_nothing=True,
+    )
+    assert report["moved"] == []
+    assert list(report["failed"]) == [retail.pk]
+    assert NetworkNode.objects.get(pk=entrepreneur.pk).supplier_id == retail.pk
+
+
+@pytest.mark.django_db
+def test_reassign_suppliers_updates_graph(
+    network_nodes, second_chain, graph_cache, django_capture_on_commit_callbacks
+):
+    """Проверяет применение переносов к снимку иерархии после фиксации."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2, retail_2 = second_chain
+    graph = hierarchy_graph()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        reassign_suppliers([(retail.pk, factory_2.pk)])
+
+    assert hierarchy_graph() is graph
+    assert graph.descendants(factory_2.pk) == [
+        factory_2.pk,
+        retail_2.pk,
+        retail.pk,
+        entrepreneur.pk,
+    ]
+
+
+def _product_ids(node):
+    return set(node.products.values_list("pk", flat=True))
+
+
+@pytest.mark.django_db
+def test_assign_products_to_subtree(network_nodes, product_objects):
+    """Проверяет добавление и удаление продуктов у звена и его клиентов."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    report = assign_products(retail.pk, add=[product_3.pk], remove=[product_1.pk])
+
+    assert report == {"nodes": 2, "added": 2, "removed": 2}
+    assert _product_ids(retail) == {product_2.pk, product_3.pk}
+    assert _product_ids(entrepreneur) == {product_3.pk}
+    assert NetworkNode.objects.get(pk=entrepreneur.pk).version == 2
+
+    report = assign_products(factory.pk, add=[product_3.pk], depth=1)
+    assert report == {"nodes": 2, "added": 0, "removed": 0}
+
+
+@pytest.mark.django_db
+def test_assign_products_validation(network_nodes, product_objects):
+    """Проверяет отказ при отсутствии продукта у поставщика и у клиентов вне пакета."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    new_product = Product.objects.create(
+        name="Ноутбук", model="X1", release_date=product_1.release_date
+    )
+
+    with pytest.raises(ValidationError, match="отсутствуют у поставщика"):
+        assign_products(retail.pk, add=[new_product.pk])
+
+    with pytest.raises(ValidationError, match="клиенту 'ИП Иванов'"):
+        assign_products(factory.pk, remove=[product_1.pk], depth=1)
+
+    with pytest.raises(ValidationError, match="не найдены: 999999"):
+        assign_products(factory.pk, remove=[999_999])
+
+    assert _product_ids(retail) == {product_1.pk, product_2.pk}
+    assert _product_ids(factory) == {product_1.pk, product_2.pk, product_3.pk}
+
+
+@pytest.mark.django_db
+def test_assign_products_updates_graph(
+    network_nodes, product_objects, graph_cache, django_capture_on_commit_callbacks
+):
+    """Проверяет применение изменения продуктов к снимку иерархии."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    graph = hierarchy_graph()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assign_products(factory.pk, remove=[product_1.pk])
+
+    assert hierarchy_graph() is graph
+    assert graph.missing_products(entrepreneur.pk, retail.pk) == []
+    assert graph.clients_missing_products(factory.pk, retail.pk) == []
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from network.catalog import upsert_products, validate_products
+from network.models import Product
+
+
+def test_validate_products_reports_rows():
+    """Проверяет ошибки по номерам строк и объединение одинаковых продуктов."""
+    tomorrow = str(timezone.localdate() + timedelta(days=1))
+    rows = [
+        {"name": "Телефон", "model": "A1", "release_date": "2020-01-01"},
+        {"name": "", "model": "A1", "release_date": "2020-02-30"},
+        {"name": "Телефон", "model": "A" * 101, "release_date": tomorrow},
+        "Телефон",
+    ]
+
+    with pytest.raises(ValidationError) as error:
+        validate_products(rows)
+
+    errors = error.value.message_dict
+    assert sorted(errors) == [1, 2, 3]
+    assert errors[1] == [
+        "name: Обязательное поле.",
+        "release_date: Неверный формат даты, ожидается YYYY-MM-DD.",
+    ]
+    assert errors[2] == [
+        "model: Не более 100 символов.",
+        "release_date: Продаваемая продукция уже должна быть выпущена.",
+    ]
+
+    keys = validate_products([rows[0], dict(rows[0])])
+    assert keys == [("Телефон", "A1", date(2020, 1, 1))]
+
+
+@pytest.mark.django_db
+def test_upsert_products(product_objects):
+    """Проверяет добавление новых продуктов без изменения существующих."""
+    product_1 = product_objects[0]
+    updated_at = product_1.updated_at
+    rows = [
+        {
+            "name": product_1.name,
+            "model": product_1.model,
+            "release_date": str(product_1.release_date),
+        },
+        {"name": "Телефон", "model": "A1", "release_date": "2020-01-01"},
+        {"name": "Телефон", "model": "A1", "release_date": "2020-01-01"},
+    ]
+
+    report = upsert_products(rows)
+
+    assert report == {"inserted": 1, "unchanged": 1, "duplicates": 1}
+    assert Product.objects.count() == 4
+    product_1.refresh_from_db()
+    assert product_1.updated_at == updated_at
+
+    with pytest.raises(ValidationError):
+        upsert_products(rows + [{"name": "Планшет", "model": "B"}])
+    assert Product.objects.count() == 4
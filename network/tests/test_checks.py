@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings as django_settings
+from django.db import connections
+from django.test import Client
+
+from network.checks import check_performance_settings
+
+PRODUCTION_SETTINGS = {
+    "DEBUG": False,
+    "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+    "NETWORK_COMPRESSION": "gzip",
+    "NETWORK_TRIM_API_MIDDLEWARE": True,
+}
+
+
+SETTINGS_SCRIPT = """
+import json
+from electronics_network import settings
+print(json.dumps([settings.SESSION_ENGINE, settings.NETWORK_COMPRESSION]))
+"""
+
+
+def load_settings(**environ):
+    """Импортирует модуль настроек проекта в отдельном процессе с переменными environ."""
+    return subprocess.run(
+        [sys.executable, "-c", SETTINGS_SCRIPT],
+        cwd=django_settings.BASE_DIR,
+        env={**os.environ, "DEBUG": "false", "SECRET_KEY": "test", **environ},
+        capture_output=True,
+        text=True,
+    )
+
+
+def issue_ids():
+    return sorted(issue.id for issue in check_performance_settings(None))
+
+
+@pytest.fixture
+def production_settings(settings, monkeypatch):
+    for name, value in PRODUCTION_SETTINGS.items():
+        setattr(settings, name, value)
+    monkeypatch.setitem(connections.settings["default"], "CONN_MAX_AGE", 60)
+    return settings
+
+
+def test_performance_check_passes_for_production_settings(production_settings):
+    """Проверяет отсутствие замечаний при настройках профиля production."""
+    assert issue_ids() == []
+
+
+def test_performance_check_reports_development_settings(settings, monkeypatch):
+    """Проверяет предупреждения для настроек разработки."""
+    monkeypatch.setitem(connections.settings["default"], "CONN_MAX_AGE", 0)
+    monkeypatch.setitem(connections.settings["default"], "OPTIONS", {})
+    settings.DEBUG = True
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    settings.NETWORK_COMPRESSION = ""
+    settings.NETWORK_TRIM_API_MIDDLEWARE = False
+
+    assert issue_ids() == [
+        "network.W001",
+        "network.W003",
+        "network.W005",
+        "network.W006",
+        "network.W007",
+    ]
+
+
+def test_performance_check_errors_in_production_profile(production_settings):
+    """Проверяет, что в профиле production замечания становятся ошибками."""
+    settings = production_settings
+    settings.NETWORK_PROFILE = "production"
+    settings.DEBUG = True
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+    assert issue_ids() == ["network.E001", "network.E004"]
+
+
+def test_performance_check_brotli_package(production_settings, monkeypatch):
+    """Проверяет ошибку при сжатии brotli без пакета django-compression-middleware."""
+    production_settings.NETWORK_COMPRESSION = "brotli"
+    monkeypatch.setattr("network.checks.find_spec", lambda name: None)
+    assert issue_ids() == ["network.E102"]
+
+
+def test_empty_environment_values_use_profile_defaults():
+    """Проверяет, что пустые SESSION_BACKEND и NETWORK_COMPRESSION не выключают профиль."""
+    result = load_settings(
+        NETWORK_PROFILE="production", SESSION_BACKEND="", NETWORK_COMPRESSION=""
+    )
+
+    assert json.loads(result.stdout) == [
+        "django.contrib.sessions.backends.cached_db",
+        "gzip",
+    ]
+
+    result = load_settings(NETWORK_PROFILE="production", NETWORK_COMPRESSION="off")
+    assert json.loads(result.stdout)[1] == ""
+
+
+@pytest.mark.parametrize(
+    "name, value", [("SESSION_BACKEND", "redis"), ("NETWORK_COMPRESSION", "zstd")]
+)
+def test_unknown_environment_values_fail_on_startup(name, value):
+    """Проверяет ошибку запуска при неизвестном хранилище сессий или способе сжатия."""
+    result = load_settings(**{name: value})
+
+    assert result.returncode != 0
+    assert "ImproperlyConfigured" in result.stderr
+    assert f"{name}={value}" in result.stderr
+
+
+@pytest.mark.django_db
+def test_trimmed_middleware_skips_api(settings, admin_user):
+    """Проверяет, что для /api/ пропускаются middleware сообщений и X-Frame-Options."""
+    settings.MIDDLEWARE = [
+        "django.middleware.gzip.GZipMiddleware",
+        *(
+            name
+            for name in settings.MIDDLEWARE
+            if not name.endswith(("MessageMiddleware", "XFrameOptionsMiddleware"))
+        ),
+        "network.middleware.NonApiMessageMiddleware",
+        "network.middleware.NonApiXFrameOptionsMiddleware",
+    ]
+    client = Client()
+    client.force_login(admin_user)
+
+    response = client.get("/api/network-nodes/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 200
+    assert "X-Frame-Options" not in response
+    assert not hasattr(response.wsgi_request, "_messages")
+
+    response = client.get("/admin/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 200
+    assert response["X-Frame-Options"] == "DENY"
+    assert response["Content-Encoding"] == "gzip"
@@ -0,0 +1,196 @@
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from network.models import (
+    DebtSnapshot,
+    DebtTransaction,
+    NetworkNode,
+    NetworkNodeListing,
+)
+
+
+def _create_transaction(node, amount, created_at):
+    """Создает операцию журнала с заданным временем."""
+    debt_transaction = DebtTransaction.objects.create(node=node, amount=amount)
+    DebtTransaction.objects.filter(pk=debt_transaction.pk).update(created_at=created_at)
+
+
+@pytest.mark.django_db
+def test_compact_debt_ledger_creates_monthly_snapshots(network_nodes):
+    """Проверяет сжатие старых операций в снимки и сохранение баланса на даты."""
+    retail = network_nodes[1]
+    retail.debt_transactions.all().delete()
+
+    january = timezone.make_aware(datetime(2025, 1, 15))
+    february = timezone.make_aware(datetime(2025, 2, 10))
+    march = timezone.make_aware(datetime(2025, 3, 5))
+    _create_transaction(retail, 1_000, january)
+    _create_transaction(retail, 500, january + timedelta(days=3))
+    _create_transaction(retail, -300, february)
+    _create_transaction(retail, 700, march)
+
+    balance_before = retail.debt_as_of(timezone.now())
+
+    call_command("compact_debt_ledger", before="2025-03-20", period="month")
+
+    snapshots = list(
+        DebtSnapshot.objects.filter(node=retail)
+        .order_by("period_end")
+        .values_list("period_end", "balance")
+    )
+    assert snapshots == [
+        (timezone.make_aware(datetime(2025, 2, 1)), 1_500),
+        (timezone.make_aware(datetime(2025, 3, 1)), 1_200),
+    ]
+    assert list(retail.debt_transactions.values_list("amount", flat=True)) == [700]
+    assert retail.debt_as_of(timezone.now()) == balance_before
+    assert retail.debt_as_of(timezone.make_aware(datetime(2025, 2, 15))) == 1_500
+
+    _create_transaction(retail, 100, timezone.make_aware(datetime(2025, 4, 2)))
+    call_command("compact_debt_ledger", before="2025-05-01", period="month")
+
+    assert DebtSnapshot.objects.filter(node=retail).count() == 4
+    assert not retail.debt_transactions.exists()
+    assert retail.debt_as_of(timezone.now()) == balance_before + 100
+
+
+@pytest.mark.django_db
+def test_compact_debt_ledger_rejects_future_cutoff():
+    """Проверяет запрет сжатия текущего периода."""
+    tomorrow = timezone.localdate() + timedelta(days=1)
+
+    with pytest.raises(CommandError):
+        call_command("compact_debt_ledger", before=str(tomorrow), period="day")
+
+
+def _check_network(**options):
+    """Запускает check_network и возвращает нарушения как пары (id звена, проверка)."""
+    stdout = StringIO()
+    try:
+        call_command("check_network", stdout=stdout, stderr=StringIO(), **options)
+    except CommandError:
+        pass
+    output = stdout.getvalue()
+    if "output" in options:
+        output = Path(options["output"]).read_text()
+    return {
+        (violation["node"], violation["check"])
+        for violation in map(json.loads, output.splitlines())
+    }
+
+
+@pytest.mark.django_db
+def test_check_network_consistent(network_nodes):
+    """Проверяет отсутствие нарушений в согласованной сети."""
+    stderr = StringIO()
+    call_command("check_network", stdout=StringIO(), stderr=stderr)
+    assert "Нарушений не найдено" in stderr.getvalue()
+
+
+@pytest.mark.django_db
+def test_check_network_reports_violations(network_nodes, product_objects):
+    """Проверяет обнаружение нарушений, внесенных в обход валидации моделей."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    other_factory = NetworkNode.objects.create(name="Завод 2", node_type="factory")
+    other_retail = NetworkNode.objects.create(
+        name="Сеть 2", node_type="retail", supplier=other_factory, level=1
+    )
+    looped = NetworkNode.objects.create(
+        name="Сеть 3", node_type="retail", supplier=other_factory
+    )
+
+    entrepreneur.products.add(product_3)
+    NetworkNode.objects.filter(pk=other_factory.pk).update(supplier=entrepreneur)
+    NetworkNode.objects.filter(pk=other_retail.pk).update(level=0)
+    NetworkNode.objects.filter(pk=looped.pk).update(supplier=looped)
+
+    with pytest.raises(CommandError, match="Найдено нарушений"):
+        call_command("check_network", stdout=StringIO())
+
+    assert _check_network() == {
+        (entrepreneur.pk, "products_missing_at_supplier"),
+        (other_factory.pk, "factory_has_supplier"),
+        (other_factory.pk, "level_mismatch"),
+        (other_factory.pk, "depth_exceeded"),
+        (other_retail.pk, "level_mismatch"),
+        (other_retail.pk, "depth_exceeded"),
+        (looped.pk, "cycle"),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_check_network_in_processes(network_nodes, product_objects, tmp_path):
+    """Проверяет проверку продуктов в пуле процессов с выводом в файл."""
+    factory, retail, entrepreneur = network_nodes
+    other_factory = NetworkNode.objects.create(name="Завод 2", node_type="factory")
+    other_retail = NetworkNode.objects.create(
+        name="Сеть 2", node_type="retail", supplier=other_factory
+    )
+    other_retail.products.add(product_objects[0])
+
+    assert _check_network(jobs=2, output=tmp_path / "violations.jsonl") == {
+        (other_retail.pk, "products_missing_at_supplier"),
+    }
+
+
+@pytest.mark.django_db
+def test_reassign_suppliers_command(network_nodes):
+    """Проверяет перенос всех клиентов поставщика и отмену пакета при ошибке."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2 = NetworkNode.objects.create(
+        node_type="factory", name="Завод 2", supplier=None
+    )
+    factory_2.products.set(factory.products.all())
+    retail_2 = NetworkNode.objects.create(
+        node_type="retail", name="Розничная сеть 2", supplier=factory
+    )
+
+    with pytest.raises(CommandError, match="Перенос отменен"):
+        call_command(
+            "reassign_suppliers",
+            "--from",
+            str(factory.pk),
+            "--to",
+            str(factory_2.pk),
+            "--all-or-nothing",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+    assert NetworkNode.objects.filter(supplier=factory_2).count() == 0
+
+    stdout = StringIO()
+    call_command(
+        "reassign_suppliers",
+        "--from",
+        str(factory.pk),
+        "--to",
+        str(factory_2.pk),
+        stdout=stdout,
+        stderr=StringIO(),
+    )
+
+    assert json.loads(stdout.getvalue())["node"] == retail.pk
+    assert list(NetworkNode.objects.filter(supplier=factory_2)) == [retail_2]
+
+
+@pytest.mark.django_db
+def test_refresh_network_listing(network_nodes):
+    """Проверяет заполнение таблицы чтения списка звеньев командой."""
+    out = StringIO()
+
+    call_command("refresh_network_listing", stdout=out)
+
+    assert "Обновлено строк: 3." in out.getvalue()
+    assert NetworkNodeListing.objects.count() == 3
+
+    call_command("refresh_network_listing", nodes=[network_nodes[0].pk], stdout=out)
+
+    assert "Обновлено строк: 1." in out.getvalue()
@@ -1,7 +1,28 @@
+from datetime import timedelta
+
 import pytest
+from django.db import connection
+from django.utils import timezone
+
+from network.filters import NetworkNodeFilter, NetworkNodeListingFilter
+from network.listing import refresh_listing
+from network.models import NetworkNode, NetworkNodeListing, Product
 
-from network.filters import NetworkNodeFilter
-from network.models import NetworkNode
+INDEXED_FILTER_PARAMS = [
+    {"country_exact": "Россия"},
+    {"country_prefix": "Рос"},
+    {"city": "Москва"},
+    {"city_prefix": "Мос"},
+    {"country_id": 1},
+    {"city_id": 1},
+    {"node_type": "retail"},
+    {"level": 1},
+    {"supplier": 1},
+    {"debt_min": 1000},
+    {"created_after": "2026-01-01T00:00:00+03:00"},
+    {"products": "1,2"},
+    {"factory": 1},
+]
 
 
 @pytest.mark.django_db
@@ -41,3 +62,214 @@ def test_network_node_filter_insensitive(network_nodes):
     )
 
     assert factory in filterset.qs
+
+
+@pytest.mark.django_db
+def test_network_node_filter_by_country_and_city_exact_and_prefix(network_nodes):
+    """Проверяет точную и префиксную фильтрацию по стране и городу."""
+    factory, retail, entrepreneur = network_nodes
+
+    factory.contact.country = "Россия"
+    factory.contact.city = "Москва"
+    retail.contact.country = "Россияне"
+    retail.contact.city = "Московский"
+    entrepreneur.contact.country = "Беларусь"
+    entrepreneur.contact.city = "Минск"
+    for node in network_nodes:
+        node.contact.save()
+
+    queryset = NetworkNode.objects.all()
+
+    result = NetworkNodeFilter(data={"country_exact": "Россия"}, queryset=queryset).qs
+    assert list(result) == [factory]
+
+    result = NetworkNodeFilter(data={"country_prefix": "Росс"}, queryset=queryset).qs
+    assert set(result) == {factory, retail}
+
+    result = NetworkNodeFilter(data={"city": "Москва"}, queryset=queryset).qs
+    assert list(result) == [factory]
+
+    result = NetworkNodeFilter(data={"city_prefix": "Мос"}, queryset=queryset).qs
+    assert set(result) == {factory, retail}
+
+    factory.contact.refresh_from_db()
+    result = NetworkNodeFilter(
+        data={"country_id": factory.contact.country_ref_id}, queryset=queryset
+    ).qs
+    assert list(result) == [factory]
+
+    result = NetworkNodeFilter(
+        data={"city_id": entrepreneur.contact.city_ref_id}, queryset=queryset
+    ).qs
+    assert list(result) == [entrepreneur]
+
+
+@pytest.mark.django_db
+def test_network_node_filter_by_node_attributes(network_nodes):
+    """Проверяет фильтрацию по типу, уровню, поставщику и задолженности."""
+    factory, retail, entrepreneur = network_nodes
+    queryset = NetworkNode.objects.all()
+
+    result = NetworkNodeFilter(data={"node_type": "retail"}, queryset=queryset).qs
+    assert list(result) == [retail]
+
+    result = NetworkNodeFilter(data={"level": 2}, queryset=queryset).qs
+    assert list(result) == [entrepreneur]
+
+    result = NetworkNodeFilter(data={"supplier": factory.id}, queryset=queryset).qs
+    assert list(result) == [retail]
+
+    result = NetworkNodeFilter(
+        data={"debt_min": 5_000, "debt_max": 50_000}, queryset=queryset
+    ).qs
+    assert list(result) == [entrepreneur]
+
+
+@pytest.mark.django_db
+def test_network_node_filter_by_created_at_range(network_nodes):
+    """Проверяет фильтрацию по диапазону времени создания."""
+    factory, retail, entrepreneur = network_nodes
+    now = timezone.now()
+    NetworkNode.objects.filter(pk=factory.pk).update(
+        created_at=now - timedelta(days=10)
+    )
+
+    queryset = NetworkNode.objects.all()
+
+    result = NetworkNodeFilter(
+        data={"created_before": (now - timedelta(days=1)).isoformat()},
+        queryset=queryset,
+    ).qs
+    assert list(result) == [factory]
+
+    result = NetworkNodeFilter(
+        data={"created_after": (now - timedelta(days=1)).isoformat()},
+        queryset=queryset,
+    ).qs
+    assert set(result) == {retail, entrepreneur}
+
+
+@pytest.mark.django_db
+def test_network_node_filter_by_products(network_nodes, product_objects):
+    """Проверяет фильтрацию по списку id продуктов без дублирования звеньев."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    queryset = NetworkNode.objects.all()
+
+    result = NetworkNodeFilter(
+        data={"products": f"{product_2.id},{product_3.id}"}, queryset=queryset
+    ).qs
+    assert list(result.order_by("id")) == [factory, retail]
+
+    result = NetworkNodeFilter(
+        data={"products": f"{product_1.id},{product_2.id}"}, queryset=queryset
+    ).qs
+    assert result.count() == 3
+
+
+@pytest.mark.django_db
+def test_network_node_filter_by_factory_products(network_nodes, product_objects):
+    """Проверяет фильтрацию звеньев, продающих продукты указанного завода."""
+    factory, retail, entrepreneur = network_nodes
+
+    other_product = Product.objects.create(
+        name="Другой", model="Y", release_date="2020-01-01"
+    )
+    other_factory = NetworkNode.objects.create(
+        node_type="factory", name="Завод 2", supplier=None
+    )
+    other_factory.products.set([other_product])
+
+    queryset = NetworkNode.objects.all()
+
+    result = NetworkNodeFilter(data={"factory": factory.id}, queryset=queryset).qs
+    assert set(result) == {factory, retail, entrepreneur}
+
+    result = NetworkNodeFilter(data={"factory": other_factory.id}, queryset=queryset).qs
+    assert list(result) == [other_factory]
+
+    result = NetworkNodeFilter(data={"factory": retail.id}, queryset=queryset).qs
+    assert not result.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN-проверка только для PostgreSQL"
+)
+@pytest.mark.parametrize("params", INDEXED_FILTER_PARAMS)
+def test_network_node_filter_uses_indexes(network_nodes, params):
+    """Проверяет по плану запроса, что основные фильтры не приводят к Seq Scan."""
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    queryset = NetworkNodeFilter(data=params, queryset=NetworkNode.objects.all()).qs
+    plan = queryset.explain()
+
+    assert "Seq Scan" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN-проверка только для PostgreSQL"
+)
+@pytest.mark.parametrize("params", INDEXED_FILTER_PARAMS)
+def test_network_node_listing_filter_uses_indexes(network_nodes, params):
+    """Проверяет по плану запроса, что фильтры таблицы чтения не приводят к Seq Scan."""
+    refresh_listing()
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    queryset = NetworkNodeListingFilter(
+        data=params, queryset=NetworkNodeListing.objects.all()
+    ).qs
+    plan = queryset.explain()
+
+    assert "Seq Scan" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN-проверка только для PostgreSQL"
+)
+@pytest.mark.parametrize(
+    "ordering",
+    [
+        ["-supplier_debt", "-id"],
+        ["created_at", "id"],
+        ["name", "id"],
+        ["-level", "-id"],
+    ],
+)
+def test_network_node_ordering_uses_indexes(network_nodes, ordering):
+    """Проверяет, что сортировка с LIMIT читает составной индекс без шага Sort."""
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    plan = NetworkNode.objects.order_by(*ordering)[:10].explain()
+
+    assert "Index" in plan
+    assert "Sort" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN-проверка только для PostgreSQL"
+)
+def test_top_debtors_by_country_use_listing_index(network_nodes):
+    """
+    Проверяет, что крупнейшие должники страны читаются из таблицы чтения
+    составным индексом (страна, задолженность, id) без шага Sort.
+    """
+    refresh_listing()
+    country_id = network_nodes[0].contact.country_ref_id
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    plan = (
+        NetworkNodeListing.objects.filter(country_ref_id=country_id)
+        .order_by("-supplier_debt", "-id")[:10]
+        .explain()
+    )
+
+    assert "listing_country_debt_id_idx" in plan
+    assert "Sort" not in plan
@@ -0,0 +1,292 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from network.graph import HierarchyGraph, bump_hierarchy_version, hierarchy_graph
+from network.models import HierarchyChange, NetworkNode
+
+
+@pytest.mark.django_db
+def test_graph_disabled(network_nodes, settings):
+    """Проверяет, что без NETWORK_GRAPH_CACHE снимок не строится."""
+    settings.NETWORK_GRAPH_CACHE = False
+    assert hierarchy_graph() is None
+
+
+@pytest.mark.django_db
+def test_graph_build(network_nodes, product_objects):
+    """Проверяет глубину, клиентов и продукты в снимке иерархии."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    graph = HierarchyGraph.build()
+
+    assert len(graph) == 3
+    assert graph.subtree_depth(factory.pk) == 2
+    assert graph.subtree_depth(factory.pk, limit=1) == 1
+    assert graph.subtree_depth(entrepreneur.pk) == 0
+    assert graph.descendants(factory.pk) == [factory.pk, retail.pk, entrepreneur.pk]
+    assert graph.missing_products(retail.pk, factory.pk) == []
+    assert graph.missing_products(factory.pk, retail.pk) == [product_3.pk]
+    assert set(graph.clients_missing_products(factory.pk, entrepreneur.pk)) == {
+        product_2.pk
+    }
+
+
+@pytest.mark.django_db
+def test_graph_catches_up_with_other_processes(
+    network_nodes, product_objects, graph_cache, django_assert_num_queries
+):
+    """Проверяет, что изменения других процессов применяются из журнала без пересборки."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    graph = hierarchy_graph()
+    with django_assert_num_queries(1):
+        assert hierarchy_graph() is graph
+
+    # Другой процесс переносит предпринимателя к заводу и добавляет ему продукт
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier=factory)
+    NetworkNode.products.through.objects.create(
+        networknode_id=entrepreneur.pk, product_id=product_3.pk
+    )
+    HierarchyChange.objects.create(node_ids=[entrepreneur.pk])
+
+    with django_assert_num_queries(3):
+        assert hierarchy_graph() is graph
+    assert graph.descendants(retail.pk) == [retail.pk]
+    assert graph.descendants(factory.pk) == [factory.pk, retail.pk, entrepreneur.pk]
+    assert graph.missing_products(entrepreneur.pk, retail.pk) == [product_3.pk]
+
+    HierarchyChange.objects.create(node_ids=None)
+
+    rebuilt = hierarchy_graph()
+    assert rebuilt is not graph
+    assert rebuilt.version == HierarchyChange.objects.latest("pk").pk
+
+
+@pytest.mark.django_db
+def test_graph_applies_late_commits(network_nodes, graph_cache):
+    """Проверяет запись журнала, зафиксированную позже записи с большим id."""
+    factory, retail, entrepreneur = network_nodes
+    graph = hierarchy_graph()
+    last_id = graph.version
+    # Id откаченных транзакций предыдущих тестов тоже учитываются как пропуски.
+    known_gaps = set(graph.gaps)
+
+    HierarchyChange.objects.create(pk=last_id + 2, node_ids=[])
+    assert hierarchy_graph() is graph
+    assert graph.version == last_id + 2
+    assert set(graph.gaps) == known_gaps | {last_id + 1}
+
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier=factory)
+    HierarchyChange.objects.create(pk=last_id + 1, node_ids=[entrepreneur.pk])
+
+    assert hierarchy_graph() is graph
+    assert set(graph.gaps) == known_gaps
+    assert graph.descendants(retail.pk) == [retail.pk]
+
+
+@pytest.mark.django_db
+def test_changes_only_append_to_log(network_nodes, graph_cache):
+    """Проверяет, что изменение иерархии только вставляет запись, без блокировки общей строки."""
+    with CaptureQueriesContext(connection) as queries:
+        bump_hierarchy_version(node_ids=[network_nodes[0].pk])
+
+    statements = [query["sql"] for query in queries.captured_queries]
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT")
+
+
+@pytest.mark.django_db
+def test_log_written_with_graph_disabled(network_nodes, settings):
+    """Проверяет запись журнала процессом с выключенным кэшем для других процессов."""
+    settings.NETWORK_GRAPH_CACHE = False
+    factory, retail, entrepreneur = network_nodes
+    last_id = HierarchyChange.objects.order_by("pk").last().pk
+
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=0)
+    entrepreneur.refresh_from_db()
+    entrepreneur.supplier = factory
+    entrepreneur.save()
+
+    assert list(
+        HierarchyChange.objects.filter(pk__gt=last_id).values_list(
+            "node_ids", flat=True
+        )
+    ) == [[entrepreneur.pk]]
+
+
+@pytest.mark.django_db
+def test_graph_stores_products_sparsely(network_nodes, product_objects):
+    """Проверяет, что удаление продукта затрагивает только звенья с этим продуктом."""
+    factory, retail, entrepreneur = network_nodes
+    product_3 = product_objects[2]
+    graph = HierarchyGraph.build()
+    holders = {graph.node_ids[position] for position in graph.holders[product_3.pk]}
+
+    assert holders == set(product_3.network_nodes.values_list("pk", flat=True))
+
+    graph.remove_product(product_3.pk)
+
+    assert product_3.pk not in graph.holders
+    assert all(product_3.pk not in products for products in graph.products)
+
+
+@pytest.mark.django_db
+def test_graph_not_built_inside_transaction(
+    network_nodes,
+    graph_cache,
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+):
+    """Проверяет, что внутри транзакции снимок не строится, а строится после фиксации."""
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            NetworkNode.objects.select_for_update().get(pk=network_nodes[1].pk)
+            with CaptureQueriesContext(connection) as queries:
+                assert hierarchy_graph() is None
+            assert len(queries) == 0
+
+    with django_assert_num_queries(1):
+        graph = hierarchy_graph()
+    assert graph.descendants(network_nodes[1].pk) == [
+        network_nodes[1].pk,
+        network_nodes[2].pk,
+    ]
+
+
+@pytest.mark.django_db
+def test_committed_changes_are_applied_incrementally(
+    network_nodes, product_objects, graph_cache, django_capture_on_commit_callbacks
+):
+    """Проверяет, что изменения этого процесса применяются к снимку без пересборки."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=0)
+    entrepreneur.refresh_from_db()
+    graph = hierarchy_graph()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        new_retail = NetworkNode.objects.create(
+            name="Розничная сеть 2", node_type="retail", supplier=factory
+        )
+        new_retail.products.add(product_1, product_3)
+        entrepreneur.supplier = new_retail
+        entrepreneur.save()
+        retail.products.remove(product_2)
+
+    assert hierarchy_graph() is graph
+    assert graph.descendants(factory.pk) == [
+        factory.pk,
+        retail.pk,
+        new_retail.pk,
+        entrepreneur.pk,
+    ]
+    assert graph.missing_products(new_retail.pk, retail.pk) == [product_3.pk]
+    assert graph.missing_products(factory.pk, retail.pk) == [
+        product_2.pk,
+        product_3.pk,
+    ]
+
+    entrepreneur_id = entrepreneur.pk
+    with django_capture_on_commit_callbacks(execute=True):
+        product_3.network_nodes.clear()
+        entrepreneur.delete()
+
+    assert hierarchy_graph() is graph
+    assert entrepreneur_id not in graph
+    assert graph.missing_products(factory.pk, retail.pk) == [product_2.pk]
+
+
+@pytest.mark.django_db
+def test_uncommitted_changes_bypass_graph(network_nodes, graph_cache):
+    """Проверяет, что транзакция со своими изменениями иерархии не использует снимок."""
+    factory, retail, entrepreneur = network_nodes
+    graph = hierarchy_graph()
+
+    with transaction.atomic():
+        NetworkNode.objects.create(
+            name="Розничная сеть 2", node_type="retail", supplier=factory
+        )
+        assert hierarchy_graph() is None
+
+        with pytest.raises(ZeroDivisionError):
+            with transaction.atomic():
+                NetworkNode.objects.create(
+                    name="Розничная сеть 3", node_type="retail", supplier=factory
+                )
+                1 / 0
+
+    assert graph.descendants(factory.pk) == [factory.pk, retail.pk, entrepreneur.pk]
+
+
+@pytest.mark.django_db
+def test_rolled_back_change_keeps_graph(network_nodes, graph_cache):
+    """Проверяет, что откаченное изменение не попадает в снимок."""
+    factory, retail, entrepreneur = network_nodes
+    entrepreneur_id = entrepreneur.pk
+    graph = hierarchy_graph()
+
+    with pytest.raises(ZeroDivisionError):
+        with transaction.atomic():
+            entrepreneur.delete()
+            1 / 0
+
+    assert hierarchy_graph() is graph
+    assert entrepreneur_id in graph
+
+
+@pytest.mark.django_db
+def test_validation_uses_graph(
+    network_nodes, product_objects, graph_cache, django_capture_on_commit_callbacks
+):
+    """Проверяет смену поставщика по снимку без запросов продуктов и клиентов."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    with django_capture_on_commit_callbacks(execute=True):
+        new_factory = NetworkNode.objects.create(name="Завод 2", node_type="factory")
+        new_factory.products.set([product_1, product_2])
+        retail.supplier_debt = 0
+        retail.save()
+    assert hierarchy_graph() is not None
+
+    retail.supplier = new_factory
+    with CaptureQueriesContext(connection) as queries:
+        retail.full_clean()
+
+    tables = " ".join(query["sql"] for query in queries.captured_queries)
+    assert "network_networknode_products" not in tables
+
+
+@pytest.mark.django_db
+def test_validation_errors_with_graph(
+    network_nodes, product_objects, graph_cache, django_capture_on_commit_callbacks
+):
+    """Проверяет ошибки валидации иерархии и продуктов при проверке по снимку."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    with django_capture_on_commit_callbacks(execute=True):
+        new_factory = NetworkNode.objects.create(name="Завод 2", node_type="factory")
+        new_factory.products.set([product_2])
+        other_retail = NetworkNode.objects.create(
+            name="Розничная сеть 2", node_type="retail", supplier=factory
+        )
+    NetworkNode.objects.filter(pk__in=[retail.pk, entrepreneur.pk]).update(
+        supplier_debt=0
+    )
+    retail.refresh_from_db()
+    entrepreneur.refresh_from_db()
+    assert hierarchy_graph() is not None
+
+    retail.supplier = new_factory
+    with pytest.raises(ValidationError, match="нет необходимых продуктов"):
+        retail.full_clean()
+
+    retail.supplier = other_retail
+    with pytest.raises(ValidationError, match="превышению глубины"):
+        retail.full_clean()
+
+    entrepreneur.supplier = other_retail
+    with pytest.raises(ValidationError, match="отсутствуют у поставщика"):
+        entrepreneur.full_clean()
@@ -0,0 +1,236 @@
+import pytest
+from rest_framework.test import APIClient
+
+from network.bulk import assign_products, reassign_suppliers
+from network.listing import refresh_listing
+from network.models import Contact, NetworkNode, NetworkNodeListing, Product
+from network.serializers import DebtAdjustmentListSerializer
+
+
+def _list(user, settings, enabled, query=""):
+    """Возвращает ответ списка звеньев с таблицей чтения или без нее."""
+    settings.NETWORK_LISTING_READ_MODEL = enabled
+    client = APIClient()
+    client.force_authenticate(user=user)
+    response = client.get(f"/api/network-nodes/{query}")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_listing_response_matches_joined_list(active_user, network_nodes, settings):
+    """Проверяет, что список из таблицы чтения совпадает со списком по связанным таблицам."""
+    assert refresh_listing() == 3
+
+    assert _list(active_user, settings, True) == _list(active_user, settings, False)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    [
+        "?country_exact=Россия&ordering=-supplier_debt",
+        "?city_prefix=Мос&node_type=retail",
+        "?level=2",
+        "?debt_min=50000",
+        "?products=2,3&ordering=name",
+        "?ordering=-created_at",
+    ],
+)
+def test_listing_filters_match_joined_list(active_user, network_nodes, settings, query):
+    """Проверяет фильтры и сортировку списка из таблицы чтения."""
+    refresh_listing()
+
+    assert _list(active_user, settings, True, query) == _list(
+        active_user, settings, False, query
+    )
+
+
+@pytest.mark.django_db
+def test_listing_filters_by_location_ids(active_user, network_nodes, settings):
+    """Проверяет фильтры по id страны и города справочника."""
+    refresh_listing()
+    city_id = network_nodes[0].contact.city_ref_id
+
+    data = _list(active_user, settings, True, f"?city_id={city_id}")
+
+    assert [node["id"] for node in data] == [node.pk for node in network_nodes]
+
+
+@pytest.mark.django_db
+def test_listing_follows_model_changes(
+    network_nodes,
+    product_objects,
+    listing_read_model,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет обновление строк после изменения звена, контакта, продуктов и удаления."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    refresh_listing()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        factory.name = "Завод 2"
+        factory.save()
+        retail.contact.city = "Казань"
+        retail.contact.save()
+        retail.products.remove(product_2)
+    retail_row = NetworkNodeListing.objects.get(pk=retail.pk)
+
+    assert NetworkNodeListing.objects.get(pk=factory.pk).name == "Завод 2"
+    assert retail_row.supplier == "Завод: Завод 2"
+    assert retail_row.city == "Казань"
+    assert retail_row.contact["city"] == "Казань"
+    assert [product["id"] for product in retail_row.products] == [product_1.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product_1.name = "Новое название"
+        product_1.save()
+        entrepreneur.delete()
+
+    assert not NetworkNodeListing.objects.filter(pk=entrepreneur.pk).exists()
+    assert all(
+        product["name"] == "Новое название"
+        for row in NetworkNodeListing.objects.all()
+        for product in row.products
+        if product["id"] == product_1.pk
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product_3.delete()
+
+    factory_row = NetworkNodeListing.objects.get(pk=factory.pk)
+    assert {product["id"] for product in factory_row.products} == {
+        product_1.pk,
+        product_2.pk,
+    }
+
+
+@pytest.mark.django_db
+def test_listing_refreshes_only_affected_rows(
+    network_nodes,
+    product_objects,
+    listing_read_model,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет, что клиенты и звенья с продуктом пересчитываются только при изменении."""
+    factory, retail, entrepreneur = network_nodes
+    product_1 = product_objects[0]
+    refresh_listing()
+    NetworkNodeListing.objects.filter(pk=retail.pk).update(supplier="Устаревшее")
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        factory.node_type = "factory"
+        factory.save()
+        product_1.save()
+
+    assert NetworkNodeListing.objects.get(pk=retail.pk).supplier == "Устаревшее"
+    assert len(callbacks) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        factory.name = "Завод 2"
+        factory.save()
+
+    assert NetworkNodeListing.objects.get(pk=retail.pk).supplier == "Завод: Завод 2"
+
+
+@pytest.mark.django_db
+def test_listing_follows_contact_reassignment(
+    network_nodes, listing_read_model, django_capture_on_commit_callbacks
+):
+    """Проверяет пересчет строк обоих звеньев при переносе контакта."""
+    factory, retail, entrepreneur = network_nodes
+    node = NetworkNode.objects.create(
+        name="Новая сеть", node_type="retail", supplier=factory
+    )
+    refresh_listing()
+
+    contact = Contact.objects.get(network_node=retail)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        contact.network_node = node
+        contact.save()
+
+    assert NetworkNodeListing.objects.get(pk=retail.pk).contact is None
+    assert NetworkNodeListing.objects.get(pk=node.pk).city == contact.city
+
+
+@pytest.mark.django_db
+def test_listing_follows_bulk_operations(
+    network_nodes,
+    product_objects,
+    listing_read_model,
+    django_capture_on_commit_callbacks,
+):
+    """Проверяет обновление строк после массовых операций, обходящих сигналы."""
+    factory, retail, entrepreneur = network_nodes
+    product_4 = Product.objects.create(
+        name="Продукт 4", model="М4", release_date="2024-01-01"
+    )
+    factory.products.add(product_4)
+    refresh_listing()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        DebtAdjustmentListSerializer.apply_adjustments(
+            [{"node": retail.pk, "amount": 500}]
+        )
+        assign_products(factory.pk, add=[product_4.pk], depth=1)
+    retail_row = NetworkNodeListing.objects.get(pk=retail.pk)
+
+    assert retail_row.supplier_debt == 100_500
+    assert product_4.pk in {product["id"] for product in retail_row.products}
+    assert retail_row.version == NetworkNode.objects.get(pk=retail.pk).version
+
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=0)
+    with django_capture_on_commit_callbacks(execute=True):
+        reassign_suppliers([(entrepreneur.pk, factory.pk)])
+    entrepreneur_row = NetworkNodeListing.objects.get(pk=entrepreneur.pk)
+
+    assert entrepreneur_row.supplier_id == factory.pk
+    assert entrepreneur_row.supplier == "Завод: Завод 1"
+    assert entrepreneur_row.level == 1
+
+
+@pytest.mark.django_db
+def test_listing_not_maintained_when_disabled(
+    network_nodes, django_capture_on_commit_callbacks
+):
+    """Проверяет, что без NETWORK_LISTING_READ_MODEL строки не записываются."""
+    with django_capture_on_commit_callbacks(execute=True):
+        network_nodes[0].name = "Завод 2"
+        network_nodes[0].save()
+
+    assert not NetworkNodeListing.objects.exists()
+
+
+@pytest.mark.django_db
+def test_refresh_listing_keeps_newer_rows(network_nodes):
+    """Проверяет, что пересчет не перезаписывает строку более новой версии звена."""
+    factory = network_nodes[0]
+    refresh_listing()
+    NetworkNodeListing.objects.filter(pk=factory.pk).update(
+        name="Завод из новой версии", version=factory.version + 1
+    )
+
+    refresh_listing([factory.pk])
+
+    assert NetworkNodeListing.objects.get(pk=factory.pk).name == "Завод из новой версии"
+
+
+@pytest.mark.django_db
+def test_refresh_listing_removes_stale_rows(network_nodes):
+    """Проверяет, что полная пересборка удаляет строки несуществующих звеньев."""
+    NetworkNodeListing.objects.create(
+        id=10_000,
+        name="Удаленное звено",
+        node_type="factory",
+        level=0,
+        version=1,
+        supplier_debt=0,
+        created_at=network_nodes[0].created_at,
+    )
+
+    assert refresh_listing() == 3
+    assert set(NetworkNodeListing.objects.values_list("pk", flat=True)) == {
+        node.pk for node in network_nodes
+    }
@@ -0,0 +1,105 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from rest_framework.test import APIClient
+
+from network.metrics import registry
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    """Включает сбор показателей запросов и очищает накопленные значения."""
+    settings.NETWORK_METRICS_ENABLED = True
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_server_timing_header(metrics_enabled, active_user, network_nodes):
+    """Проверяет добавление заголовка Server-Timing с количеством запросов к БД."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/network-nodes/")
+
+    assert response.status_code == 200
+    server_timing = response["Server-Timing"]
+    assert "db;dur=" in server_timing
+    assert "serializer;dur=" in server_timing
+    assert "total;dur=" in server_timing
+    assert '0 queries"' not in server_timing
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_groups_by_view_and_action(
+    metrics_enabled, active_user, network_nodes
+):
+    """Проверяет вывод показателей в формате Prometheus по представлению и действию."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+    client.get("/api/network-nodes/")
+    client.get(f"/api/network-nodes/{network_nodes[0].id}/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert (
+        'network_http_requests_total{view="network:network-node-list",'
+        'action="list",status="200"} 1' in content
+    )
+    assert 'view="network:network-node-detail",action="retrieve"' in content
+    assert "network_db_queries_total" in content
+    assert "network_serializer_duration_seconds_total" in content
+    assert "network_http_request_duration_seconds_bucket" in content
+
+
+@pytest.mark.django_db
+def test_metrics_disabled_by_default(active_user):
+    """Проверяет отсутствие заголовка и эндпоинта при выключенной настройке."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/network-nodes/")
+    assert "Server-Timing" not in response
+
+    response = client.get("/metrics")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_requires_allowed_address_or_staff(
+    metrics_enabled, admin_client, active_user
+):
+    """Проверяет, что /metrics недоступен с чужого адреса без входа сотрудника staff."""
+    assert Client(REMOTE_ADDR="10.0.0.5").get("/metrics").status_code == 403
+
+    client = Client(REMOTE_ADDR="10.0.0.5")
+    client.force_login(active_user)
+    assert client.get("/metrics").status_code == 403
+
+    assert admin_client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code == 200
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_allowed_subnet(metrics_enabled, settings):
+    """Проверяет доступ к /metrics из подсети NETWORK_METRICS_ALLOWED_IPS."""
+    settings.NETWORK_METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+
+    assert Client(REMOTE_ADDR="10.1.2.3").get("/metrics").status_code == 200
+    assert Client().get("/metrics").status_code == 403
+
+
+@pytest.mark.django_db
+def test_server_timing_header_for_async_view(
+    metrics_enabled, active_user, network_nodes
+):
+    """Проверяет показатели асинхронного представления в асинхронной цепочке."""
+    client = AsyncClient()
+    client.force_login(active_user)
+
+    response = async_to_sync(client.get)("/api/async/network-nodes/")
+
+    assert response.status_code == 200
+    assert '0 queries"' not in response["Server-Timing"]
@@ -1,11 +1,20 @@
 from datetime import date, timedelta
+from decimal import Decimal
 
 import pytest
 from django.core.exceptions import ValidationError
-from django.db.models import ProtectedError
+from django.db.models import F, ProtectedError, Sum
 from django.utils import timezone
+from rest_framework.test import APIClient
 
-from network.models import Contact, NetworkNode, Product
+from network.models import (
+    City,
+    Contact,
+    DebtSnapshot,
+    DebtTransaction,
+    NetworkNode,
+    Product,
+)
 
 
 @pytest.mark.django_db
@@ -54,6 +63,28 @@ class TestContact:
         assert self.contact_obj.street == new_data["street"]
         assert self.contact_obj.building_number == new_data["building_number"]
 
+    def test_locations(self, django_assert_num_queries):
+        """Проверка связи контакта со справочниками стран и городов."""
+        contact = self.contact_obj
+        assert contact.country_ref.name == contact.country
+        assert contact.city_ref.name == contact.city
+        assert contact.city_ref.country_id == contact.country_ref_id
+
+        contacts = [
+            Contact(country=f" {contact.country} ", city="Новый город"),
+            Contact(country=contact.country, city=contact.city),
+        ]
+        Contact.set_locations(contacts)
+
+        assert contacts[0].country_ref_id == contact.country_ref_id
+        assert contacts[0].city_ref_id not in (None, contact.city_ref_id)
+        assert contacts[1].city_ref_id == contact.city_ref_id
+        assert City.objects.count() == 2
+
+        contact.street = "Другая улица"
+        with django_assert_num_queries(1):
+            contact.save()
+
     def test_delete(self):
         """Проверка удаления объекта."""
         assert Contact.objects.all().count() == 1
@@ -116,6 +147,16 @@ class TestProduct:
         assert self.product_obj.model == new_data["model"]
         assert self.product_obj.release_date == new_release_date
 
+    def test_save_without_changes(self, django_assert_num_queries):
+        """Проверка, что продукт без изменений не записывается."""
+        updated_at = self.product_obj.updated_at
+
+        with django_assert_num_queries(1):
+            self.product_obj.save()
+        self.product_obj.refresh_from_db()
+
+        assert self.product_obj.updated_at == updated_at
+
     def test_delete(self):
         """Проверка удаления объекта."""
         assert Product.objects.all().count() == 1
@@ -199,9 +240,9 @@ class TestNetworkNode:
 
         node_new_name = "Новый завод"
         contact_new_email = "new@mail.com"
-        product2 = Product.objects.create(**product_data_in_dict)
-        product2.name = "product2"
-        product2.save()
+        product2 = Product.objects.create(
+            **{**product_data_in_dict, "name": "product2"}
+        )
 
         node.name = node_new_name
         node.products.set(
@@ -357,3 +398,104 @@ class TestNetworkNode:
         retail_with_client.supplier = factory_without_products
         with pytest.raises(ValidationError, match="нет необходимых продуктов"):
             retail_with_client.full_clean()
+
+    def test_version_increments_on_update(self):
+        """Проверяет увеличение версии записи при каждом сохранении."""
+        node = self.factory_net1_lv0
+        assert node.version == 1
+
+        node.name = "Завод 2"
+        node.save()
+        node.refresh_from_db()
+
+        assert node.version == 2
+
+    def test_stale_save_gets_new_version(self):
+        """Проверяет, что устаревший экземпляр получает новую версию, а не уже выданную."""
+        node = NetworkNode.objects.get(pk=self.factory_net1_lv0.pk)
+        NetworkNode.objects.filter(pk=node.pk).update(version=F("version") + 1)
+
+        node.name = "Завод 2"
+        node.save()
+
+        assert node.version == 3
+        assert NetworkNode.objects.get(pk=node.pk).version == 3
+
+
+@pytest.mark.django_db
+def test_debt_transaction_is_append_only(network_nodes):
+    """Проверяет невозможность изменения сохраненной записи журнала задолженности."""
+    debt_transaction = DebtTransaction.objects.create(node=network_nodes[1], amount=100)
+
+    debt_transaction.amount = 200
+    with pytest.raises(ValidationError, match="нельзя изменять"):
+        debt_transaction.save()
+
+
+@pytest.mark.django_db
+def test_debt_changes_are_recorded_in_ledger(network_nodes):
+    """Проверяет запись начальной задолженности и ее изменений в журнал."""
+    retail = network_nodes[1]
+    assert list(retail.debt_transactions.values_list("amount", flat=True)) == [100_000]
+
+    retail = NetworkNode.objects.get(pk=retail.pk)
+    retail.supplier_debt = Decimal("60000.50")
+    retail.save()
+    retail.name = "Сеть без изменения долга"
+    retail.save()
+
+    amounts = list(retail.debt_transactions.order_by("id").values_list("amount"))
+    assert amounts == [(Decimal("100000"),), (Decimal("-39999.50"),)]
+
+
+@pytest.mark.django_db
+def test_debt_change_is_computed_against_database_value(network_nodes):
+    """Проверяет расчет изменения долга относительно актуального значения в БД."""
+    retail = NetworkNode.objects.get(pk=network_nodes[1].pk)
+    NetworkNode.objects.filter(pk=retail.pk).update(supplier_debt=90_000)
+
+    retail.supplier_debt = 50_000
+    retail.save()
+
+    last = retail.debt_transactions.order_by("-id").first()
+    assert last.amount == -40_000
+
+
+@pytest.mark.django_db
+def test_stale_save_keeps_concurrent_debt_adjustment(active_user, network_nodes):
+    """Проверяет, что устаревший экземпляр не затирает корректировку долга."""
+    retail = NetworkNode.objects.get(pk=network_nodes[1].pk)
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+    response = client.post(
+        f"/api/network-nodes/{retail.pk}/debt-adjustments/", {"amount": "100"}
+    )
+    assert response.status_code == 201
+
+    retail.name = "Переименованная сеть"
+    retail.save()
+
+    ledger = retail.debt_transactions.aggregate(total=Sum("amount"))["total"]
+    assert NetworkNode.objects.get(pk=retail.pk).supplier_debt == 100_100
+    assert retail.supplier_debt == ledger == 100_100
+
+
+@pytest.mark.django_db
+def test_debt_as_of_uses_snapshot_and_ledger(network_nodes):
+    """Проверяет расчет задолженности на дату по снимку и операциям после него."""
+    retail = network_nodes[1]
+    now = timezone.now()
+    period_end = now - timedelta(days=10)
+
+    retail.debt_transactions.all().delete()
+    DebtSnapshot.objects.create(node=retail, period_end=period_end, balance=1_000)
+    for days_ago, amount in [(20, 500), (5, 200), (1, -50)]:
+        debt_transaction = DebtTransaction.objects.create(node=retail, amount=amount)
+        DebtTransaction.objects.filter(pk=debt_transaction.pk).update(
+            created_at=now - timedelta(days=days_ago)
+        )
+
+    assert retail.debt_as_of(now - timedelta(days=30)) == 0
+    assert retail.debt_as_of(period_end) == 1_000
+    assert retail.debt_as_of(now - timedelta(days=3)) == 1_200
+    assert retail.debt_as_of(now) == 1_150
@@ -0,0 +1,68 @@
+import pytest
+
+from network.models import NetworkNode, Product
+from network.product_index import ProductIndex
+
+
+@pytest.mark.django_db
+def test_product_index(network_nodes, product_objects):
+    """Проверяет массовые проверки продуктов по индексу связей."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    empty = NetworkNode.objects.create(name="Завод 2", node_type="factory")
+
+    index = ProductIndex.for_nodes()
+
+    assert len(index) == 4
+    assert index.products_of(factory.pk) == [product_1.pk, product_2.pk, product_3.pk]
+    assert index.products_of(empty.pk) == []
+    assert index.holders([product_2.pk]) == [factory.pk, retail.pk]
+    assert index.holders([product_3.pk], node_ids=[retail.pk, entrepreneur.pk]) == []
+    assert index.missing(
+        [retail.pk, entrepreneur.pk, factory.pk], [factory.pk, retail.pk, retail.pk]
+    ) == {factory.pk: [product_3.pk]}
+    assert index.missing([retail.pk], [empty.pk]) == {
+        retail.pk: [product_1.pk, product_2.pk]
+    }
+
+
+@pytest.mark.django_db
+def test_product_index_for_selected_nodes(network_nodes, product_objects):
+    """Проверяет индекс по части звеньев и продукты вне индекса."""
+    factory, retail, entrepreneur = network_nodes
+    new_product = Product.objects.create(
+        name="Продукт", model="Y", release_date="2020-01-01"
+    )
+
+    index = ProductIndex.for_nodes([retail.pk, entrepreneur.pk])
+
+    assert len(index) == 2
+    assert index.holders([new_product.pk]) == []
+    with pytest.raises(KeyError):
+        index.rows([factory.pk])
+
+
+@pytest.mark.django_db
+def test_clients_with_products(network_nodes, product_objects):
+    """Проверяет поиск клиентов, которым нужны удаляемые продукты."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    assert factory.clients_with_products([product_1.pk, product_2.pk]) == {
+        retail: [product_1, product_2]
+    }
+    assert factory.clients_with_products([product_3.pk]) == {}
+
+
+@pytest.mark.django_db
+def test_product_index_without_products(network_nodes):
+    """Проверяет индекс звеньев без связей с продуктами."""
+    factory, retail, entrepreneur = network_nodes
+    NetworkNode.products.through.objects.all().delete()
+
+    index = ProductIndex.for_nodes()
+
+    assert len(index.links) == 0
+    assert index.products_of(retail.pk) == []
+    assert index.holders([1, 2]) == []
+    assert index.missing([retail.pk, entrepreneur.pk], [factory.pk, retail.pk]) == {}
@@ -0,0 +1,162 @@
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from network.middleware import QueryWatchMiddleware
+from network.models import Contact, NetworkNode
+from network.querywatch import QueryWatchWarning, watch_queries
+
+
+@pytest.fixture
+def factory_with_clients(network_nodes, product_objects):
+    """Возвращает завод с пятью дополнительными клиентами, у каждого есть контакт."""
+    factory = network_nodes[0]
+    for number in range(5):
+        client = NetworkNode.objects.create(
+            node_type="retail", name=f"Сеть {number}", supplier=factory
+        )
+        client.products.set(product_objects[:2])
+        Contact.objects.create(
+            email=f"client_{number}@mail.com",
+            country="Россия",
+            city="Казань",
+            street="Тестовая",
+            building_number=str(number),
+            network_node=client,
+        )
+    return factory
+
+
+@pytest.mark.django_db
+def test_watcher_detects_repeated_queries(factory_with_clients):
+    """Проверяет обнаружение N+1 с указанием места в коде."""
+    with watch_queries("тест", repeat_threshold=3, mode="collect") as watcher:
+        for node in NetworkNode.objects.all():
+            node.contact
+
+    assert len(watcher.issues) == 1
+    issue = watcher.issues[0]
+    assert issue.kind == "repeated"
+    assert "test_querywatch.py" in issue.origin
+    assert "Запрос одной формы выполнен 8 раз" in watcher.report()
+
+
+@pytest.mark.django_db
+def test_watcher_detects_slow_queries(network_nodes):
+    """Проверяет обнаружение запросов дольше заданного порога."""
+    with watch_queries("тест", slow_query_ms=0, mode="collect") as watcher:
+        NetworkNode.objects.count()
+
+    assert [issue.kind for issue in watcher.issues] == ["slow"]
+
+
+@pytest.mark.django_db
+def test_watcher_warn_mode(factory_with_clients):
+    """Проверяет режим предупреждений для staging."""
+    with pytest.warns(QueryWatchWarning):
+        with watch_queries("тест", repeat_threshold=3, mode="warn"):
+            for node in NetworkNode.objects.all():
+                node.contact
+
+
+@pytest.mark.django_db
+def test_middleware_logs_repeated_queries(settings, caplog, factory_with_clients):
+    """Проверяет запись N+1 в лог при включенном отслеживании запросов."""
+    settings.NETWORK_QUERY_WATCH = "log"
+    settings.NETWORK_QUERY_WATCH_REPEAT_THRESHOLD = 3
+
+    def view_with_repeated_queries(request):
+        for node in NetworkNode.objects.all():
+            node.contact
+        return HttpResponse()
+
+    middleware = QueryWatchMiddleware(view_with_repeated_queries)
+    middleware(RequestFactory().get("/api/network-nodes/"))
+
+    assert "Проблемы SQL-запросов в GET /api/network-nodes/" in caplog.text
+
+
+@pytest.mark.django_db
+def test_async_middleware_logs_repeated_queries(settings, caplog, factory_with_clients):
+    """Проверяет отслеживание запросов асинхронного представления без адаптера."""
+    settings.NETWORK_QUERY_WATCH = "log"
+    settings.NETWORK_QUERY_WATCH_REPEAT_THRESHOLD = 3
+
+    def load_contacts():
+        for node in NetworkNode.objects.all():
+            node.contact
+
+    async def view_with_repeated_queries(request):
+        await sync_to_async(load_contacts)()
+        return HttpResponse()
+
+    middleware = QueryWatchMiddleware(view_with_repeated_queries)
+    async_to_sync(middleware)(RequestFactory().get("/api/async/network-nodes/"))
+
+    assert "Проблемы SQL-запросов в GET /api/async/network-nodes/" in caplog.text
+
+
+@pytest.mark.django_db
+def test_node_list_has_no_repeated_queries(
+    query_watch, active_user, factory_with_clients
+):
+    """Проверяет отсутствие N+1 при получении списка звеньев."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    with query_watch():
+        response = client.get("/api/network-nodes/")
+
+    assert response.status_code == 200
+    assert len(response.data) == 8
+
+
+@pytest.mark.django_db
+def test_admin_changelist_has_no_repeated_queries(
+    query_watch, admin_client, factory_with_clients
+):
+    """Проверяет отсутствие N+1 при отображении списка звеньев в админ-панели."""
+    with query_watch():
+        response = admin_client.get("/admin/network/networknode/")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_admin_city_filter_has_no_repeated_queries(
+    query_watch, admin_client, factory_with_clients
+):
+    """Проверяет отсутствие N+1 в фильтре по городам из разных стран."""
+    for number, contact in enumerate(Contact.objects.all()):
+        contact.country = ["Россия", "Беларусь", "Казахстан"][number % 3]
+        contact.city = f"Город {number}"
+        contact.save()
+
+    with query_watch():
+        response = admin_client.get("/admin/network/networknode/")
+
+    assert response.status_code == 200
+    assert "Город 5 (Казахстан)" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_product_removal_validation_has_no_repeated_queries(
+    query_watch, active_user, factory_with_clients, product_objects
+):
+    """Проверяет отсутствие N+1 в проверке удаления продуктов у клиентов."""
+    factory = factory_with_clients
+    factory.products.set(product_objects[:2])
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    with query_watch():
+        response = client.patch(
+            f"/api/network-nodes/{factory.pk}/",
+            {"products_remove": [product_objects[1].pk]},
+            format="json",
+        )
+
+    # Продукт поставляется клиентам завода, поэтому удаление отклоняется.
+    assert response.status_code == 400
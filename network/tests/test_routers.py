@@ -0,0 +1,93 @@
+import pytest
+from rest_framework.test import APIClient
+
+from network.middleware import ReplicaRoutingMiddleware
+from network.models import NetworkNode
+from network.routers import PrimaryReplicaRouter, read_from_replica
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+def test_router_reads_from_replica_only_inside_context(replica, network_nodes):
+    """Проверяет выбор БД для чтения и записи."""
+    router = PrimaryReplicaRouter()
+
+    assert router.db_for_read(NetworkNode) == "default"
+    assert NetworkNode.objects.count() == 3
+    with read_from_replica():
+        assert router.db_for_read(NetworkNode) == replica
+        assert router.db_for_write(NetworkNode) == "default"
+        assert NetworkNode.objects.count() == 0
+        assert NetworkNode.objects.using("default").count() == 3
+
+
+def test_router_keeps_users_on_primary(replica, active_user):
+    """Проверяет, что пользователи всегда читаются из основной БД."""
+    with read_from_replica():
+        assert PrimaryReplicaRouter().db_for_read(type(active_user)) == "default"
+
+
+def test_router_without_replica(network_nodes):
+    """Проверяет, что без настроенной реплики чтение идет в основную БД."""
+    with read_from_replica():
+        assert PrimaryReplicaRouter().db_for_read(NetworkNode) == "default"
+        assert NetworkNode.objects.count() == 3
+
+
+def test_safe_api_request_reads_from_replica(replica, active_user, network_nodes):
+    """Проверяет, что список звеньев читается из реплики (в тесте она пустая)."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/network-nodes/")
+
+    assert response.status_code == 200
+    assert response.data == []
+
+
+def test_write_makes_user_read_from_primary(replica, active_user, network_nodes):
+    """Проверяет, что после изменения данных пользователь читает из основной БД."""
+    factory = network_nodes[0]
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.patch(
+        f"/api/network-nodes/{factory.id}/", {"name": "Новое имя"}, format="json"
+    )
+    assert response.status_code == 200
+    assert ReplicaRoutingMiddleware.cookie_name in response.cookies
+
+    response = client.get(f"/api/network-nodes/{factory.id}/")
+    assert response.status_code == 200
+    assert response.data["name"] == "Новое имя"
+
+    client.cookies.clear()
+    response = client.get(f"/api/network-nodes/{factory.id}/")
+    assert response.status_code == 404
+
+
+def test_failed_write_does_not_stick_to_primary(replica, active_user, network_nodes):
+    """Проверяет, что неуспешный изменяющий запрос не переключает чтение."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.post("/api/network-nodes/", {}, format="json")
+
+    assert response.status_code == 400
+    assert ReplicaRoutingMiddleware.cookie_name not in response.cookies
+
+
+def test_admin_changelist_reads_from_replica(replica, admin_client, network_nodes):
+    """Проверяет, что список в админ-панели читается из реплики, а сессия - из основной БД."""
+    response = admin_client.get("/admin/network/networknode/")
+
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 0
+
+
+def test_async_api_request_reads_from_replica(replica, admin_client, network_nodes):
+    """Проверяет, что маршрутизация действует и в асинхронных представлениях."""
+    response = admin_client.get("/api/async/network-nodes/stats/")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 0
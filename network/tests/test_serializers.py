@@ -1,12 +1,18 @@
 from datetime import date, datetime, timedelta
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 
 from network.models import Contact, NetworkNode
-from network.serializers import (ContactSerializer, NetworkNodeReadSerializer,
-                                 NetworkNodeWriteSerializer, ProductSerializer)
+from network.serializers import (
+    ContactSerializer,
+    NetworkNodeReadSerializer,
+    NetworkNodeWriteSerializer,
+    ProductSerializer,
+)
 
 
 @pytest.mark.django_db
@@ -262,6 +268,51 @@ def test_node_products_must_be_subset_of_supplier_products(network_nodes):
         serializer.save()
 
 
+def _product_data(product):
+    return {
+        "name": product.name,
+        "model": product.model,
+        "release_date": str(product.release_date),
+    }
+
+
+@pytest.mark.django_db
+def test_update_products_applies_only_difference(network_nodes, product_objects):
+    """Проверяет, что обновление продуктов удаляет и добавляет только изменившиеся связи."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    data = {"products": [_product_data(product_1), _product_data(product_3)]}
+
+    serializer = NetworkNodeWriteSerializer(retail, data=data, partial=True)
+    assert serializer.is_valid()
+    with CaptureQueriesContext(connection) as queries:
+        serializer.save()
+
+    links_table = NetworkNode.products.through._meta.db_table
+    changes = [
+        query["sql"].split()[0]
+        for query in queries.captured_queries
+        if links_table in query["sql"] and query["sql"].startswith(("INSERT", "DELETE"))
+    ]
+    assert changes == ["DELETE", "INSERT"]
+    assert set(retail.products.all()) == {product_1, product_3}
+
+
+@pytest.mark.django_db
+def test_update_products_rolled_back_by_transaction(network_nodes, product_objects):
+    """Проверяет, что при запрете удаления продукта связи звена не меняются."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+    data = {"products": [_product_data(product_2), _product_data(product_3)]}
+
+    serializer = NetworkNodeWriteSerializer(retail, data=data, partial=True)
+    assert serializer.is_valid()
+    with pytest.raises(ValidationError, match="клиенту 'ИП Иванов'"):
+        serializer.save()
+
+    assert set(retail.products.all()) == {product_1, product_2}
+
+
 @pytest.mark.django_db
 def test_create_with_nonexistent_supplier(contact_data_in_dict):
     """Проверяет невозможность создания объекта NetworkNode c несуществующим id поставщика."""
@@ -304,3 +355,82 @@ def test_network_node_read_serializer_output_representation(network_nodes):
     assert datetime.fromisoformat(serializer_data["created_at"]) == node_obj.created_at
     assert serializer_data["node_type"] == node_obj.node_type
     assert serializer_data["level"] == node_obj.level
+
+
+@pytest.mark.django_db
+def test_update_products_by_ids(network_nodes, product_objects):
+    """Проверяет добавление и удаление продуктов по id без полного списка."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    serializer = NetworkNodeWriteSerializer(
+        retail,
+        data={"products_add": [product_3.id], "products_remove": [product_2.id]},
+        partial=True,
+    )
+    assert serializer.is_valid()
+    serializer.save()
+
+    assert set(retail.products.all()) == {product_1, product_3}
+
+    serializer = NetworkNodeWriteSerializer(
+        entrepreneur, data={"products_add": [product_2.id]}, partial=True
+    )
+    assert serializer.is_valid()
+    with pytest.raises(ValidationError, match="продукты отсутствуют у поставщика"):
+        serializer.save()
+
+
+@pytest.mark.django_db
+def test_products_ids_validation(network_nodes, product_objects):
+    """Проверяет отказ для несуществующих и противоречивых id продуктов."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    for data, field in [
+        ({"products_add": [999_999]}, "products_add"),
+        (
+            {"products_add": [product_1.id], "products_remove": [product_1.id]},
+            "products_remove",
+        ),
+        ({"products_add": [product_1.id], "products": []}, "products"),
+    ]:
+        serializer = NetworkNodeWriteSerializer(retail, data=data, partial=True)
+        assert not serializer.is_valid()
+        assert field in serializer.errors
+
+
+@pytest.mark.django_db
+def test_update_deleted_node_returns_not_found(network_nodes):
+    """Проверяет ответ 404, если звено удалено после загрузки."""
+    entrepreneur = NetworkNode.objects.get(pk=network_nodes[2].pk)
+    NetworkNode.objects.filter(pk=entrepreneur.pk).delete()
+
+    serializer = NetworkNodeWriteSerializer(
+        entrepreneur, data={"name": "Новое название"}, partial=True
+    )
+    serializer.is_valid(raise_exception=True)
+
+    with pytest.raises(NotFound):
+        serializer.save()
+
+
+@pytest.mark.django_db
+def test_update_refreshes_loaded_values_of_stale_instance(network_nodes):
+    """
+    Проверяет, что при перечитывании устаревшего звена обновляются и загруженные
+    задолженность и поставщик, от которых считаются изменения при сохранении.
+    """
+    retail = NetworkNode.objects.get(pk=network_nodes[1].pk)
+    NetworkNode.objects.filter(pk=retail.pk).update(
+        supplier_debt=500, version=retail.version + 1
+    )
+
+    serializer = NetworkNodeWriteSerializer(
+        retail, data={"name": "Новое название"}, partial=True
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+
+    assert retail._loaded_supplier_debt == 500
+    assert retail._loaded_supplier_id == network_nodes[0].pk
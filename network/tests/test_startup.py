@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+LAZY_MODULES = {"faker", "numpy", "locust"}
+
+STARTUP_SCRIPT = """
+import json, sys
+import django
+django.setup()
+from django.core.management import load_command_class
+from django.urls import get_resolver
+get_resolver().url_patterns
+load_command_class("network", "create_demo_data")
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_startup_does_not_import_heavy_modules():
+    """
+    Проверяет, что запуск Django, загрузка URL и модуля команды create_demo_data
+    не импортируют тяжелые зависимости, нужные только отдельным командам.
+    """
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {name.split(".")[0] for name in json.loads(result.stdout)}
+
+    assert modules & LAZY_MODULES == set()
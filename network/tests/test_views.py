@@ -1,6 +1,12 @@
+from decimal import Decimal
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
+from network.models import DebtTransaction, NetworkNode
+
 
 @pytest.mark.django_db
 def test_api_requires_auth():
@@ -69,3 +75,452 @@ def test_cannot_update_debt_through_api(active_user, network_nodes):
 
     assert response.status_code == 400
     assert "supplier_debt" in response.data
+
+
+@pytest.mark.django_db
+def test_api_ordering_with_id_tiebreaker(active_user, network_nodes):
+    """Проверяет сортировку списка и добавление id при равных значениях."""
+    factory, retail, entrepreneur = network_nodes
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=100_000)
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/network-nodes/?ordering=-supplier_debt")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data] == [
+        entrepreneur.id,
+        retail.id,
+        factory.id,
+    ]
+
+    response = client.get("/api/network-nodes/?ordering=level")
+    assert [item["id"] for item in response.data] == [
+        factory.id,
+        retail.id,
+        entrepreneur.id,
+    ]
+
+
+@pytest.mark.django_db
+def test_api_ordering_ignores_not_whitelisted_fields(active_user, network_nodes):
+    """Проверяет, что сортировка по полям вне белого списка не применяется."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/network-nodes/?ordering=-node_type")
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data] == sorted(
+        node.id for node in network_nodes
+    )
+
+
+@pytest.mark.django_db
+def test_api_detail_returns_etag_with_version(active_user, network_nodes):
+    """Проверяет передачу версии звена в заголовке ETag."""
+    node = network_nodes[0]
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get(f"/api/network-nodes/{node.id}/")
+
+    assert response.status_code == 200
+    assert response["ETag"] == f'"{node.version}"'
+
+
+@pytest.mark.django_db
+def test_api_update_with_matching_if_match(active_user, network_nodes):
+    """Проверяет обновление при совпадении версии и увеличение версии."""
+    node = network_nodes[0]
+    version = node.version
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.patch(
+        f"/api/network-nodes/{node.id}/",
+        {"name": "Новое название"},
+        format="json",
+        HTTP_IF_MATCH=f'"{version}"',
+    )
+
+    assert response.status_code == 200
+    assert response.data["version"] == version + 1
+    assert response["ETag"] == f'"{version + 1}"'
+
+
+@pytest.mark.django_db
+def test_api_update_with_stale_if_match(active_user, network_nodes):
+    """Проверяет отказ в обновлении при устаревшей версии из If-Match."""
+    node = network_nodes[0]
+    stale_version = node.version
+    node.name = "Изменено другим запросом"
+    node.save()
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.patch(
+        f"/api/network-nodes/{node.id}/",
+        {"name": "Новое название"},
+        format="json",
+        HTTP_IF_MATCH=f'"{stale_version}"',
+    )
+
+    assert response.status_code == 412
+    node.refresh_from_db()
+    assert node.name == "Изменено другим запросом"
+
+
+@pytest.mark.django_db
+def test_api_stale_if_match_fails_before_locking(active_user, network_nodes):
+    """Проверяет, что устаревшая версия отклоняется до блокировки строк."""
+    node = network_nodes[1]
+    stale_version = node.version
+    NetworkNode.objects.filter(pk=node.pk).update(version=stale_version + 1)
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f"/api/network-nodes/{node.id}/",
+            {"name": "Новое название"},
+            format="json",
+            HTTP_IF_MATCH=f'"{stale_version}"',
+        )
+
+    assert response.status_code == 412
+    assert not any("FOR UPDATE" in query["sql"] for query in queries)
+
+
+@pytest.mark.django_db
+def test_api_update_locks_related_nodes(active_user, network_nodes):
+    """Проверяет блокировку звена, поставщика и клиентов при обновлении."""
+    if not connection.features.has_select_for_update:
+        pytest.skip("База данных не поддерживает SELECT ... FOR UPDATE")
+
+    retail = network_nodes[1]
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f"/api/network-nodes/{retail.id}/", {"name": "Сеть"}, format="json"
+        )
+
+    assert response.status_code == 200
+    assert any("FOR UPDATE" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_api_debt_adjustment(active_user, network_nodes):
+    """Проверяет изменение задолженности и запись операции в журнал."""
+    retail = network_nodes[1]
+    version = retail.version
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.post(
+        f"/api/network-nodes/{retail.id}/debt-adjustments/",
+        {"amount": "-25000.50", "comment": "Оплата"},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert response.data["node"] == retail.id
+    retail.refresh_from_db()
+    assert retail.supplier_debt == Decimal("74999.50")
+    assert retail.version == version + 1
+    assert DebtTransaction.objects.filter(
+        node=retail, amount=Decimal("-25000.50"), comment="Оплата"
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_api_debt_adjustment_form_data_and_missing_node(active_user, network_nodes):
+    """Проверяет изменение задолженности из формы и ответ 404 для несуществующего звена."""
+    retail = network_nodes[1]
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.post(
+        f"/api/network-nodes/{retail.id}/debt-adjustments/",
+        {"amount": "100", "comment": "Начисление"},
+    )
+    assert response.status_code == 201
+    assert response.data["comment"] == "Начисление"
+
+    response = client.post(
+        "/api/network-nodes/999999/debt-adjustments/", {"amount": "100"}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("payload", [[{"amount": "5"}], "5"])
+def test_api_debt_adjustment_rejects_non_object_body(
+    active_user, network_nodes, payload
+):
+    """Проверяет ответ 400, если тело запроса не объект."""
+    retail = network_nodes[1]
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.post(
+        f"/api/network-nodes/{retail.id}/debt-adjustments/", payload, format="json"
+    )
+
+    assert response.status_code == 400
+    assert retail.debt_transactions.count() == 1
+
+
+@pytest.mark.django_db
+def test_api_debt_adjustment_rejects_negative_debt_and_factory(
+    active_user, network_nodes
+):
+    """Проверяет запрет отрицательной задолженности и изменения долга завода."""
+    factory, retail, entrepreneur = network_nodes
+    transactions_count = DebtTransaction.objects.count()
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.post(
+        f"/api/network-nodes/{retail.id}/debt-adjustments/",
+        {"amount": "-100000.01"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "amount" in response.data
+
+    response = client.post(
+        f"/api/network-nodes/{factory.id}/debt-adjustments/",
+        {"amount": "100"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "node" in response.data
+
+    retail.refresh_from_db()
+    factory.refresh_from_db()
+    assert retail.supplier_debt == 100_000
+    assert factory.supplier_debt == 0
+    assert DebtTransaction.objects.count() == transactions_count
+
+
+@pytest.mark.django_db
+def test_api_bulk_debt_adjustments(active_user, network_nodes):
+    """Проверяет пакетное изменение задолженности в одном UPDATE."""
+    factory, retail, entrepreneur = network_nodes
+    transactions_count = DebtTransaction.objects.count()
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    payload = [
+        {"node": retail.id, "amount": "500"},
+        {"node": entrepreneur.id, "amount": "-10000"},
+        {"node": retail.id, "amount": "-200"},
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            "/api/network-nodes/debt-adjustments/", payload, format="json"
+        )
+
+    assert response.status_code == 201
+    assert len(response.data) == 3
+    updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1
+
+    retail.refresh_from_db()
+    entrepreneur.refresh_from_db()
+    assert retail.supplier_debt == Decimal("100300")
+    assert entrepreneur.supplier_debt == 0
+    assert DebtTransaction.objects.count() == transactions_count + 3
+
+
+@pytest.mark.django_db
+def test_api_bulk_debt_adjustments_is_atomic(active_user, network_nodes):
+    """Проверяет откат всего пакета при ошибке в одном из изменений."""
+    factory, retail, entrepreneur = network_nodes
+    transactions_count = DebtTransaction.objects.count()
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    payload = [
+        {"node": retail.id, "amount": "500"},
+        {"node": 99999, "amount": "100"},
+    ]
+    response = client.post(
+        "/api/network-nodes/debt-adjustments/", payload, format="json"
+    )
+
+    assert response.status_code == 400
+    retail.refresh_from_db()
+    assert retail.supplier_debt == 100_000
+    assert DebtTransaction.objects.count() == transactions_count
+
+
+@pytest.mark.django_db
+def test_api_reassign_suppliers(active_user, network_nodes):
+    """Проверяет пакетную смену поставщиков с отчетом об ошибках."""
+    factory, retail, entrepreneur = network_nodes
+    factory_2 = NetworkNode.objects.create(
+        node_type="factory", name="Завод 2", supplier=None
+    )
+    factory_2.products.set(factory.products.all())
+    NetworkNode.objects.filter(pk=entrepreneur.pk).update(supplier_debt=0)
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    payload = [
+        {"node": entrepreneur.id, "supplier": factory_2.id},
+        {"node": retail.id, "supplier": factory_2.id},
+    ]
+    response = client.post(
+        "/api/network-nodes/reassign-suppliers/?all_or_nothing=true",
+        payload,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["moved"] == []
+    assert list(response.data["failed"]) == [retail.id]
+
+    response = client.post(
+        "/api/network-nodes/reassign-suppliers/", payload, format="json"
+    )
+
+    assert response.status_code == 200
+    assert response.data["moved"] == [entrepreneur.id]
+    entrepreneur.refresh_from_db()
+    assert (entrepreneur.supplier_id, entrepreneur.level) == (factory_2.id, 1)
+
+    response = client.post(
+        "/api/network-nodes/reassign-suppliers/", [{"node": 1}], format="json"
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_subtree_products(active_user, network_nodes, product_objects):
+    """Проверяет изменение продуктов звена и его клиентов одним запросом."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+    url = f"/api/network-nodes/{retail.id}/subtree-products/"
+
+    response = client.post(url, {"add": [product_3.id]}, format="json")
+
+    assert response.status_code == 200
+    assert response.data == {"nodes": 2, "added": 2, "removed": 0}
+    assert entrepreneur.products.filter(pk=product_3.id).exists()
+
+    response = client.post(url, {"remove": [product_1.id], "depth": 0}, format="json")
+
+    assert response.status_code == 400
+    assert "products" in response.data
+    assert retail.products.filter(pk=product_1.id).exists()
+
+    response = client.post(url, {}, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_patch_products_by_ids(active_user, network_nodes, product_objects):
+    """Проверяет PATCH продуктов звена списками id."""
+    factory, retail, entrepreneur = network_nodes
+    product_1, product_2, product_3 = product_objects
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.patch(
+        f"/api/network-nodes/{entrepreneur.id}/",
+        {"products_add": [product_2.id], "products_remove": [product_1.id]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert "products_add" not in response.data
+    assert set(entrepreneur.products.values_list("pk", flat=True)) == {product_2.id}
+
+
+@pytest.mark.django_db
+def test_api_patch_products_add_query_count(
+    active_user, network_nodes, product_objects, django_assert_max_num_queries
+):
+    """Проверяет, что PATCH с products_add не перечитывает все продукты звена."""
+    factory, retail, entrepreneur = network_nodes
+
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    with django_assert_max_num_queries(17):
+        response = client.patch(
+            f"/api/network-nodes/{retail.id}/",
+            {"products_add": [product_objects[2].id]},
+            format="json",
+        )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_api_products_cursor_pagination_and_search(active_user, product_objects):
+    """Проверяет курсорные страницы каталога и поиск по префиксу названия и модели."""
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+
+    response = client.get("/api/products/?page_size=2")
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["results"]] == [
+        product.id for product in product_objects[:2]
+    ]
+    response = client.get(response.data["next"])
+    assert [item["id"] for item in response.data["results"]] == [product_objects[2].id]
+    assert response.data["next"] is None
+
+    response = client.get("/api/products/", {"search": "Продукт_2"})
+    assert [item["id"] for item in response.data["results"]] == [product_objects[1].id]
+
+    response = client.get("/api/products/", {"model": "X", "name_prefix": "Продукт"})
+    assert len(response.data["results"]) == 3
+
+
+@pytest.mark.django_db
+def test_api_products_bulk_upsert(active_user, product_objects):
+    """Проверяет пакетную загрузку каталога с отчетом и ошибками по строкам."""
+    product_1 = product_objects[0]
+    client = APIClient()
+    client.force_authenticate(user=active_user)
+    payload = [
+        {"name": product_1.name, "model": "X", "release_date": "2020-02-20"},
+        {"name": "Телефон", "model": "A1", "release_date": "2020-01-01"},
+    ]
+
+    response = client.post("/api/products/bulk-upsert/", payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data == {"inserted": 1, "unchanged": 1, "duplicates": 0}
+
+    payload.append({"name": "Планшет", "model": "B", "release_date": "01.01.2020"})
+    response = client.post("/api/products/bulk-upsert/", payload, format="json")
+
+    assert response.status_code == 400
+    assert list(response.data) == [2]
+
+    response = client.post("/api/products/", payload[1], format="json")
+    assert response.status_code == 400
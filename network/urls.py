@@ -1,10 +1,34 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from network.views import NetworkNodeViewSet
+from network import async_views
+from network.views import NetworkNodeViewSet, ProductViewSet
 
 app_name = "network"
 
 router = DefaultRouter()
 router.register(r"network-nodes", NetworkNodeViewSet, basename="network-node")
+router.register(r"products", ProductViewSet, basename="product")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "async/network-nodes/",
+        async_views.network_node_list,
+        name="async-network-node-list",
+    ),
+    path(
+        "async/network-nodes/stats/",
+        async_views.network_node_stats,
+        name="async-network-node-stats",
+    ),
+    path(
+        "async/network-nodes/<int:pk>/",
+        async_views.network_node_detail,
+        name="async-network-node-detail",
+    ),
+    path(
+        "async/network-nodes/<int:pk>/subtree/",
+        async_views.network_node_subtree,
+        name="async-network-node-subtree",
+    ),
+]
@@ -1,30 +1,111 @@
+import ipaddress
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import ProtectedError
+from django.http import Http404, HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from network.filters import NetworkNodeFilter
-from network.models import NetworkNode
+from network.bulk import assign_products, reassign_suppliers
+from network.catalog import upsert_products
+from network.filters import (
+    NetworkNodeFilter,
+    NetworkNodeListingFilter,
+    ProductFilter,
+    StableOrderingFilter,
+)
+from network.metrics import registry
+from network.models import NetworkNode, NetworkNodeListing, Product
+from network.pagination import NetworkNodePagination, ProductCursorPagination
 from network.permissions import IsActiveEmployee
-from network.serializers import (NetworkNodeReadSerializer,
-                                 NetworkNodeWriteSerializer)
+from network.serializers import (
+    DebtAdjustmentSerializer,
+    DebtTransactionSerializer,
+    NetworkNodeListingSerializer,
+    NetworkNodeReadSerializer,
+    NetworkNodeWriteSerializer,
+    PreconditionFailed,
+    ProductSerializer,
+    SubtreeProductsSerializer,
+    SupplierReassignmentSerializer,
+)
 
 
 class NetworkNodeViewSet(ModelViewSet):
-    queryset = NetworkNode.objects.all()
+    queryset = NetworkNode.objects.select_related(
+        "contact", "supplier"
+    ).prefetch_related("products")
     filter_backends = [
         DjangoFilterBackend,
+        StableOrderingFilter,
     ]
-    filterset_class = NetworkNodeFilter
+    ordering_fields = ["supplier_debt", "created_at", "name", "level", "id"]
+    ordering = ["id"]
+    pagination_class = NetworkNodePagination
     permission_classes = [IsAuthenticated, IsActiveEmployee]
 
+    def _use_listing(self):
+        """Список читается из таблицы чтения, если она включена (network.listing)."""
+        return settings.NETWORK_LISTING_READ_MODEL and self.action == "list"
+
+    @property
+    def filterset_class(self):
+        return NetworkNodeListingFilter if self._use_listing() else NetworkNodeFilter
+
+    def get_queryset(self):
+        if self._use_listing():
+            return NetworkNodeListing.objects.all()
+        if self.action in ["update", "partial_update", "destroy"]:
+            # Изменение читает только связи с затронутыми продуктами, а ответ
+            # загружает продукты после изменения.
+            return NetworkNode.objects.select_related("contact", "supplier")
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return NetworkNodeWriteSerializer
+        if self._use_listing():
+            return NetworkNodeListingSerializer
         return NetworkNodeReadSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ["update", "partial_update"]:
+            context["expected_version"] = self._get_expected_version()
+        return context
+
+    def _get_expected_version(self):
+        """Извлекает ожидаемую версию звена из заголовка If-Match."""
+        if_match = self.request.headers.get("If-Match")
+        if not if_match or if_match.strip() == "*":
+            return None
+
+        etag = if_match.strip().removeprefix("W/").strip('"')
+        try:
+            return int(etag)
+        except ValueError:
+            raise PreconditionFailed()
+
+    def _set_etag(self, response):
+        """Добавляет в ответ ETag с текущей версией звена."""
+        if response.status_code == status.HTTP_200_OK and "version" in response.data:
+            response["ETag"] = f'"{response.data["version"]}"'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._set_etag(super().retrieve(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        return self._set_etag(super().update(request, *args, **kwargs))
+
     def destroy(self, request, *args, **kwargs):
         try:
             return super().destroy(request, *args, **kwargs)
@@ -35,3 +116,133 @@ class NetworkNodeViewSet(ModelViewSet):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
+    @action(detail=True, methods=["post"], url_path="debt-adjustments")
+    def debt_adjustments(self, request, pk=None):
+        """Изменяет задолженность звена на сумму amount (положительную или отрицательную)."""
+        if not isinstance(request.data, Mapping):
+            raise ValidationError(
+                {"non_field_errors": ["Ожидается объект с полями amount и comment."]}
+            )
+        data = request.data.copy()
+        data["node"] = self.get_object().pk
+        serializer = DebtAdjustmentSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        debt_transaction = serializer.save()
+        return Response(
+            DebtTransactionSerializer(debt_transaction).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="debt-adjustments")
+    def bulk_debt_adjustments(self, request):
+        """Применяет список изменений задолженности разных звеньев в одной транзакции."""
+        serializer = DebtAdjustmentSerializer(
+            data=request.data, many=True, allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+        debt_transactions = serializer.save()
+        return Response(
+            DebtTransactionSerializer(debt_transactions, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="reassign-suppliers")
+    def bulk_reassign_suppliers(self, request):
+        """
+        Переносит список звеньев к новым поставщикам в одной транзакции.
+
+        Возвращает отчет: перенесенные, не изменившиеся и не прошедшие проверку
+        звенья с причинами. С параметром all_or_nothing=true ошибка любого
+        переноса отменяет весь пакет (ответ 400 с тем же отчетом).
+        """
+        serializer = SupplierReassignmentSerializer(
+            data=request.data, many=True, allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+        all_or_nothing = request.query_params.get("all_or_nothing") in ("1", "true")
+        report = reassign_suppliers(
+            [(item["node"], item["supplier"]) for item in serializer.validated_data],
+            all_or_nothing=all_or_nothing,
+        )
+        rejected = all_or_nothing and report["failed"]
+        return Response(
+            report,
+            status=status.HTTP_400_BAD_REQUEST if rejected else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["post"], url_path="subtree-products")
+    def subtree_products(self, request, pk=None):
+        """
+        Добавляет и удаляет продукты у звена и всех его клиентов одним пакетом.
+
+        depth ограничивает число уровней клиентов, к которым применяется изменение.
+        """
+        serializer = SubtreeProductsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            report = assign_products(self.get_object().pk, **serializer.validated_data)
+        except DjangoValidationError as e:
+            raise ValidationError({"products": e.messages})
+        return Response(report)
+
+
+class ProductViewSet(ModelViewSet):
+    """Каталог продуктов с курсорной пагинацией и пакетной загрузкой."""
+
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ProductFilter
+    pagination_class = ProductCursorPagination
+    permission_classes = [IsAuthenticated, IsActiveEmployee]
+
+    @action(detail=False, methods=["post"], url_path="bulk-upsert")
+    def bulk_upsert(self, request):
+        """
+        Добавляет список продуктов; уже существующие продукты не изменяются.
+
+        Продукты сравниваются по (name, model, release_date). При ошибке в любой
+        строке ничего не записывается, ошибки возвращаются по номерам строк.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError(
+                {"non_field_errors": ["Ожидается непустой список продуктов."]}
+            )
+        try:
+            report = upsert_products(request.data)
+        except DjangoValidationError as e:
+            errors = (
+                e.message_dict
+                if hasattr(e, "error_dict")
+                else {"non_field_errors": e.messages}
+            )
+            raise ValidationError(errors)
+        return Response(report)
+
+
+def _metrics_client_allowed(request):
+    """Сотрудник с правами staff или адрес из NETWORK_METRICS_ALLOWED_IPS."""
+    if request.user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.NETWORK_METRICS_ALLOWED_IPS
+    )
+
+
+def metrics_view(request):
+    """Показатели запросов процесса в текстовом формате Prometheus."""
+    if not settings.NETWORK_METRICS_ENABLED:
+        raise Http404()
+    if not _metrics_client_allowed(request):
+        raise PermissionDenied()
+
+    return HttpResponse(
+        registry.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )